@@ -0,0 +1,79 @@
+"""
+Micro-benchmark de FinancialExtractor : tokenizer linéaire vs patterns regex historiques
+Usage : python benchmark_financial_extractor.py [fichier.pdf ...]
+"""
+
+import sys
+import time
+import timeit
+from pathlib import Path
+
+# Ajout du chemin
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.extraction.financial_extractor import FinancialExtractor
+
+SAMPLE_CLAUSE = (
+    "Article 5 - Prix et modalités de paiement\n"
+    "Le tarif journalier du consultant est fixé à 650 € HT/jour. Les frais de déplacement\n"
+    "sont remboursés à 0,45 € /km. Le montant forfaitaire de la mission s'élève à 12 500,00 euros HT.\n"
+    "Le règlement des factures intervient à 30 jours fin de mois, par virement,\n"
+    "les acomptes étant versés mensuellement. Pénalités de retard : 3 fois le taux légal.\n"
+)
+
+# Texte sans montant : le pire cas des patterns .*? (retour arrière sur tout le texte)
+FILLER_LINE = "Le prestataire s'engage à exécuter la mission conformément aux règles de l'art et au cahier des charges.\n"
+
+def build_corpus(repeat: int) -> str:
+    """Contrat synthétique : clauses financières noyées dans du texte courant"""
+    return (FILLER_LINE * 40 + SAMPLE_CLAUSE) * repeat
+
+def load_pdf_texts(paths):
+    """Texte des PDF fournis en argument"""
+    from contract_reader.extraction.pdf_extractor import PDFExtractor
+    extractor = PDFExtractor()
+    texts = {}
+    for path in paths:
+        pages, _ = extractor.extract_text_with_positions(Path(path).read_bytes())
+        texts[Path(path).name] = "\n".join(page.text for page in pages)
+    return texts
+
+def bench(label: str, text: str, number: int = 5):
+    """Temps moyen par appel pour chaque moteur"""
+    results = {}
+    for engine in FinancialExtractor.ENGINES:
+        extractor = FinancialExtractor(engine=engine)
+        extractor.extract_financial_info(text)  # Échauffement (compilation des patterns)
+        elapsed = timeit.timeit(lambda: extractor.extract_financial_info(text), number=number) / number
+        info = extractor.extract_financial_info(text)
+        results[engine] = (elapsed, len(info["amounts_found"]), len(info["payment_terms_found"]))
+    
+    regex_time = results["regex"][0]
+    tokenizer_time = results["tokenizer"][0]
+    print(f"\n📄 {label} ({len(text):,} caractères)")
+    for engine, (elapsed, amounts, terms) in results.items():
+        print(f"   {engine:<10} {elapsed * 1000:9.2f} ms  montants={amounts:<4} conditions={terms}")
+    print(f"   ⚡ speedup x{regex_time / max(tokenizer_time, 1e-9):.1f}")
+
+def main():
+    import logging
+    logging.disable(logging.INFO)
+    
+    print("🧪 Benchmark FinancialExtractor (tokenizer vs regex)")
+    print("=" * 50)
+    
+    for repeat in (1, 10, 100):
+        bench(f"Synthétique x{repeat}", build_corpus(repeat))
+    
+    # Une seule ligne sans montant ni saut : les .*? parcourent tout le texte à chaque mot-clé
+    bench("Pire cas (mots-clés sans montant)", "prix paiement " * 2000, number=1)
+    
+    for name, text in load_pdf_texts(sys.argv[1:]).items():
+        bench(name, text)
+    
+    start = time.time()
+    FinancialExtractor().extract_financial_info(SAMPLE_CLAUSE)
+    print(f"\n✅ Terminé ({(time.time() - start) * 1000:.2f} ms pour une clause)")
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,11 @@ Résumés intelligents de contrats avec IA et validation
 __version__ = "1.0.0"
 __description__ = "Contract Reader - Résumés automatiques de contrats"
 
-# Import du pipeline principal pour faciliter l'utilisation
-from .main_pipeline import contract_reader_pipeline
-
 __all__ = ["contract_reader_pipeline"]
+
+def __getattr__(name):
+    """Pipeline principal importé au premier accès : les sous-modules (ex. token_counter) s'importent sans effet de bord"""
+    if name == "contract_reader_pipeline":
+        from .main_pipeline import contract_reader_pipeline
+        return contract_reader_pipeline
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,8 +3,18 @@ Module IA pour résumés de contrats optimisés
 Pipeline 2 étages : extraction factuelle + réécriture claire
 """
 
-from .ai_summarizer import AISummarizer
-from .prompt_templates import PromptTemplates
-from .cost_optimizer import CostOptimizer
+import importlib
 
 __all__ = ["AISummarizer", "PromptTemplates", "CostOptimizer"]
+
+_EXPORTS = {
+    "AISummarizer": ".ai_summarizer",
+    "PromptTemplates": ".prompt_templates",
+    "CostOptimizer": ".cost_optimizer"
+}
+
+def __getattr__(name):
+    """Import à la demande : token_counter reste importable sans charger OpenAI ni l'extraction"""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,24 +5,40 @@ Pipeline 2 étages avec validation et métriques
 
 import os
 import time
+import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 
 from openai import AsyncOpenAI
 from ..models import ContractSummary, SummaryMode, ProcessingMetrics
 from ..extraction.text_processor import ProcessedDocument
+from ..extraction.financial_extractor import FinancialExtractor
 from ..config import contract_reader_config
+from .token_counter import get_token_counter
+from .map_reduce import build_chunks, merge_fragments
+from .context_packer import ContextPacker
 
 logger = logging.getLogger(__name__)
 
+# Budget de tokens du contexte de contrat selon le mode : un contrat courant (8 à 10k tokens) tient en un appel
+# en standard (≈ 20000/40000/55000 caractères de français)
+SUMMARY_INPUT_TOKENS = {
+    'quick': 6000,
+    'standard': 12000,
+    'detailed': 16000
+}
+SUMMARY_MAX_OUTPUT_TOKENS = 3000
+
 class AISummarizer:
     """Résumeur IA avec optimisation des coûts"""
     
     def __init__(self):
         """Initialise le service de résumé IA basé sur la configuration"""
         self.config = contract_reader_config
+        self.token_counter = get_token_counter(self.config.openai_model)  # Tokenizer chargé au premier comptage
+        self.context_packer = ContextPacker(self.token_counter)
         
         if self.config.use_real_openai:
             self.client = AsyncOpenAI(api_key=self.config.openai_api_key)
@@ -64,35 +80,41 @@ class AISummarizer:
                     'error': 'OpenAI API required for real contract analysis'
                 }
             
-            # Étape 1: Optimisation du texte d'entrée (réduction tokens)
-            optimized_text = self._optimize_input_text(extracted_text, summary_mode)
+            # Étape 1: Contexte condensé par pertinence dans le budget du mode
+            optimized_text, context_coverage = self._optimize_input_text(extracted_text, summary_mode)
+            
+            # Trop de faits laissés de côté : résumé par extraits plutôt qu'un contexte lacunaire
+            if self._needs_chunking(context_coverage):
+                return await self.generate_chunked_summary(extracted_text, filename, summary_mode)
             
-            # Étape 2: Estimation coût
-            estimated_tokens = len(optimized_text.split()) * 1.3  # Approximation
-            estimated_cost_cents = (estimated_tokens / 1000) * 0.15  # GPT-4o-mini pricing
+            # Étape 2: Prompts puis estimation du coût en tokens exacts (sortie au plafond max_tokens)
+            from .prompts import get_system_prompt, format_user_prompt
+            
+            system_prompt = get_system_prompt(summary_mode)
+            user_prompt = format_user_prompt(optimized_text, filename, max_tokens=context_coverage["budget_tokens"])
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+            
+            input_tokens = self.token_counter.count_messages(messages)
+            estimated_cost_cents = self.token_counter.cost_cents(input_tokens, SUMMARY_MAX_OUTPUT_TOKENS)
             
             if estimated_cost_cents > self.config.max_cost_cents:  # Limite sécurité configurable
                 return {
                     'success': False,
-                    'error': f'Cost too high: {estimated_cost_cents:.2f}¢ > 10¢ limit'
+                    'error': f'Cost too high: {estimated_cost_cents:.2f}¢ > {self.config.max_cost_cents:.2f}¢ limit',
+                    'input_tokens': input_tokens
                 }
             
             # Étape 3: Appel OpenAI GPT-4o-mini
-            logger.info(f"Generating summary with OpenAI for {filename}")
-            
-            from .prompts import get_system_prompt, format_user_prompt
-            
-            system_prompt = get_system_prompt(summary_mode)
-            user_prompt = format_user_prompt(optimized_text, filename)
+            logger.info(f"Generating summary with OpenAI for {filename} ({input_tokens} input tokens)")
             
             response = await self.client.chat.completions.create(
                 model=self.config.openai_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=messages,
                 temperature=0.0,  # Précision maximale pour extraction factuelle
-                max_tokens=3000,  # Plus de tokens pour analyse complète
+                max_tokens=SUMMARY_MAX_OUTPUT_TOKENS,  # Plus de tokens pour analyse complète
                 response_format={"type": "json_object"}
             )
             
@@ -100,16 +122,8 @@ class AISummarizer:
                 # Traitement de la réponse
                 content = response.choices[0].message.content
                 
-                # Nettoyage du contenu pour enlever les balises markdown potentielles
-                content = content.strip()
-                if content.startswith('```json'):
-                    content = content[7:]
-                if content.endswith('```'):
-                    content = content[:-3]
-                content = content.strip()
-                
                 try:
-                    summary_data = json.loads(content)
+                    summary_data = self._parse_json_content(content)
                 except json.JSONDecodeError as json_error:
                     logger.error(f"Erreur parsing JSON: {json_error}")
                     logger.error(f"Contenu reçu: {content[:500]}...")
@@ -124,7 +138,9 @@ class AISummarizer:
                 
                 # Calcul du coût réel
                 tokens_used = response.usage.total_tokens
-                actual_cost_cents = (tokens_used / 1000) * 0.15
+                actual_cost_cents = self.token_counter.cost_cents(
+                    response.usage.prompt_tokens, response.usage.completion_tokens
+                )
                 processing_time = time.time() - start_time
                 
                 logger.info(f"Summary generated successfully. Tokens: {tokens_used}, Cost: {actual_cost_cents:.2f}¢")
@@ -134,7 +150,11 @@ class AISummarizer:
                     'summary': summary_data,
                     'cost_euros': actual_cost_cents / 100,
                     'processing_time': processing_time,
-                    'tokens_used': tokens_used
+                    'tokens_used': tokens_used,
+                    'input_tokens': response.usage.prompt_tokens,
+                    'output_tokens': response.usage.completion_tokens,
+                    'estimated_input_tokens': input_tokens,
+                    'context_coverage': context_coverage
                 }
                 
             except Exception as e:
@@ -153,24 +173,139 @@ class AISummarizer:
                 'processing_time': time.time() - start_time
             }
     
-    def _optimize_input_text(self, text_content: str, summary_mode: str) -> str:
-        """Optimise le texte d'entrée pour réduire les tokens"""
+    async def generate_chunked_summary(self, source: Union[ProcessedDocument, str], filename: str,
+                                       summary_mode: str = "standard") -> Dict[str, Any]:
+        """
+        Résumé d'un contrat long par extraits découpés aux articles, appels OpenAI concurrents (sémaphore)
+        Fragments UniversalContractV3 fusionnés localement : latence proche d'un appel, document couvert en entier
+        """
+        start_time = time.time()
+        
+        text = source.ai_text if isinstance(source, ProcessedDocument) else source
+        text = ' '.join(text.split())
+        chunks = build_chunks(text, self.config.summary_chunk_tokens, self.token_counter)
+        
+        from .prompts import get_system_prompt, format_user_prompt
+        
+        # Informations financières extraites une fois sur le document entier, reprises dans chaque extrait
+        financial_extractor = FinancialExtractor()
+        financial_section = financial_extractor.format_for_prompt(financial_extractor.extract_financial_info(text))
+        
+        system_prompt = get_system_prompt(summary_mode)
+        requests = [
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": format_user_prompt(
+                    chunk, filename, max_tokens=self.config.summary_chunk_tokens, excerpt=(index, len(chunks)),
+                    financial_section=financial_section
+                )}
+            ]
+            for index, chunk in enumerate(chunks, 1)
+        ]
+        
+        # Coût maximal de l'ensemble des extraits avant tout appel
+        input_tokens = sum(self.token_counter.count_messages(messages) for messages in requests)
+        estimated_cost_cents = self.token_counter.cost_cents(input_tokens, SUMMARY_MAX_OUTPUT_TOKENS * len(chunks))
+        
+        if estimated_cost_cents > self.config.max_cost_cents:
+            return {
+                'success': False,
+                'error': f'Cost too high: {estimated_cost_cents:.2f}¢ > {self.config.max_cost_cents:.2f}¢ limit',
+                'input_tokens': input_tokens,
+                'chunks': len(chunks)
+            }
+        
+        logger.info(f"Generating chunked summary for {filename}: {len(chunks)} excerpts, {input_tokens} input tokens")
+        
+        semaphore = asyncio.Semaphore(max(1, self.config.summary_max_concurrency))
+        
+        async def summarize_chunk(messages: List[Dict[str, str]]):
+            async with semaphore:
+                return await self.client.chat.completions.create(
+                    model=self.config.openai_model,
+                    messages=messages,
+                    temperature=0.0,
+                    max_tokens=SUMMARY_MAX_OUTPUT_TOKENS,
+                    response_format={"type": "json_object"}
+                )
+        
+        responses = await asyncio.gather(*(summarize_chunk(messages) for messages in requests), return_exceptions=True)
+        
+        fragments = []
+        failed_chunks = []
+        prompt_tokens = completion_tokens = 0
+        for index, response in enumerate(responses, 1):
+            if isinstance(response, Exception):
+                logger.error(f"Extrait {index}/{len(chunks)} en échec: {response}")
+                failed_chunks.append(index)
+                continue
+            
+            prompt_tokens += response.usage.prompt_tokens
+            completion_tokens += response.usage.completion_tokens
+            try:
+                fragments.append(self._parse_json_content(response.choices[0].message.content))
+            except json.JSONDecodeError as json_error:
+                logger.error(f"Erreur parsing JSON extrait {index}: {json_error}")
+                failed_chunks.append(index)
+        
+        if not fragments:
+            return {
+                'success': False,
+                'error': f'All {len(chunks)} excerpts failed',
+                'processing_time': time.time() - start_time
+            }
+        
+        summary_data = self._validate_universal_contract_schema(merge_fragments(fragments))
+        if failed_chunks:
+            summary_data["missing_info"] = list(summary_data.get("missing_info") or []) + [
+                f"Extrait {index}/{len(chunks)} du contrat non analysé" for index in failed_chunks
+            ]
+        
+        actual_cost_cents = self.token_counter.cost_cents(prompt_tokens, completion_tokens)
+        logger.info(f"Chunked summary generated. Tokens: {prompt_tokens + completion_tokens}, Cost: {actual_cost_cents:.2f}¢")
+        
+        return {
+            'success': True,
+            'summary': summary_data,
+            'cost_euros': actual_cost_cents / 100,
+            'processing_time': time.time() - start_time,
+            'tokens_used': prompt_tokens + completion_tokens,
+            'input_tokens': prompt_tokens,
+            'output_tokens': completion_tokens,
+            'estimated_input_tokens': input_tokens,
+            'chunks': len(chunks),
+            'failed_chunks': failed_chunks
+        }
+    
+    def _needs_chunking(self, context_coverage: Dict[str, Any]) -> bool:
+        """
+        Document plusieurs fois plus long que le budget du mode et contexte condensé couvrant trop peu de ses faits
+        Un contrat courant reste en appel unique : chaque extrait répète le prompt système et le schéma
+        """
+        if not self.config.chunked_summary_enabled or not context_coverage.get("packed"):
+            return False
+        oversized = context_coverage["total_tokens"] >= self.config.summary_chunking_ratio * context_coverage["budget_tokens"]
+        return oversized and context_coverage.get("fact_coverage", 1.0) < self.config.summary_min_fact_coverage
+    
+    def _parse_json_content(self, content: str) -> Dict[str, Any]:
+        """JSON de la réponse, sans balises markdown éventuelles"""
+        content = content.strip()
+        if content.startswith('```json'):
+            content = content[7:]
+        if content.endswith('```'):
+            content = content[:-3]
+        return json.loads(content.strip())
+    
+    def _optimize_input_text(self, text_content: str, summary_mode: str) -> Tuple[str, Dict[str, Any]]:
+        """Optimise le texte d'entrée pour réduire les tokens ; retourne (texte, couverture du contexte)"""
         # Suppression des espaces multiples et caractères inutiles
         cleaned_text = ' '.join(text_content.split())
         
-        # Limitation selon le mode - AUGMENTÉE pour ne pas perdre les montants
-        max_chars = {
-            'quick': 5000,
-            'standard': 10000,
-            'detailed': 15000
-        }.get(summary_mode, 10000)
-        
-        if len(cleaned_text) > max_chars:
-            # Garde le début et la fin du document pour ne pas perdre les infos importantes
-            half_size = max_chars // 2
-            cleaned_text = cleaned_text[:half_size] + "\n[...CONTENU TRONQUÉ...]\n" + cleaned_text[-half_size:]
+        # Budget de tokens selon le mode - passages les plus pertinents pour le schéma
+        max_tokens = SUMMARY_INPUT_TOKENS.get(summary_mode, SUMMARY_INPUT_TOKENS['standard'])
+        packed = self.context_packer.pack(cleaned_text, max_tokens)
         
-        return cleaned_text
+        return packed.text, packed.coverage
     
     def _create_fallback_universal_contract(self, error_message: str) -> Dict[str, Any]:
         """Crée une structure UniversalContractV2 minimale en cas d'erreur"""
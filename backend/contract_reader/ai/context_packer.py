@@ -0,0 +1,205 @@
+"""
+Sélection du contexte envoyé à l'IA sous un budget de tokens
+Passages classés par pertinence pour les champs UniversalContractV3 (BM25, densité de faits, montants)
+"""
+
+import bisect
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+from .token_counter import TokenCounter, get_token_counter
+from .map_reduce import split_sections, SENTENCE_END_PATTERN
+from ..extraction.fact_scanner import FactScanner
+
+SPAN_TOKENS = 150  # Taille visée d'un passage (phrases consécutives d'une même section)
+GAP_MARKER = " [...] "
+
+# Vocabulaire des blocs UniversalContractV3 (préfixes de mots, casse ignorée)
+FIELD_TERMS: Dict[str, List[str]] = {
+    "parties": ["entre", "société", "siret", "siren", "rcs", "siège", "représenté", "immatricul", "capital",
+                "prestataire", "client", "bailleur", "preneur", "employeur", "salarié"],
+    "contract": ["objet", "durée", "entrée en vigueur", "prise d'effet", "reconduction", "renouvel",
+                 "préavis", "terme", "échéance", "période d'essai"],
+    "financials": ["prix", "tarif", "montant", "€", "eur", "ht", "ttc", "tva", "factur", "paiement",
+                   "règlement", "rémunération", "honoraires", "loyer", "redevance", "pénalit", "indexation"],
+    "obligations": ["obligation", "engage", "s'oblige", "livr", "fourni", "garanti", "conformité"],
+    "service_levels": ["niveau de service", "sla", "kpi", "disponibilité", "délai d'intervention", "performance"],
+    "data_privacy": ["rgpd", "données personnelles", "données à caractère personnel", "sous-traitant",
+                     "responsable de traitement", "sécurité des données"],
+    "governance": ["résiliation", "résili", "responsabilité", "assurance", "force majeure", "confidentialit",
+                   "propriété intellectuelle", "non-concurrence", "non-sollicitation", "droit applicable",
+                   "tribunal", "juridiction", "litige", "médiation"]
+}
+
+WORD_PATTERN = re.compile(r"[\w'’-]+|€")
+BM25_K1 = 1.5
+BM25_B = 0.75
+FACT_WEIGHT = 0.5  # Poids de la densité de faits (faits pour 100 tokens, plafonnée à 1)
+AMOUNT_WEIGHT = 0.25  # Poids par montant repéré (plafonné à 3 montants)
+
+@dataclass
+class Span:
+    """Passage candidat : phrases consécutives d'une section"""
+    index: int
+    start: int
+    end: int
+    text: str
+    tokens: int
+    facts: int = 0
+    amounts: int = 0
+    fields: Dict[str, float] = field(default_factory=dict)
+    score: float = 0.0
+
+@dataclass
+class PackedContext:
+    """Texte retenu et couverture obtenue"""
+    text: str
+    coverage: Dict[str, Any]
+
+class ContextPacker:
+    """Classe les passages d'un contrat et remplit un budget de tokens par pertinence décroissante"""
+    
+    def __init__(self, token_counter: Optional[TokenCounter] = None):
+        self.token_counter = token_counter or get_token_counter()
+        self.fact_scanner = FactScanner()
+        self._field_patterns = {
+            name: [re.compile(r'(?<!\w)' + re.escape(term), re.IGNORECASE) for term in terms]
+            for name, terms in FIELD_TERMS.items()
+        }
+    
+    def pack(self, text: str, max_tokens: int) -> PackedContext:
+        """Passages les plus pertinents dans max_tokens, restitués dans l'ordre du document"""
+        total_tokens = self.token_counter.count(text)
+        spans = self._build_spans(text)
+        if spans:
+            self._score_spans(text, spans)
+        
+        if total_tokens <= max_tokens or not spans:
+            return PackedContext(text, self._coverage(spans, spans, max_tokens, total_tokens, total_tokens))
+        
+        # Préambule toujours conservé (identité des parties), puis pertinence décroissante
+        gap_tokens = self.token_counter.count(GAP_MARKER)
+        ranked = [spans[0]] + sorted(spans[1:], key=lambda span: (-span.score, span.index))
+        selected = []
+        used = 0
+        for span in ranked:
+            cost = span.tokens + gap_tokens
+            if used + cost <= max_tokens:
+                selected.append(span)
+                used += cost
+        
+        selected.sort(key=lambda span: span.index)
+        parts = []
+        previous = None
+        for span in selected:
+            if previous is not None:
+                parts.append(" " if span.index == previous.index + 1 else GAP_MARKER)
+            parts.append(span.text.strip())
+            previous = span
+        if previous is not None and previous.index != spans[-1].index:
+            parts.append(GAP_MARKER.rstrip())
+        
+        packed_text = "".join(parts)
+        packed_tokens = self.token_counter.count(packed_text)
+        return PackedContext(packed_text, self._coverage(spans, selected, max_tokens, total_tokens, packed_tokens))
+    
+    def _build_spans(self, text: str) -> List[Span]:
+        """Découpe section par section en passages d'environ SPAN_TOKENS tokens"""
+        spans = []
+        offset = 0
+        for section in split_sections(text):
+            section_start = text.find(section, offset)
+            offset = section_start + len(section)
+            
+            cursor = section_start
+            current_start = None
+            current_tokens = 0
+            for sentence in SENTENCE_END_PATTERN.split(section):
+                if not sentence.strip():
+                    continue
+                sentence_start = text.find(sentence, cursor)
+                cursor = sentence_start + len(sentence)
+                sentence_tokens = self.token_counter.count(sentence)
+                
+                if current_start is not None and current_tokens + sentence_tokens > SPAN_TOKENS:
+                    spans.append(self._make_span(text, len(spans), current_start, span_end))
+                    current_start, current_tokens = None, 0
+                if current_start is None:
+                    current_start = sentence_start
+                current_tokens += sentence_tokens
+                span_end = cursor
+            
+            if current_start is not None:
+                spans.append(self._make_span(text, len(spans), current_start, span_end))
+        return spans
+    
+    def _make_span(self, text: str, index: int, start: int, end: int) -> Span:
+        span_text = text[start:end]
+        return Span(index, start, end, span_text, self.token_counter.count(span_text))
+    
+    def _score_spans(self, text: str, spans: List[Span]):
+        """BM25 par bloc UniversalContractV3 (normalisé par bloc), densité de faits et montants"""
+        # Faits repérés en une passe sur le texte complet, rattachés aux passages par position
+        starts = [span.start for span in spans]
+        for fact in self.fact_scanner.scan(text).facts:
+            span = spans[max(0, bisect.bisect_right(starts, fact.start) - 1)]
+            span.facts += 1
+            if fact.fact_type == "amounts":
+                span.amounts += 1
+        
+        lengths = [max(1, len(WORD_PATTERN.findall(span.text))) for span in spans]
+        average_length = sum(lengths) / len(lengths)
+        
+        for name, patterns in self._field_patterns.items():
+            frequencies = [[len(pattern.findall(span.text)) for pattern in patterns] for span in spans]
+            document_frequencies = [sum(1 for row in frequencies if row[column]) for column in range(len(patterns))]
+            idf = [
+                math.log((len(spans) - df + 0.5) / (df + 0.5) + 1.0)
+                for df in document_frequencies
+            ]
+            
+            scores = []
+            for row, length in zip(frequencies, lengths):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                scores.append(sum(weight * tf * (BM25_K1 + 1) / (tf + norm) for weight, tf in zip(idf, row) if tf))
+            
+            best = max(scores) or 1.0
+            for span, score in zip(spans, scores):
+                if score:
+                    span.fields[name] = score / best
+        
+        for span in spans:
+            fact_density = min(1.0, span.facts * 100 / max(span.tokens, 1) / 4)
+            span.score = sum(span.fields.values()) + FACT_WEIGHT * fact_density + AMOUNT_WEIGHT * min(span.amounts, 3)
+    
+    def _coverage(self, spans: List[Span], selected: List[Span], budget: int,
+                  total_tokens: int, packed_tokens: int) -> Dict[str, Any]:
+        """Part du document, des faits, des montants et des blocs du schéma présente dans le contexte"""
+        selected_fields = {name for span in selected for name in span.fields}
+        document_fields = {name for span in spans for name in span.fields}
+        facts_total = sum(span.facts for span in spans)
+        amounts_total = sum(span.amounts for span in spans)
+        facts_kept = sum(span.facts for span in selected)
+        amounts_kept = sum(span.amounts for span in selected)
+        
+        return {
+            "budget_tokens": budget,
+            "total_tokens": total_tokens,
+            "packed_tokens": packed_tokens,
+            "token_coverage": round(packed_tokens / total_tokens, 3) if total_tokens else 1.0,
+            "spans_kept": len(selected),
+            "spans_total": len(spans),
+            "facts_kept": facts_kept,
+            "facts_total": facts_total,
+            "fact_coverage": round(facts_kept / facts_total, 3) if facts_total else 1.0,
+            "amounts_kept": amounts_kept,
+            "amounts_total": amounts_total,
+            "fields_covered": sorted(selected_fields),
+            "fields_missing": sorted(document_fields - selected_fields),
+            "packed": len(selected) < len(spans)
+        }
+
+def pack_context(text: str, max_tokens: int, token_counter: Optional[TokenCounter] = None) -> PackedContext:
+    """Raccourci : contexte classé par pertinence sous max_tokens"""
+    return ContextPacker(token_counter).pack(text, max_tokens)
@@ -8,6 +8,7 @@ from typing import Dict, Any, List, Tuple
 from dataclasses import dataclass
 from ..models import SummaryMode
 from ..extraction.text_processor import ProcessedDocument
+from .token_counter import get_token_counter
 
 @dataclass
 class CostMetrics:
@@ -32,11 +33,8 @@ class CostOptimizer:
             "optimization_rate": 0.0
         }
         
-        # Prix GPT-4o-mini (cents par 1K tokens)
-        self.pricing = {
-            "input_cost_per_1k": 0.015,  # $0.00015 = 0.015 cents
-            "output_cost_per_1k": 0.06   # $0.0006 = 0.06 cents
-        }
+        # Comptage exact et prix GPT-4o-mini (cents par 1K tokens) partagés avec le résumeur
+        self.token_counter = get_token_counter()
     
     def optimize_input_text(self, doc: ProcessedDocument, mode: SummaryMode) -> Tuple[str, Dict[str, Any]]:
         """
@@ -44,13 +42,14 @@ class CostOptimizer:
         Pipeline 2 étages : faits structurés → résumé IA
         """
         original_length = len(doc.cleaned_text)
+        original_tokens = self.token_counter.count(doc.ai_text)
         
         # Étape 1: Créer un résumé factuel structuré (local, 0€)
         structured_facts = self._create_structured_facts(doc, mode)
         
         optimized_length = len(structured_facts)
-        tokens_saved = (original_length - optimized_length) // 4  # Approximation
-        cost_saved = (tokens_saved / 1000) * self.pricing["input_cost_per_1k"]
+        tokens_saved = max(0, original_tokens - self.token_counter.count(structured_facts))
+        cost_saved = self.token_counter.cost_cents(tokens_saved)
         
         optimization_info = {
             "original_length": original_length,
@@ -132,7 +131,7 @@ CONTEXTE ADDITIONNEL:
         """Estime le coût d'une requête"""
         
         # Estimation des tokens
-        input_tokens = len(input_text) // 4  # Approximation
+        input_tokens = self.token_counter.count(input_text)
         
         # Tokens de sortie selon le mode
         output_tokens_by_mode = {
@@ -143,9 +142,7 @@ CONTEXTE ADDITIONNEL:
         output_tokens = output_tokens_by_mode.get(mode, 400)
         
         # Calcul du coût
-        input_cost = (input_tokens / 1000) * self.pricing["input_cost_per_1k"]
-        output_cost = (output_tokens / 1000) * self.pricing["output_cost_per_1k"]
-        total_cost = input_cost + output_cost
+        total_cost = self.token_counter.cost_cents(input_tokens, output_tokens)
         
         return CostMetrics(
             input_tokens=input_tokens,
@@ -0,0 +1,122 @@
+"""
+Résumé par extraits pour les contrats longs
+Découpage aux frontières d'articles, fragments UniversalContractV3 par extrait, fusion locale sans appel IA
+"""
+
+import json
+import re
+from typing import Dict, Any, List, Optional
+from .token_counter import TokenCounter
+
+# Début d'une section : "ARTICLE 3", "Article premier", "TITRE II", "CHAPITRE 1", "ANNEXE A"
+SECTION_HEADING_PATTERN = re.compile(
+    r'\b(?:ARTICLE|Article|TITRE|Titre|CHAPITRE|Chapitre|ANNEXE|Annexe)\s+'
+    r'(?:\d+(?:\.\d+)*|[IVXLC]+\b|[A-Z]\b|premier|PREMIER|unique|UNIQUE)'
+)
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.;:!?])\s+')
+
+# Champs texte dont les extraits sont juxtaposés plutôt que départagés
+TEXT_MERGE_FIELDS = {"summary_plain"}
+# Clés identifiant un élément de liste (même partie, même date citée par deux extraits)
+IDENTITY_KEYS = ("name", "legal_name", "label", "title", "date")
+
+def split_sections(text: str) -> List[str]:
+    """Découpe le texte au début de chaque article, titre ou annexe (préambule compris)"""
+    starts = [match.start() for match in SECTION_HEADING_PATTERN.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(text))
+    return [text[start:end] for start, end in zip(starts, starts[1:]) if text[start:end].strip()]
+
+def build_chunks(text: str, max_tokens: int, token_counter: TokenCounter) -> List[str]:
+    """Regroupe les sections consécutives en extraits d'au plus max_tokens (section trop longue : par phrases)"""
+    pieces = []
+    for section in split_sections(text):
+        if token_counter.count(section) <= max_tokens:
+            pieces.append(section)
+        else:
+            pieces.extend(_split_long_section(section, max_tokens, token_counter))
+    
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = token_counter.count(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append(''.join(current).strip())
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append(''.join(current).strip())
+    return chunks
+
+def _split_long_section(section: str, max_tokens: int, token_counter: TokenCounter) -> List[str]:
+    """Section plus longue qu'un extrait : coupe entre phrases, puis au token près si une phrase déborde"""
+    pieces = []
+    for sentence in SENTENCE_END_PATTERN.split(section):
+        while token_counter.count(sentence) > max_tokens:
+            head = token_counter.head(sentence, max_tokens)
+            if not head or not sentence.startswith(head):
+                break  # Décodage non aligné sur le texte : on garde la phrase entière
+            pieces.append(head)
+            sentence = sentence[len(head):]
+        pieces.append(sentence + ' ')
+    return pieces
+
+def merge_fragments(fragments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fusionne les fragments dans l'ordre du document : première valeur renseignée, listes unies sans doublon"""
+    merged: Dict[str, Any] = {}
+    for fragment in fragments:
+        merged = _merge_values(merged, fragment)
+    return merged
+
+def _merge_values(current: Any, incoming: Any, field_name: Optional[str] = None) -> Any:
+    if _is_empty(incoming):
+        return current
+    if _is_empty(current):
+        return incoming
+    
+    if isinstance(current, dict) and isinstance(incoming, dict):
+        result = dict(current)
+        for key, value in incoming.items():
+            result[key] = _merge_values(result.get(key), value, key)
+        return result
+    
+    if isinstance(current, list) and isinstance(incoming, list):
+        return _merge_lists(current, incoming)
+    
+    if field_name in TEXT_MERGE_FIELDS and isinstance(current, str) and isinstance(incoming, str):
+        return current if incoming.strip() in current else f"{current}\n{incoming}"
+    
+    return current  # Valeur scalaire : l'extrait le plus tôt dans le document l'emporte
+
+def _merge_lists(current: List[Any], incoming: List[Any]) -> List[Any]:
+    result = list(current)
+    positions = {_identity(item): index for index, item in enumerate(result)}
+    for item in incoming:
+        identity = _identity(item)
+        if identity in positions:
+            index = positions[identity]
+            result[index] = _merge_values(result[index], item)
+        else:
+            positions[identity] = len(result)
+            result.append(item)
+    return result
+
+def _identity(item: Any) -> str:
+    """Clé de dédoublonnage d'un élément de liste (casse et espaces ignorés)"""
+    if isinstance(item, dict):
+        for key in IDENTITY_KEYS:
+            value = item.get(key)
+            if isinstance(value, str) and value.strip():
+                return f"{key}:{_normalize(value)}"
+    if isinstance(item, str):
+        return _normalize(item)
+    return json.dumps(item, sort_keys=True, ensure_ascii=False, default=str).lower()
+
+def _normalize(value: str) -> str:
+    return ' '.join(value.lower().split())
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
@@ -3,6 +3,8 @@ Prompts système et utilisateur pour OpenAI GPT-4o-mini
 Prompt universel UniversalContractV3 pour tous types de contrats français
 """
 
+from typing import Optional, Tuple
+
 def get_system_prompt(summary_mode: str = "standard") -> str:
     """Retourne le prompt système universel UniversalContractV3 pour contrats français"""
     
@@ -27,43 +29,45 @@ Règles:
     
     return base_prompt
 
-def format_user_prompt(text_content: str, filename: str) -> str:
-    """Formate le prompt utilisateur avec le schéma UniversalContractV3"""
+def format_excerpt_directive(index: int, total: int) -> str:
+    """Consignes d'un extrait de contrat long (résumé par extraits fusionnés localement)"""
+    return f"""<extrait>
+Ce texte est l'extrait {index}/{total} d'un contrat plus long ; les autres extraits sont analysés séparément puis fusionnés.
+- Ne renseigne que les informations présentes dans CET extrait ; tout le reste à null ou [].
+- "missing_info": [] (les manques sont évalués sur le document complet).
+- "summary_plain": 2–6 lignes sur le contenu de cet extrait uniquement.
+</extrait>
+
+"""
+
+USER_PROMPT_MAX_TOKENS = 7000  # Texte du contrat dans le prompt (≈ 25000 caractères de français)
+
+def format_user_prompt(text_content: str, filename: str, max_tokens: int = USER_PROMPT_MAX_TOKENS,
+                       excerpt: Optional[Tuple[int, int]] = None, financial_section: Optional[str] = None) -> str:
+    """
+    Formate le prompt utilisateur avec le schéma UniversalContractV3 ; excerpt = (n° d'extrait, nombre d'extraits)
+    financial_section : informations financières déjà extraites du document entier (résumé par extraits)
+    """
     
     # Import du nouvel extracteur financier
     from ..extraction.financial_extractor import FinancialExtractor
+    from .token_counter import get_token_counter
+    from .context_packer import pack_context
+    
+    token_counter = get_token_counter()
     
     # Pré-extraction des informations financières
-    financial_extractor = FinancialExtractor()
-    financial_info = financial_extractor.extract_financial_info(text_content)
-    financial_prompt_section = financial_extractor.format_for_prompt(financial_info)
+    if financial_section is None:
+        financial_extractor = FinancialExtractor()
+        financial_info = financial_extractor.extract_financial_info(text_content)
+        financial_section = financial_extractor.format_for_prompt(financial_info)
+    financial_prompt_section = financial_section
+    
+    # Au-delà du budget : passages classés par pertinence pour le schéma (parties, montants, durées, clauses)
+    if token_counter.count(text_content) > max_tokens:
+        text_content = pack_context(text_content, max_tokens, token_counter).text
     
-    # Stratégie intelligente pour préserver les informations financières
-    max_chars = 25000  # Augmentation pour V3
-    if len(text_content) > max_chars:
-        # Recherche de sections financières critiques
-        financial_keywords = ["€", "EUR", "tarif", "prix", "coût", "frais", "montant", "TTC", "HT", "factur", "paiement", "règlement"]
-        
-        # Garde le début (infos générales) et cherche les sections financières
-        start_size = max_chars // 3
-        remaining_size = max_chars - start_size
-        
-        # Trouve les passages avec des montants
-        financial_sections = []
-        lines = text_content.split('\n')
-        for i, line in enumerate(lines):
-            if any(keyword.lower() in line.lower() for keyword in financial_keywords):
-                # Prend 5 lignes avant et après pour le contexte
-                start_idx = max(0, i-5)
-                end_idx = min(len(lines), i+6)
-                financial_sections.extend(lines[start_idx:end_idx])
-        
-        # Combine début + sections financières + fin
-        start_text = text_content[:start_size]
-        financial_text = '\n'.join(financial_sections[-remaining_size//2:]) if financial_sections else ""
-        end_text = text_content[-remaining_size//2:] if remaining_size > 0 else ""
-        
-        text_content = start_text + "\n\n[... SECTIONS FINANCIÈRES ...]\n" + financial_text + "\n\n[... FIN DOCUMENT ...]\n" + end_text
+    excerpt_directive = format_excerpt_directive(*excerpt) if excerpt else ""
     
     return f"""<objectif>
 Analyse intégrale du document et production d'un JSON STRICT conforme au schéma "UniversalContractV3".
@@ -405,7 +409,7 @@ Analyse intégrale du document et production d'un JSON STRICT conforme au schém
 }}
 </schema_json>
 
-<contrat_texte>
+{excerpt_directive}<contrat_texte>
 {text_content}
 </contrat_texte>
 
@@ -0,0 +1,143 @@
+"""
+Comptage de tokens partagé (résumés, estimation des coûts, service d'extraction)
+Tokenizer tiktoken chargé une seule fois par process, au premier comptage
+"""
+
+import logging
+import math
+from threading import Lock
+from typing import Dict, Any, List, Optional
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_ENCODING = "o200k_base"
+FALLBACK_CHARS_PER_TOKEN = 3.5  # Estimation prudente pour du français si le tokenizer est indisponible
+
+# Surcoût du format chat : par message et amorce de la réponse
+TOKENS_PER_MESSAGE = 3
+TOKENS_REPLY_PRIMING = 3
+
+# Prix en centimes pour 1K tokens (entrée, sortie)
+MODEL_PRICING = {
+    "gpt-4o-mini": (0.015, 0.06),
+    "gpt-4o": (0.25, 1.0),
+    "gpt-4-turbo": (1.0, 3.0),
+    "gpt-3.5-turbo": (0.05, 0.15)
+}
+
+class TokenCounter:
+    """Compte, tronque et chiffre en tokens pour un modèle donné"""
+    
+    def __init__(self, model: str = DEFAULT_MODEL):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = Lock()
+        self.stats = {"counts": 0, "tokens_counted": 0, "estimated_counts": 0}
+    
+    @property
+    def encoding(self):
+        """Encodage tiktoken chargé au premier usage, None si indisponible"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._encoding = self._load_encoding()
+                    self._loaded = True
+        return self._encoding
+    
+    @property
+    def exact(self) -> bool:
+        """Comptage exact (tokenizer chargé) ou estimation"""
+        return self.encoding is not None
+    
+    def _load_encoding(self):
+        if not TIKTOKEN_AVAILABLE:
+            logger.warning("tiktoken non installé : tokens estimés à partir des caractères")
+            return None
+        try:
+            try:
+                return tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                return tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception as e:
+            # Fichier d'encodage absent et téléchargement impossible
+            logger.warning(f"Tokenizer {self.model} indisponible ({e}) : tokens estimés à partir des caractères")
+            return None
+    
+    def count(self, text: str) -> int:
+        """Nombre de tokens d'un texte"""
+        if not text:
+            return 0
+        encoding = self.encoding
+        if encoding is not None:
+            tokens = len(encoding.encode(text, disallowed_special=()))
+        else:
+            tokens = math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+            self.stats["estimated_counts"] += 1
+        self.stats["counts"] += 1
+        self.stats["tokens_counted"] += tokens
+        return tokens
+    
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        """Tokens d'entrée d'un appel chat (contenus, rôles et surcoût de format)"""
+        total = TOKENS_REPLY_PRIMING
+        for message in messages:
+            total += TOKENS_PER_MESSAGE + self.count(message.get("role", "")) + self.count(message.get("content") or "")
+        return total
+    
+    def head(self, text: str, max_tokens: int) -> str:
+        """Début du texte limité à max_tokens"""
+        if max_tokens <= 0:
+            return ""
+        encoding = self.encoding
+        if encoding is None:
+            return text[:int(max_tokens * FALLBACK_CHARS_PER_TOKEN)]
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    
+    def tail(self, text: str, max_tokens: int) -> str:
+        """Fin du texte limitée à max_tokens"""
+        if max_tokens <= 0:
+            return ""
+        encoding = self.encoding
+        if encoding is None:
+            return text[-int(max_tokens * FALLBACK_CHARS_PER_TOKEN):]
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[-max_tokens:])
+    
+    def truncate_middle(self, text: str, max_tokens: int, marker: str = "\n[...CONTENU TRONQUÉ...]\n") -> str:
+        """Garde le début et la fin du texte dans max_tokens, marqueur compris"""
+        if self.count(text) <= max_tokens:
+            return text
+        budget = max(0, max_tokens - self.count(marker))
+        return self.head(text, budget - budget // 2) + marker + self.tail(text, budget // 2)
+    
+    def cost_cents(self, input_tokens: int, output_tokens: int = 0) -> float:
+        """Coût en centimes selon la grille du modèle"""
+        input_price, output_price = MODEL_PRICING.get(self.model, MODEL_PRICING[DEFAULT_MODEL])
+        return (input_tokens / 1000) * input_price + (output_tokens / 1000) * output_price
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de comptage"""
+        return {**self.stats, "model": self.model, "exact": self._encoding is not None, "loaded": self._loaded}
+
+# Un compteur par modèle et par process
+_counters: Dict[str, TokenCounter] = {}
+_counters_lock = Lock()
+
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """Retourne le compteur du modèle, créé au premier usage (tokenizer chargé au premier comptage)"""
+    model = model or DEFAULT_MODEL
+    
+    counter = _counters.get(model)
+    if counter is None:
+        with _counters_lock:
+            counter = _counters.setdefault(model, TokenCounter(model))
+    return counter
@@ -78,7 +78,7 @@ async def analyze_contract(
         logger.info(f"REAL MODE: Traitement du PDF {file.filename} ({len(pdf_content)} bytes)")
         
         # Extraction du texte du PDF
-        extractor = ExtractionPipeline()
+        extractor = ExtractionPipeline(redis_client=cache)
         extraction_result = await extractor.extract_contract_data(pdf_content, file.filename)
         
         if not extraction_result.get('success'):
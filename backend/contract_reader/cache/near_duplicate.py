@@ -0,0 +1,142 @@
+"""
+Détection de quasi-doublons : signatures MinHash du texte extrait et buckets LSH dans Redis
+Une copie ré-exportée, re-signée ou re-scannée d'un contrat déjà résumé réutilise son résumé
+"""
+
+import hashlib
+import logging
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from .redis_client import RedisClient
+from ..extraction.fact_scanner import FactScanner
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    # Sans NumPy, pas de signatures MinHash : chaque document est résumé normalement
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bandes de 4 lignes : candidats dès ~50% de similarité, vérifiés ensuite sur la signature
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 3  # Mots par shingle
+SIGNATURE_VERSION = "1"  # À incrémenter si la normalisation ou les permutations changent
+
+if NUMPY_AVAILABLE:
+    MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+    
+    # Permutations fixes : signatures comparables entre process et entre déploiements
+    _random = np.random.RandomState(20240229)
+    _PERMUTATION_A = _random.randint(1, 1 << 32, NUM_PERMUTATIONS, dtype=np.uint64)
+    _PERMUTATION_B = _random.randint(0, 1 << 32, NUM_PERMUTATIONS, dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+@dataclass
+class NearDuplicateMatch:
+    """Document déjà indexé proche du document courant"""
+    document_hash: str
+    similarity: float
+    facts_match: bool  # Montants, dates, durées, parties identiques : le résumé est réutilisable tel quel
+
+def normalize_text(text: str) -> List[str]:
+    """Mots en minuscules sans accents ni ponctuation (insensible aux différences d'export ou d'OCR de mise en forme)"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return WORD_PATTERN.findall(text)
+
+def minhash_signature(text: str) -> Optional["np.ndarray"]:
+    """Signature MinHash des shingles de mots, None si le texte est trop court ou sans NumPy"""
+    words = normalize_text(text)
+    if not NUMPY_AVAILABLE or len(words) < SHINGLE_SIZE:
+        return None
+    
+    shingles = {' '.join(words[index:index + SHINGLE_SIZE]) for index in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    
+    # (a·h + b) mod p pour chaque permutation, minimum sur les shingles
+    permuted = (np.outer(hashes, _PERMUTATION_A) + _PERMUTATION_B) % MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+def estimate_similarity(signature: "np.ndarray", other: "np.ndarray") -> float:
+    """Similarité de Jaccard estimée entre deux signatures"""
+    return float(np.mean(signature == other))
+
+def band_keys(signature: "np.ndarray") -> List[str]:
+    """Identifiants des bandes LSH d'une signature"""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        keys.append(f"{SIGNATURE_VERSION}:{band}:{hashlib.blake2b(rows.tobytes(), digest_size=8).hexdigest()}")
+    return keys
+
+class NearDuplicateIndex:
+    """Index des documents résumés, interrogé avant l'appel IA (inactif sans NumPy)"""
+    
+    def __init__(self, redis_client: RedisClient, threshold: float = 0.9, ttl: int = 86400):
+        self.redis_client = redis_client
+        self.threshold = threshold
+        self.ttl = ttl
+        self.fact_scanner = FactScanner()
+        self.stats = {"lookups": 0, "candidates": 0, "matches": 0, "facts_mismatch": 0, "indexed": 0}
+    
+    def key_facts(self, text: str) -> List[str]:
+        """Faits typés normalisés : deux versions d'un même modèle diffèrent par ces valeurs"""
+        facts = self.fact_scanner.scan(text).facts_by_type()
+        return sorted({
+            f"{fact_type}:{''.join(value.lower().split())}"
+            for fact_type, values in facts.items() for value in values
+        })
+    
+    async def find(self, text: str) -> Optional[NearDuplicateMatch]:
+        """Document indexé le plus proche au-delà du seuil, None sinon"""
+        signature = minhash_signature(text)
+        if signature is None:
+            return None
+        
+        self.stats["lookups"] += 1
+        candidates = await self.redis_client.get_near_duplicate_candidates(band_keys(signature))
+        self.stats["candidates"] += len(candidates)
+        
+        best = None
+        for document_hash in candidates:
+            entry = await self.redis_client.get_document_signature(document_hash)
+            if not entry or entry.get("version") != SIGNATURE_VERSION:
+                continue
+            similarity = estimate_similarity(signature, np.array(entry["signature"], dtype=np.uint64))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (document_hash, similarity, entry.get("facts", []))
+        
+        if best is None:
+            return None
+        
+        document_hash, similarity, facts = best
+        facts_match = facts == self.key_facts(text)
+        self.stats["matches"] += 1
+        if not facts_match:
+            self.stats["facts_mismatch"] += 1
+        return NearDuplicateMatch(document_hash, round(similarity, 3), facts_match)
+    
+    async def add(self, document_hash: str, text: str):
+        """Indexe un document dont le résumé vient d'être mis en cache"""
+        signature = minhash_signature(text)
+        if signature is None:
+            return
+        
+        entry = {
+            "version": SIGNATURE_VERSION,
+            "signature": signature.tolist(),
+            "facts": self.key_facts(text)
+        }
+        await self.redis_client.index_document_signature(document_hash, entry, band_keys(signature), self.ttl)
+        self.stats["indexed"] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de l'index"""
+        return {**self.stats, "threshold": self.threshold}
@@ -6,9 +6,81 @@ Cache intelligent avec déduplication SHA256 et TTL
 import hashlib
 import json
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set
 from datetime import datetime, timedelta
 
+class MockRedis:
+    """Redis en mémoire : module redis absent ou serveur injoignable"""
+    
+    def __init__(self, *args, **kwargs):
+        self._data = {}
+        
+    async def get(self, key): 
+        return self._data.get(key)
+        
+    async def set(self, key, value, ex=None, nx=False): 
+        if nx and key in self._data:
+            return None
+        self._data[key] = value
+        return True
+        
+    async def setex(self, key, ttl, value):
+        self._data[key] = value
+        return True
+        
+    async def close(self):
+        pass
+        
+    async def delete(self, *keys): 
+        for key in keys:
+            self._data.pop(key, None)
+        return len(keys)
+        
+    async def exists(self, key): 
+        return key in self._data
+        
+    async def ping(self): 
+        return True
+        
+    async def keys(self, pattern): 
+        return list(self._data.keys())
+        
+    async def lrange(self, key, start, end): 
+        return []
+        
+    async def lpush(self, key, *values): 
+        return len(values)
+        
+    async def ltrim(self, key, start, end): 
+        return True
+        
+    async def incr(self, key): 
+        current = self._data.get(key, 0)
+        if isinstance(current, bytes):
+            current = int(current.decode())
+        self._data[key] = str(current + 1).encode()
+        return current + 1
+        
+    async def sadd(self, key, *values):
+        members = self._data.setdefault(key, set())
+        added = len(set(values) - members)
+        members.update(values)
+        return added
+        
+    async def smembers(self, key):
+        return set(self._data.get(key, set()))
+        
+    async def expire(self, key, ttl):
+        return key in self._data
+        
+    async def eval(self, script, numkeys, key, token, *args):
+        # Scripts de bail : comparaison du jeton puis suppression (del) ou prolongation
+        if self._data.get(key) != token:
+            return 0
+        if "'del'" in script:
+            self._data.pop(key, None)
+        return 1
+
 try:
     import redis.asyncio as redis
     from redis.asyncio import Redis
@@ -16,59 +88,24 @@ try:
 except ImportError:
     # Fallback pour environnements sans Redis
     REDIS_AVAILABLE = False
-    
-    class MockRedis:
-        def __init__(self, *args, **kwargs):
-            self._data = {}
-            
-        async def get(self, key): 
-            return self._data.get(key)
-            
-        async def set(self, key, value, ex=None): 
-            self._data[key] = value
-            return True
-            
-        async def setex(self, key, ttl, value):
-            self._data[key] = value
-            return True
-            
-        async def close(self):
-            pass
-            
-        async def delete(self, *keys): 
-            for key in keys:
-                self._data.pop(key, None)
-            return len(keys)
-            
-        async def exists(self, key): 
-            return key in self._data
-            
-        async def ping(self): 
-            return True
-            
-        async def keys(self, pattern): 
-            return list(self._data.keys())
-            
-        async def lrange(self, key, start, end): 
-            return []
-            
-        async def lpush(self, key, *values): 
-            return len(values)
-            
-        async def ltrim(self, key, start, end): 
-            return True
-            
-        async def incr(self, key): 
-            current = self._data.get(key, 0)
-            if isinstance(current, bytes):
-                current = int(current.decode())
-            self._data[key] = str(current + 1).encode()
-            return current + 1
-    
     Redis = MockRedis
 
 logger = logging.getLogger(__name__)
 
+# Opérations de bail atomiques : seul le détenteur du jeton prolonge ou libère
+RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
 class RedisClient:
     """Client Redis avec cache intelligent et fallback mock"""
     
@@ -164,6 +201,159 @@ class RedisClient:
         except Exception as e:
             logger.error(f"Erreur mise en cache: {e}")
     
+    async def get_cached_extraction(self, document_hash: str, extractor_version: str) -> Optional[bytes]:
+        """
+        Récupère un document extrait (format binaire) par hash SHA256 + version d'extracteur
+        
+        Args:
+            document_hash: Hash SHA256 du document
+            extractor_version: Version de l'extracteur ayant produit l'entrée
+            
+        Returns:
+            Octets sérialisés ou None si pas trouvé
+        """
+        try:
+            await self.ensure_connected()
+            cache_key = f"contract_extraction:{extractor_version}:{document_hash}"
+            return await self.redis.get(cache_key)
+            
+        except Exception as e:
+            logger.error(f"Erreur récupération cache extraction: {e}")
+            return None
+    
+    async def cache_extraction(self, document_hash: str, extractor_version: str, payload: bytes, ttl: int = 604800):
+        """
+        Met en cache un document extrait, indépendamment du résumé IA
+        
+        Args:
+            document_hash: Hash SHA256 du document
+            extractor_version: Version de l'extracteur
+            payload: Document sérialisé (document_codec)
+            ttl: Time to live en secondes (défaut: 7 jours)
+        """
+        try:
+            await self.ensure_connected()
+            cache_key = f"contract_extraction:{extractor_version}:{document_hash}"
+            await self.redis.setex(cache_key, ttl, payload)
+            
+            logger.info(f"Extraction mise en cache: {document_hash[:12]}... ({len(payload)} octets, TTL: {ttl}s)")
+            
+        except Exception as e:
+            logger.error(f"Erreur mise en cache extraction: {e}")
+    
+    async def index_document_signature(self, document_hash: str, entry: Dict[str, Any], band_keys: List[str], ttl: int = 86400):
+        """
+        Enregistre la signature MinHash d'un document et l'ajoute à ses buckets LSH
+        
+        Args:
+            document_hash: Hash SHA256 du document
+            entry: Signature et faits clés (JSON)
+            band_keys: Identifiants des bandes LSH de la signature
+            ttl: Time to live en secondes (aligné sur le cache des résumés)
+        """
+        try:
+            await self.ensure_connected()
+            await self.redis.setex(f"near_dup:doc:{document_hash}", ttl, json.dumps(entry))
+            for band_key in band_keys:
+                bucket_key = f"near_dup:band:{band_key}"
+                await self.redis.sadd(bucket_key, document_hash)
+                await self.redis.expire(bucket_key, ttl)
+            
+        except Exception as e:
+            logger.error(f"Erreur indexation quasi-doublon: {e}")
+    
+    async def get_near_duplicate_candidates(self, band_keys: List[str]) -> Set[str]:
+        """Documents partageant au moins un bucket LSH avec la signature"""
+        candidates = set()
+        try:
+            await self.ensure_connected()
+            for band_key in band_keys:
+                members = await self.redis.smembers(f"near_dup:band:{band_key}")
+                candidates.update(member.decode() if isinstance(member, bytes) else member for member in members)
+        except Exception as e:
+            logger.error(f"Erreur recherche quasi-doublons: {e}")
+        return candidates
+    
+    async def get_document_signature(self, document_hash: str) -> Optional[Dict[str, Any]]:
+        """Signature et faits clés enregistrés pour un document"""
+        try:
+            await self.ensure_connected()
+            entry = await self.redis.get(f"near_dup:doc:{document_hash}")
+            if entry:
+                if isinstance(entry, bytes):
+                    entry = entry.decode()
+                return json.loads(entry)
+            return None
+            
+        except Exception as e:
+            logger.error(f"Erreur lecture signature: {e}")
+            return None
+    
+    async def acquire_lease(self, name: str, token: str, ttl: int) -> Optional[bool]:
+        """
+        Prend un bail exclusif (SET NX EX) pour coordonner les workers
+        
+        Returns:
+            True si le bail est obtenu, False s'il est détenu ailleurs, None si Redis est injoignable
+        """
+        try:
+            await self.ensure_connected()
+            if isinstance(self.redis, MockRedis):
+                return None  # Mock propre à ce process : aucune coordination possible entre workers
+            return bool(await self.redis.set(f"lease:{name}", token, ex=ttl, nx=True))
+        except Exception as e:
+            logger.error(f"Erreur prise de bail: {e}")
+            return None
+    
+    async def renew_lease(self, name: str, token: str, ttl: int) -> bool:
+        """Prolonge le bail s'il est toujours détenu par ce jeton"""
+        try:
+            await self.ensure_connected()
+            return bool(await self.redis.eval(RENEW_LEASE_SCRIPT, 1, f"lease:{name}", token, ttl))
+        except Exception as e:
+            logger.error(f"Erreur prolongation de bail: {e}")
+            return False
+    
+    async def release_lease(self, name: str, token: str) -> bool:
+        """Libère le bail s'il est toujours détenu par ce jeton (jamais celui d'un autre worker)"""
+        try:
+            await self.ensure_connected()
+            return bool(await self.redis.eval(RELEASE_LEASE_SCRIPT, 1, f"lease:{name}", token))
+        except Exception as e:
+            logger.error(f"Erreur libération de bail: {e}")
+            return False
+    
+    async def lease_exists(self, name: str) -> bool:
+        """Bail toujours en cours (détenteur vivant ou non encore expiré)"""
+        try:
+            await self.ensure_connected()
+            return bool(await self.redis.exists(f"lease:{name}"))
+        except Exception as e:
+            logger.error(f"Erreur lecture de bail: {e}")
+            return False
+    
+    async def publish(self, channel: str, message: str) -> int:
+        """Publie un message (pub/sub) ; 0 si personne n'écoute ou sans pub/sub"""
+        try:
+            await self.ensure_connected()
+            return await self.redis.publish(channel, message)
+        except Exception as e:
+            logger.error(f"Erreur publication: {e}")
+            return 0
+    
+    async def subscribe(self, channel: str):
+        """Abonnement pub/sub au canal, None si le client ne le permet pas (mock)"""
+        try:
+            await self.ensure_connected()
+            if not hasattr(self.redis, "pubsub"):
+                return None
+            pubsub = self.redis.pubsub()
+            await pubsub.subscribe(channel)
+            return pubsub
+        except Exception as e:
+            logger.error(f"Erreur abonnement: {e}")
+            return None
+    
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Statistiques du cache"""
         await self.ensure_connected()
@@ -171,11 +361,13 @@ class RedisClient:
         try:
             # Comptage des clés par type
             summary_keys = await self.redis.keys("contract_summary:*")
+            extraction_keys = await self.redis.keys("contract_extraction:*")
             budget_keys = await self.redis.keys("budget:*")
             quota_keys = await self.redis.keys("quota:*")
             
             return {
                 "total_summaries": len(summary_keys),
+                "total_extractions": len(extraction_keys),
                 "total_budget_entries": len(budget_keys),
                 "total_quota_entries": len(quota_keys),
                 "redis_connected": self._connected,
@@ -186,6 +378,7 @@ class RedisClient:
             logger.error(f"Erreur stats cache: {e}")
             return {
                 "total_summaries": 0,
+                "total_extractions": 0,
                 "total_budget_entries": 0,
                 "total_quota_entries": 0,
                 "redis_connected": False,
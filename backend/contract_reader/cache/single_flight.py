@@ -0,0 +1,181 @@
+"""
+Coalescence des traitements identiques simultanés (double clic, relance après timeout)
+Dans un process : les suivants attendent le futur du meneur ; entre workers : bail Redis et notification pub/sub
+Un meneur en échec, annulé ou tombé est remplacé par un seul des suivants, les autres attendent ce nouveau meneur
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Optional
+from .redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+LEADER = "leader"  # Calcule le résultat
+FOLLOWER = "follower"  # Le meneur a terminé : le résultat est en cache
+UNCOORDINATED = "uncoordinated"  # Redis injoignable ou attente trop longue : calcul sans coordination
+ABANDONED = "abandoned"  # Meneur en échec ou annulé, sans résultat : un suivant reprend le calcul
+
+DONE_MESSAGE = "done"  # Notification pub/sub : résultat en cache
+FAILED_MESSAGE = "failed"  # Notification pub/sub : pas de résultat, un worker en attente reprend le bail
+
+POLL_INTERVAL_SECONDS = 1.0  # Vérification du bail pendant l'attente (meneur disparu)
+
+class LeaderFailed(Exception):
+    """Levée par le meneur dont le calcul n'a rien mis en cache ; result reste destiné à son seul appelant"""
+    
+    def __init__(self, result: Any = None):
+        super().__init__("Calcul du meneur sans résultat")
+        self.result = result
+
+class SingleFlight:
+    """Un seul calcul par clé à la fois, dans le process et entre workers"""
+    
+    def __init__(self, redis_client: RedisClient, lease_seconds: int = 120, wait_seconds: int = 180):
+        self.redis_client = redis_client
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "leaders": 0, "local_followers": 0, "remote_followers": 0,
+            "expired_leases": 0, "failed_leaders": 0, "takeovers": 0, "uncoordinated": 0
+        }
+    
+    @asynccontextmanager
+    async def flight(self, key: str) -> AsyncIterator[str]:
+        """
+        Rôle de l'appelant pour la clé : LEADER calcule, FOLLOWER relit le cache une fois le meneur terminé
+        Le bail est prolongé tant que le meneur travaille ; un meneur arrêté le laisse expirer
+        Meneur en échec (exception, LeaderFailed) ou annulé : un seul suivant reprend, pas tous en même temps
+        """
+        abandoned = False
+        while True:
+            local = self._inflight.get(key)
+            if local is None:
+                break
+            # Même process : attente du futur du meneur, sans l'annuler si l'appelant abandonne
+            self.stats["local_followers"] += 1
+            if await asyncio.shield(local) != ABANDONED:
+                yield FOLLOWER
+                return
+            # Meneur sans résultat : le premier suivant réveillé devient meneur, les autres le suivent
+            abandoned = True
+        if abandoned:
+            self.stats["takeovers"] += 1
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        token = uuid.uuid4().hex
+        renewal = None
+        role = UNCOORDINATED
+        outcome = ABANDONED
+        try:
+            role = await self._lead_or_wait(key, token)
+            if role == LEADER:
+                renewal = asyncio.create_task(self._renew_lease(key, token))
+            yield role
+            outcome = role
+        finally:
+            # Suivants du process libérés d'abord : un nettoyage Redis lent, en erreur ou annulé ne les bloque pas
+            del self._inflight[key]
+            future.set_result(outcome)
+            
+            if renewal is not None:
+                renewal.cancel()
+            if role == LEADER:
+                status = FAILED_MESSAGE if outcome == ABANDONED else DONE_MESSAGE
+                try:
+                    # Notification et libération menées à terme même si l'appelant est annulé entre-temps
+                    await asyncio.shield(self._finish_lease(key, token, status))
+                except Exception as e:
+                    logger.warning(f"Libération du bail impossible pour {key[:16]}... : {e}")
+    
+    async def _finish_lease(self, key: str, token: str, status: str):
+        """Fin du calcul (réussi ou non) : notification des workers en attente puis libération du bail"""
+        try:
+            await self.redis_client.publish(self._channel(key), status)
+        finally:
+            await self.redis_client.release_lease(self._lease_name(key), token)
+    
+    async def _lead_or_wait(self, key: str, token: str) -> str:
+        """Prend le bail, ou attend la fin du meneur ; reprend le bail si celui-ci expire sans résultat"""
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            acquired = await self.redis_client.acquire_lease(self._lease_name(key), token, self.lease_seconds)
+            if acquired is None:
+                self.stats["uncoordinated"] += 1
+                return UNCOORDINATED
+            if acquired:
+                self.stats["leaders"] += 1
+                return LEADER
+            
+            status = await self._wait_for_leader(key, deadline)
+            if status == DONE_MESSAGE:
+                self.stats["remote_followers"] += 1
+                return FOLLOWER
+            if time.monotonic() >= deadline:
+                logger.warning(f"Attente du meneur trop longue pour {key[:16]}... : calcul sans coordination")
+                self.stats["uncoordinated"] += 1
+                return UNCOORDINATED
+            # Meneur en échec, ou tombé (bail expiré sans notification) : nouvelle tentative de prise,
+            # un seul worker en attente obtient le bail
+            self.stats["failed_leaders" if status == FAILED_MESSAGE else "expired_leases"] += 1
+    
+    async def _wait_for_leader(self, key: str, deadline: float) -> Optional[str]:
+        """
+        Notification du meneur (DONE_MESSAGE ou FAILED_MESSAGE)
+        None si son bail a disparu sans notification ou à l'échéance
+        """
+        pubsub = await self.redis_client.subscribe(self._channel(key))
+        try:
+            while time.monotonic() < deadline:
+                if pubsub is not None:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=POLL_INTERVAL_SECONDS)
+                    if message is not None:
+                        return self._status(message)
+                else:
+                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
+                
+                if not await self.redis_client.lease_exists(self._lease_name(key)):
+                    # Bail libéré : fin normale (notification manquée) ou expiration ; le cache tranchera
+                    return DONE_MESSAGE if pubsub is None else await self._drain(pubsub)
+            return None
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.unsubscribe()
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+    
+    async def _drain(self, pubsub) -> Optional[str]:
+        """Notification arrivée entre la dernière lecture et la libération du bail"""
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+        return self._status(message) if message is not None else None
+    
+    def _status(self, message: Dict[str, Any]) -> str:
+        """Statut publié par le meneur"""
+        data = message.get("data")
+        return data.decode() if isinstance(data, bytes) else str(data)
+    
+    async def _renew_lease(self, key: str, token: str):
+        """Prolonge le bail du meneur au tiers de sa durée tant que le calcul dure"""
+        interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.redis_client.renew_lease(self._lease_name(key), token, self.lease_seconds):
+                logger.warning(f"Bail perdu pour {key[:16]}... : un autre worker peut reprendre le calcul")
+                return
+    
+    def _lease_name(self, key: str) -> str:
+        return f"single_flight:{key}"
+    
+    def _channel(self, key: str) -> str:
+        return f"single_flight_done:{key}"
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de coalescence"""
+        return {**self.stats, "inflight": len(self._inflight)}
@@ -29,6 +29,22 @@ class ContractReaderConfig(BaseSettings):
     
     # Limites de sécurité
     max_cost_cents: float = 10.0  # 0.10€ max par résumé
+    
+    # Résumé par extraits (contrats longs) : appels OpenAI concurrents bornés, fusion locale
+    chunked_summary_enabled: bool = True
+    summary_chunk_tokens: int = 12000
+    summary_max_concurrency: int = 4
+    summary_chunking_ratio: float = 3.0  # Résumé par extraits seulement au-delà de ce multiple du budget du mode
+    summary_min_fact_coverage: float = 0.8  # En dessous, le contexte condensé ne suffit pas : résumé par extraits
+    
+    # Réutilisation du résumé d'un quasi-doublon (copie ré-exportée, re-signée ou re-scannée)
+    near_duplicate_enabled: bool = True
+    near_duplicate_threshold: float = 0.9  # Similarité de Jaccard estimée (MinHash)
+    
+    # Coalescence des traitements identiques simultanés (hash + mode) : bail Redis entre workers
+    single_flight_enabled: bool = True
+    single_flight_lease_seconds: int = 120  # Prolongé tant que le meneur calcule, expire s'il tombe
+    single_flight_wait_seconds: int = 180  # Au-delà, le suivant calcule sans attendre
     max_file_size_mb: int = 10
     
     class Config:
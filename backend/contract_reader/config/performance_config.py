@@ -20,8 +20,28 @@ class PerformanceConfig:
     VALIDATION_TIMEOUT_SECONDS = int(os.getenv('VALIDATION_TIMEOUT_SECONDS', '15'))
     PDF_GENERATION_TIMEOUT_SECONDS = int(os.getenv('PDF_GENERATION_TIMEOUT_SECONDS', '30'))
     
+    # Extraction hors event loop (pool de processus)
+    EXTRACTION_PROCESS_POOL = os.getenv('EXTRACTION_PROCESS_POOL', 'true').lower() == 'true'
+    EXTRACTION_POOL_SIZE = int(os.getenv('EXTRACTION_POOL_SIZE', '2'))
+    LAZY_POSITIONS = os.getenv('LAZY_POSITIONS', 'true').lower() == 'true'  # Texte d'abord, coordonnées à la demande
+    
+    # Couche texte des gros documents : plages de pages extraites en parallèle
+    TEXT_EXTRACTION_WORKERS = int(os.getenv('TEXT_EXTRACTION_WORKERS', str(min(4, os.cpu_count() or 1))))
+    TEXT_EXTRACTION_PARALLEL_MIN_PAGES = int(os.getenv('TEXT_EXTRACTION_PARALLEL_MIN_PAGES', '40'))
+    
+    # Rasterisation OCR en flux (pages rendues par fenêtre, en niveaux de gris)
+    OCR_RASTER_WINDOW = int(os.getenv('OCR_RASTER_WINDOW', '2'))
+    OCR_RASTER_TEMP_FILES = os.getenv('OCR_RASTER_TEMP_FILES', 'false').lower() == 'true'
+    
+    # Cache OCR par page (empreinte du bitmap), partagé entre documents via Redis si configuré
+    OCR_PAGE_CACHE_ENABLED = os.getenv('OCR_PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    OCR_PAGE_CACHE_SIZE = int(os.getenv('OCR_PAGE_CACHE_SIZE', '256'))  # Pages gardées en mémoire par process
+    OCR_PAGE_CACHE_TTL = int(os.getenv('OCR_PAGE_CACHE_TTL', '2592000'))  # 30 jours
+    OCR_PAGE_CACHE_REDIS_URL = os.getenv('OCR_PAGE_CACHE_REDIS_URL', os.getenv('REDIS_URL', ''))
+    
     # Cache Redis
     REDIS_TTL_SUMMARY = int(os.getenv('REDIS_TTL_SUMMARY', '604800'))  # 7 jours
+    REDIS_TTL_EXTRACTION = int(os.getenv('REDIS_TTL_EXTRACTION', '604800'))  # 7 jours
     REDIS_TTL_PDF = int(os.getenv('REDIS_TTL_PDF', '604800'))  # 7 jours
     REDIS_TTL_METRICS = int(os.getenv('REDIS_TTL_METRICS', '86400'))  # 1 jour
     
@@ -58,8 +78,28 @@ class PerformanceConfig:
                 'validation_seconds': cls.VALIDATION_TIMEOUT_SECONDS,
                 'pdf_generation_seconds': cls.PDF_GENERATION_TIMEOUT_SECONDS
             },
+            'extraction_pool': {
+                'enabled': cls.EXTRACTION_PROCESS_POOL,
+                'size': cls.EXTRACTION_POOL_SIZE,
+                'lazy_positions': cls.LAZY_POSITIONS
+            },
+            'text_extraction': {
+                'workers': cls.TEXT_EXTRACTION_WORKERS,
+                'parallel_min_pages': cls.TEXT_EXTRACTION_PARALLEL_MIN_PAGES
+            },
+            'ocr_rasterization': {
+                'window_pages': cls.OCR_RASTER_WINDOW,
+                'temp_files': cls.OCR_RASTER_TEMP_FILES
+            },
+            'ocr_page_cache': {
+                'enabled': cls.OCR_PAGE_CACHE_ENABLED,
+                'size': cls.OCR_PAGE_CACHE_SIZE,
+                'ttl': cls.OCR_PAGE_CACHE_TTL,
+                'redis': bool(cls.OCR_PAGE_CACHE_REDIS_URL)
+            },
             'cache': {
                 'summary_ttl': cls.REDIS_TTL_SUMMARY,
+                'extraction_ttl': cls.REDIS_TTL_EXTRACTION,
                 'pdf_ttl': cls.REDIS_TTL_PDF,
                 'metrics_ttl': cls.REDIS_TTL_METRICS
             },
@@ -0,0 +1,155 @@
+"""
+Suppression des en-têtes, pieds de page et mentions répétés avant l'envoi à l'IA
+Une ligne présente dans la même bande (haut/bas de page) sur la plupart des pages n'est envoyée qu'une fois
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set, Tuple
+from .pdf_extractor import ExtractedPage, PDFExtractor
+
+EDGE_LINES = 3  # Lignes considérées en haut et en bas d'une page sans coordonnées
+MIN_REPEAT_RATIO = 0.5  # Part des pages où la ligne doit se répéter
+
+DIGITS_PATTERN = re.compile(r'\d+')
+SPACES_PATTERN = re.compile(r'\s+')
+# Numérotation seule : "3", "- 3 -", "Page 3", "Page 3/13", "p. 3 sur 13"
+PAGE_NUMBER_PATTERN = re.compile(r'^[-–—\s]*(?:page|p\.?)?\s*#(?:\s*(?:/|sur|of)\s*#)?[-–—\s]*$')
+
+@dataclass
+class BoilerplateResult:
+    """Texte destiné à l'IA et économies réalisées"""
+    text: str
+    removed_lines: int = 0
+    chars_saved: int = 0
+    tokens_saved: int = 0
+    repeated_lines: List[str] = field(default_factory=list)
+    
+    def to_stats(self) -> Dict[str, Any]:
+        """Résumé pour les métriques de traitement"""
+        return {
+            "removed_lines": self.removed_lines,
+            "chars_saved": self.chars_saved,
+            "tokens_saved": self.tokens_saved,
+            "repeated_lines": self.repeated_lines[:10]
+        }
+
+def normalize_line(line: str) -> str:
+    """Forme comparable d'une ligne : casse, espaces et chiffres neutralisés (numéros de page, dates d'édition)"""
+    return DIGITS_PATTERN.sub('#', SPACES_PATTERN.sub(' ', line).strip().lower())
+
+class BoilerplateFilter:
+    """Détecte les lignes répétées page à page par bande de position et texte normalisé"""
+    
+    def __init__(self, pdf_extractor: Optional[PDFExtractor] = None,
+                 edge_lines: int = EDGE_LINES, min_repeat_ratio: float = MIN_REPEAT_RATIO):
+        self.pdf_extractor = pdf_extractor or PDFExtractor()
+        self.edge_lines = edge_lines
+        self.min_repeat_ratio = min_repeat_ratio
+    
+    def strip(self, pages: List[ExtractedPage]) -> Tuple[str, List[str]]:
+        """Texte de chaque page sans les répétitions ni la numérotation ; retourne (texte joint, lignes retirées)"""
+        page_lines = [[line for line in page.text.split('\n') if line.strip()] for page in pages]
+        page_bands = [self._line_bands(page, lines) for page, lines in zip(pages, page_lines)]
+        
+        # Nombre de pages où chaque (bande, ligne normalisée) apparaît ; la numérotation est traitée à part
+        occurrences = Counter()
+        for lines, bands in zip(page_lines, page_bands):
+            occurrences.update({
+                (band, normalize_line(line)) for line, band in zip(lines, bands)
+                if band is not None and not PAGE_NUMBER_PATTERN.match(normalize_line(line))
+            })
+        
+        min_pages = max(2, math.ceil(self.min_repeat_ratio * len(pages)))
+        repeated = {key for key, count in occurrences.items() if count >= min_pages}
+        page_numbers = self._page_numbers(page_lines, page_bands, min_pages)
+        
+        # Première occurrence conservée : raison sociale, RCS ou adresse restent visibles une fois
+        kept_pages = []
+        removed = []
+        seen = set()
+        for page_index, (lines, bands) in enumerate(zip(page_lines, page_bands)):
+            kept = []
+            for line, band in zip(lines, bands):
+                if band is not None and len(pages) > 1:
+                    normalized = normalize_line(line)
+                    if (page_index, line) in page_numbers or (band, normalized) in seen:
+                        removed.append(line.strip())
+                        continue
+                    if (band, normalized) in repeated:
+                        seen.add((band, normalized))
+                kept.append(line)
+            kept_pages.append('\n'.join(kept))
+        
+        return '\n\n'.join(kept_pages), removed
+    
+    def _page_numbers(self, page_lines: List[List[str]], page_bands: List[List[Optional[str]]],
+                      min_pages: int) -> Set[Tuple[int, str]]:
+        """
+        Lignes (page, texte) de numérotation : même forme et même bande sur min_pages pages au moins,
+        avec un numéro qui avance d'une page à l'autre (un nombre isolé comme "1500" n'est pas retiré)
+        """
+        candidates = []
+        for page_index, (lines, bands) in enumerate(zip(page_lines, page_bands)):
+            for line, band in zip(lines, bands):
+                normalized = normalize_line(line)
+                if band is not None and PAGE_NUMBER_PATTERN.match(normalized):
+                    number = int(DIGITS_PATTERN.search(line).group())
+                    candidates.append(((band, normalized, number - page_index), page_index, line))
+        
+        # Décalage numéro - index constant : la numérotation suit les pages
+        pages_by_sequence: Dict[Tuple[str, str, int], set] = {}
+        for sequence, page_index, _ in candidates:
+            pages_by_sequence.setdefault(sequence, set()).add(page_index)
+        return {
+            (page_index, line) for sequence, page_index, line in candidates
+            if len(pages_by_sequence[sequence]) >= min_pages
+        }
+    
+    def _line_bands(self, page: ExtractedPage, lines: List[str]) -> List[Optional[str]]:
+        """Bande ("header"/"footer") de chaque ligne, None pour le corps de page"""
+        if page.positions_loaded and len(page.elements):
+            # Bandes de get_page_sections : une ligne y appartient si tous ses mots s'y trouvent
+            sections = self.pdf_extractor.get_page_sections(page)
+            band_words = {
+                band: {word for element in sections[band] for word in normalize_line(element.text).split()}
+                for band in ("header", "footer")
+            }
+            bands = []
+            for line in lines:
+                words = set(normalize_line(line).split())
+                band = next((name for name, known in band_words.items() if words and words <= known), None)
+                bands.append(band)
+            return bands
+        
+        # Texte seul (coordonnées non chargées) : premières et dernières lignes de la page
+        bands = [None] * len(lines)
+        for index in range(max(0, len(lines) - self.edge_lines), len(lines)):
+            bands[index] = "footer"
+        for index in range(min(self.edge_lines, len(lines))):
+            bands[index] = "header"
+        return bands
+
+def strip_boilerplate(pages: List[ExtractedPage], reference_text: str, clean=None,
+                      boilerplate_filter: Optional[BoilerplateFilter] = None) -> BoilerplateResult:
+    """
+    Texte pour l'IA sans marqueurs de page ni lignes répétées, comparé à reference_text (texte envoyé jusqu'ici)
+    clean : normalisation appliquée au texte obtenu (celle de cleaned_text)
+    """
+    from ..ai.token_counter import get_token_counter  # Import tardif : le module ai importe l'extraction
+    
+    text, removed = (boilerplate_filter or BoilerplateFilter()).strip(pages)
+    if clean is not None:
+        text = clean(text)
+    
+    token_counter = get_token_counter()
+    chars_saved = max(0, len(reference_text) - len(text))
+    return BoilerplateResult(
+        text=text,
+        removed_lines=len(removed),
+        chars_saved=chars_saved,
+        tokens_saved=max(0, token_counter.count(reference_text) - token_counter.count(text)),
+        repeated_lines=list(dict.fromkeys(removed))
+    )
@@ -0,0 +1,157 @@
+"""
+Sérialisation binaire compacte des documents extraits
+En-tête JSON + colonnes ElementTable brutes, le tout compressé zlib (pas de pickle en cache partagé)
+"""
+
+import json
+import struct
+import zlib
+from array import array
+from typing import Dict, Any, Tuple, List
+from .element_table import ElementTable
+from .fact_scanner import ScannedFact
+from .offset_map import TextOffsetMap
+from .pdf_extractor import ExtractedPage
+from .text_processor import ProcessedDocument
+
+CODEC_MAGIC = b"CRDOC1"
+PAGE_CODEC_MAGIC = b"CRPAGE1"
+COLUMN_NAMES = ("x", "y", "width", "height", "font_size", "font_ids", "text_offsets")
+
+def _encode_page(page: ExtractedPage, blob: bytearray) -> Dict[str, Any]:
+    """En-tête JSON d'une page, ses colonnes ajoutées au blob"""
+    table = page.elements
+    columns = {}
+    for name in COLUMN_NAMES:
+        column = getattr(table, name)
+        columns[name] = [column.typecode, len(blob), len(column)]
+        blob += column.tobytes()
+    
+    return {
+        "page_number": page.page_number,
+        "text": page.text,
+        "width": page.width,
+        "height": page.height,
+        "extraction_method": page.extraction_method,
+        "positions_loaded": page.positions_loaded,
+        "element_page": table.page,
+        "fonts": table.fonts,
+        "text_buffer": table.text_buffer,
+        "columns": columns
+    }
+
+def _decode_page(page_header: Dict[str, Any], blob: memoryview) -> ExtractedPage:
+    """Reconstruit une page depuis son en-tête et le blob des colonnes"""
+    table = ElementTable(page_header["element_page"])
+    state = {
+        "page": page_header["element_page"],
+        "fonts": page_header["fonts"],
+        "text_buffer": page_header["text_buffer"]
+    }
+    for name, (typecode, start, length) in page_header["columns"].items():
+        column = array(typecode)
+        column.frombytes(blob[start:start + length * column.itemsize])
+        state[name] = column
+    table.__setstate__(state)
+    
+    return ExtractedPage(
+        page_number=page_header["page_number"],
+        text=page_header["text"],
+        elements=table,
+        width=page_header["width"],
+        height=page_header["height"],
+        extraction_method=page_header["extraction_method"],
+        positions_loaded=page_header.get("positions_loaded", True)
+    )
+
+def _pack(magic: bytes, header: Dict[str, Any], blob: bytearray) -> bytes:
+    """Signature + longueur d'en-tête + en-tête JSON + blob, compressés zlib"""
+    header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+    return zlib.compress(magic + struct.pack(">I", len(header_bytes)) + header_bytes + bytes(blob), 6)
+
+def _unpack(magic: bytes, data: bytes) -> Tuple[Dict[str, Any], memoryview]:
+    """Inverse de _pack : en-tête JSON et vue sur le blob"""
+    payload = zlib.decompress(data)
+    if not payload.startswith(magic):
+        raise ValueError("Format de document extrait inconnu")
+    
+    offset = len(magic)
+    (header_length,) = struct.unpack(">I", payload[offset:offset + 4])
+    offset += 4
+    header = json.loads(payload[offset:offset + header_length].decode("utf-8"))
+    return header, memoryview(payload)[offset + header_length:]
+
+def encode_extracted_page(page: ExtractedPage, extra: Dict[str, Any] = None) -> bytes:
+    """Encode une page seule (cache de pages OCR), avec des métadonnées libres"""
+    blob = bytearray()
+    return _pack(PAGE_CODEC_MAGIC, {"page": _encode_page(page, blob), "extra": extra or {}}, blob)
+
+def decode_extracted_page(data: bytes) -> Tuple[ExtractedPage, Dict[str, Any]]:
+    """Décode les octets produits par encode_extracted_page"""
+    header, blob = _unpack(PAGE_CODEC_MAGIC, data)
+    return _decode_page(header["page"], blob), header["extra"]
+
+def encode_processed_document(doc: ProcessedDocument, stats: Dict[str, Any] = None) -> bytes:
+    """Encode un ProcessedDocument (et les stats d'extraction) en octets compressés"""
+    blob = bytearray()
+    pages_header = [_encode_page(page, blob) for page in doc.pages]
+    
+    offset_map_header = None
+    if doc.offset_map is not None:
+        origins = doc.offset_map.origins
+        offset_map_header = {
+            "page_starts": doc.offset_map.page_starts,
+            "page_numbers": doc.offset_map.page_numbers,
+            "page_lengths": doc.offset_map.page_lengths,
+            "origins": [origins.typecode, len(blob), len(origins)]
+        }
+        blob += origins.tobytes()
+    
+    header = {
+        "raw_text": doc.raw_text,
+        "cleaned_text": doc.cleaned_text,
+        "prompt_text": doc.prompt_text,
+        "sections": doc.sections,
+        "facts": doc.facts,
+        "fact_spans": [[fact.fact_type, fact.text, fact.start, fact.end] for fact in doc.fact_spans],
+        "section_anchors": doc.section_anchors,
+        "offset_map": offset_map_header,
+        "processing_stats": doc.processing_stats,
+        "pages": pages_header,
+        "stats": stats or {}
+    }
+    return _pack(CODEC_MAGIC, header, blob)
+
+def decode_processed_document(data: bytes) -> Tuple[ProcessedDocument, Dict[str, Any]]:
+    """Décode les octets produits par encode_processed_document"""
+    header, blob = _unpack(CODEC_MAGIC, data)
+    pages: List[ExtractedPage] = [_decode_page(page_header, blob) for page_header in header["pages"]]
+    
+    offset_map = None
+    offset_map_header = header.get("offset_map")
+    if offset_map_header:
+        typecode, start, length = offset_map_header["origins"]
+        origins = array(typecode)
+        origins.frombytes(blob[start:start + length * origins.itemsize])
+        offset_map = TextOffsetMap(
+            origins, offset_map_header["page_starts"], offset_map_header["page_numbers"],
+            offset_map_header["page_lengths"]
+        )
+        offset_map.attach_pages(pages)
+    
+    doc = ProcessedDocument(
+        raw_text=header["raw_text"],
+        cleaned_text=header["cleaned_text"],
+        sections=header["sections"],
+        facts=header["facts"],
+        pages=pages,
+        processing_stats=header["processing_stats"],
+        fact_spans=[ScannedFact(*fact) for fact in header.get("fact_spans", [])],
+        section_anchors={
+            name: [tuple(anchor) for anchor in anchors]
+            for name, anchors in header.get("section_anchors", {}).items()
+        },
+        offset_map=offset_map,
+        prompt_text=header.get("prompt_text", "")
+    )
+    return doc, header["stats"]
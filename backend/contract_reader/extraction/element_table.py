@@ -0,0 +1,244 @@
+"""
+Stockage colonnaire des éléments de texte d'une page
+Tableaux parallèles (x, y, largeur, hauteur, taille de police) + buffer texte unique
+"""
+
+import math
+import sys
+from array import array
+from bisect import bisect_right
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+
+class TextElementView:
+    """Vue légère sur une ligne de la table, compatible avec TextElement en lecture"""
+    
+    __slots__ = ("_table", "_index")
+    
+    def __init__(self, table: "ElementTable", index: int):
+        self._table = table
+        self._index = index
+    
+    @property
+    def index(self) -> int:
+        return self._index
+    
+    @property
+    def text(self) -> str:
+        return self._table.text_at(self._index)
+    
+    @property
+    def page(self) -> int:
+        return self._table.page
+    
+    @property
+    def x(self) -> float:
+        return self._table.x[self._index]
+    
+    @property
+    def y(self) -> float:
+        return self._table.y[self._index]
+    
+    @property
+    def width(self) -> float:
+        return self._table.width[self._index]
+    
+    @property
+    def height(self) -> float:
+        return self._table.height[self._index]
+    
+    @property
+    def font_size(self) -> Optional[float]:
+        size = self._table.font_size[self._index]
+        return None if math.isnan(size) else size
+    
+    @property
+    def font_name(self) -> Optional[str]:
+        font_id = self._table.font_ids[self._index]
+        return None if font_id < 0 else self._table.fonts[font_id]
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TextElementView) and other._table is self._table and other._index == self._index
+    
+    def __hash__(self) -> int:
+        return hash((id(self._table), self._index))
+    
+    def __repr__(self) -> str:
+        return (f"TextElement(text={self.text!r}, page={self.page}, x={self.x}, y={self.y}, "
+                f"width={self.width}, height={self.height}, font_size={self.font_size}, font_name={self.font_name!r})")
+
+class ElementTable:
+    """Table colonnaire des éléments d'une page (remplace une liste de TextElement)"""
+    
+    def __init__(self, page: int):
+        self.page = page
+        self.x = array('d')
+        self.y = array('d')
+        self.width = array('d')
+        self.height = array('d')
+        self.font_size = array('d')  # NaN si inconnue
+        self.font_ids = array('i')  # -1 si inconnue
+        self.fonts: List[str] = []
+        self.text_offsets = array('q', [0])
+        self._text_parts: List[str] = []
+        self._text_buffer = ""
+        self._font_index: Dict[str, int] = {}
+        self._search_buffer: Optional[str] = None
+        self._search_starts = array('q')
+    
+    @classmethod
+    def from_elements(cls, elements: Iterable[Any], page: int) -> "ElementTable":
+        """Construit la table depuis des objets TextElement (ou toute vue équivalente)"""
+        table = cls(page)
+        for element in elements:
+            table.append(
+                element.text, element.x, element.y, element.width, element.height,
+                element.font_size, element.font_name
+            )
+        return table
+    
+    @classmethod
+    def from_columns(cls, page: int, texts: List[str], x: Iterable[float], y: Iterable[float],
+                     width: Iterable[float], height: Iterable[float],
+                     font_sizes: Iterable[Optional[float]], font_names: Iterable[Optional[str]]) -> "ElementTable":
+        """Construit la table directement depuis des colonnes (listes ou tableaux NumPy)"""
+        table = cls(page)
+        table.x.extend(float(v) for v in x)
+        table.y.extend(float(v) for v in y)
+        table.width.extend(float(v) for v in width)
+        table.height.extend(float(v) for v in height)
+        table.font_size.extend(math.nan if size is None else float(size) for size in font_sizes)
+        table.font_ids.extend(table._intern_font(name) for name in font_names)
+        
+        offset = 0
+        for text in texts:
+            offset += len(text)
+            table.text_offsets.append(offset)
+        table._text_parts.extend(texts)
+        return table
+    
+    def append(self, text: str, x: float, y: float, width: float, height: float,
+               font_size: Optional[float] = None, font_name: Optional[str] = None):
+        """Ajoute un élément en fin de table"""
+        self.x.append(float(x))
+        self.y.append(float(y))
+        self.width.append(float(width))
+        self.height.append(float(height))
+        self.font_size.append(math.nan if font_size is None else float(font_size))
+        self.font_ids.append(self._intern_font(font_name))
+        self.text_offsets.append(self.text_offsets[-1] + len(text))
+        self._text_parts.append(text)
+        self._search_buffer = None
+    
+    def _intern_font(self, font_name: Optional[str]) -> int:
+        if font_name is None:
+            return -1
+        font_id = self._font_index.get(font_name)
+        if font_id is None:
+            font_id = len(self.fonts)
+            self.fonts.append(sys.intern(font_name))
+            self._font_index[font_name] = font_id
+        return font_id
+    
+    @property
+    def text_buffer(self) -> str:
+        """Texte de tous les éléments concaténé (découpé par text_offsets)"""
+        if self._text_parts:
+            self._text_buffer += "".join(self._text_parts)
+            self._text_parts = []
+        return self._text_buffer
+    
+    def text_at(self, index: int) -> str:
+        return self.text_buffer[self.text_offsets[index]:self.text_offsets[index + 1]]
+    
+    def texts(self) -> List[str]:
+        buffer = self.text_buffer
+        offsets = self.text_offsets
+        return [buffer[offsets[i]:offsets[i + 1]] for i in range(len(self))]
+    
+    def find(self, needle: str, start: int = 0) -> Optional[int]:
+        """
+        Index du premier élément (à partir de start) dont le texte contient needle, sans casse
+        Une seule recherche dans un buffer minuscule séparé par \\x00 au lieu d'un lower() par élément
+        """
+        needle = needle.lower()
+        if not needle or start >= len(self):
+            return None
+        
+        if self._search_buffer is None:
+            self._build_search_buffer()
+        
+        position = self._search_buffer.find(needle, self._search_starts[start])
+        if position < 0:
+            return None
+        return bisect_right(self._search_starts, position) - 1
+    
+    def find_all(self, needle: str) -> List[int]:
+        """Index de tous les éléments dont le texte contient needle, sans casse"""
+        indices = []
+        index = self.find(needle)
+        while index is not None:
+            indices.append(index)
+            index = self.find(needle, index + 1)
+        return indices
+    
+    def _build_search_buffer(self):
+        # lower() peut changer la longueur d'un texte : débuts recalculés sur le buffer minuscule
+        lowered = [text.lower() for text in self.texts()]
+        self._search_starts = array('q')
+        position = 0
+        for text in lowered:
+            self._search_starts.append(position)
+            position += len(text) + 1
+        self._search_buffer = "\x00".join(lowered)
+    
+    def indices_in_band(self, y_min: float, y_max: float) -> List[int]:
+        """Index des éléments dont y est compris dans [y_min, y_max]"""
+        return [i for i, y in enumerate(self.y) if y_min <= y <= y_max]
+    
+    def __len__(self) -> int:
+        return len(self.x)
+    
+    def __bool__(self) -> bool:
+        return len(self.x) > 0
+    
+    def __iter__(self) -> Iterator[TextElementView]:
+        return (TextElementView(self, i) for i in range(len(self)))
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[TextElementView, List[TextElementView]]:
+        if isinstance(index, slice):
+            return [TextElementView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("element index out of range")
+        return TextElementView(self, index)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "page": self.page,
+            "x": self.x,
+            "y": self.y,
+            "width": self.width,
+            "height": self.height,
+            "font_size": self.font_size,
+            "font_ids": self.font_ids,
+            "fonts": self.fonts,
+            "text_offsets": self.text_offsets,
+            "text_buffer": self.text_buffer
+        }
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(state["page"])
+        self.x = state["x"]
+        self.y = state["y"]
+        self.width = state["width"]
+        self.height = state["height"]
+        self.font_size = state["font_size"]
+        self.font_ids = state["font_ids"]
+        self.fonts = state["fonts"]
+        self.text_offsets = state["text_offsets"]
+        self._text_buffer = state["text_buffer"]
+        self._font_index = {name: font_id for font_id, name in enumerate(self.fonts)}
+    
+    def __repr__(self) -> str:
+        return f"ElementTable(page={self.page}, elements={len(self)})"
@@ -3,30 +3,134 @@ Pipeline d'extraction unifié pour Contract Reader
 Orchestration PDF → OCR → Processing avec métriques
 """
 
+import asyncio
+import hashlib
+import logging
+import re
 import time
-from typing import List, Dict, Any, Tuple
-from .pdf_extractor import PDFExtractor, ExtractedPage
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Tuple, Optional, Union
+from .pdf_extractor import PDFExtractor, ExtractedPage, PositionLoader
+from .pdf_triage import DocumentTriage, triage_pdf
+from .page_budget import PageBudget
 from .ocr_processor import OCRProcessor, OCRConfig
+from .language_detector import detect_languages
 from .text_processor import TextProcessor, ProcessedDocument
+from .document_codec import encode_processed_document, decode_processed_document
+from ..config.performance_config import PerformanceConfig
+
+logger = logging.getLogger(__name__)
+
+# Version des règles d'extraction : à incrémenter quand le résultat produit change
+EXTRACTOR_VERSION = "10"
+
+CID_GLYPH_PATTERN = re.compile(r'\(cid:\d+\)')
+
+class ScannedDocumentError(Exception):
+    """Document sans couche texte détecté au triage : OCR direct"""
+
+# Pool de processus partagé par tous les pipelines du process (api.py en crée un par requête)
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_size = 0
+
+# Pipeline réutilisé à l'intérieur de chaque worker du pool
+_worker_pipeline: Optional["ExtractionPipeline"] = None
+
+def get_extraction_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Retourne le pool d'extraction, créé à la demande"""
+    global _process_pool, _process_pool_size
+    
+    if _process_pool is None or _process_pool_size != max_workers:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = ProcessPoolExecutor(max_workers=max_workers)
+        _process_pool_size = max_workers
+    
+    return _process_pool
+
+def recycle_extraction_pool(pool: ProcessPoolExecutor):
+    """
+    Arrête les workers d'un pool dont un job a dépassé le délai (le worker resterait occupé jusqu'à la fin du job)
+    Les jobs en cours sur ce pool échouent en BrokenProcessPool ; le prochain appel crée un pool neuf
+    """
+    global _process_pool, _process_pool_size
+    
+    if _process_pool is pool:
+        _process_pool = None
+        _process_pool_size = 0
+    for process in list((pool._processes or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_extraction_pool(wait: bool = True):
+    """Arrête le pool d'extraction (arrêt applicatif ou pool cassé)"""
+    global _process_pool, _process_pool_size
+    
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait)
+    _process_pool = None
+    _process_pool_size = 0
+
+def _read_source(source: Union[bytes, str]) -> bytes:
+    """Octets PDF depuis un buffer ou un fichier spoolé sur disque"""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    return source
+
+def _extract_in_worker(source: Union[bytes, str]) -> Tuple[ProcessedDocument, Dict[str, Any]]:
+    """Point d'entrée exécuté dans un worker du pool"""
+    global _worker_pipeline
+    
+    if _worker_pipeline is None:
+        # Le pool d'extraction est le seul pool : pas de pools texte/OCR imbriqués dans ses workers
+        _worker_pipeline = ExtractionPipeline(use_process_pool=False, parallel_workers=1)
+    
+    processed_doc, stats = _worker_pipeline.extract_document(_read_source(source))
+    # Le parent a déjà les octets PDF : pas de renvoi via le pool
+    processed_doc.position_loader = None
+    return processed_doc, stats
 
 class ExtractionPipeline:
     """Pipeline d'extraction unifié avec fallbacks"""
     
-    def __init__(self):
-        self.pdf_extractor = PDFExtractor()
-        self.ocr_processor = OCRProcessor()
+    # Triage par page de la couche texte
+    MIN_PAGE_CHARS = 20
+    MAX_GARBLED_RATIO = 0.3
+    MIN_CHAR_DENSITY = 0.2
+    
+    def __init__(self,
+                 use_process_pool: Optional[bool] = None,
+                 pool_size: Optional[int] = None,
+                 timeout_seconds: Optional[int] = None,
+                 redis_client=None,
+                 lazy_positions: Optional[bool] = None,
+                 parallel_workers: Optional[int] = None):
+        self.use_process_pool = PerformanceConfig.EXTRACTION_PROCESS_POOL if use_process_pool is None else use_process_pool
+        self.pool_size = max(1, pool_size or PerformanceConfig.EXTRACTION_POOL_SIZE)
+        self.timeout_seconds = timeout_seconds or PerformanceConfig.EXTRACTION_TIMEOUT_SECONDS
+        self.redis_client = redis_client  # Cache des documents extraits (optionnel)
+        # Texte seul sur le chemin critique, coordonnées chargées pour les seules pages citées
+        self.lazy_positions = PerformanceConfig.LAZY_POSITIONS if lazy_positions is None else lazy_positions
+        
+        # parallel_workers : workers des pools texte et OCR (1 = séquentiel, défaut de la configuration sinon)
+        self.pdf_extractor = PDFExtractor(parallel_workers=parallel_workers)
+        self.ocr_processor = OCRProcessor(OCRConfig(parallel_workers=parallel_workers) if parallel_workers else None)
         self.text_processor = TextProcessor()
         
         self.pipeline_stats = {
             "total_extractions": 0,
             "pdf_success_rate": 0,
             "ocr_fallback_rate": 0,
+            "hybrid_extractions": 0,
+            "extraction_cache_hits": 0,
             "avg_total_time_ms": 0,
             "p95_time_ms": 0,
             "recent_times": []  # Pour calculer p95
         }
     
-    async def extract_contract_data(self, pdf_bytes: bytes, filename: str = "contract.pdf") -> Dict[str, Any]:
+    async def extract_contract_data(self, pdf_bytes: bytes, filename: str = "contract.pdf", document_hash: Optional[str] = None) -> Dict[str, Any]:
         """Extraction complète des données de contrat avec métriques"""
         start_time = time.time()
         
@@ -40,12 +144,12 @@ class ExtractionPipeline:
                     'metadata': {}
                 }
             
-            # Extraction du document réel
-            processed_doc, metrics = self.extract_document(pdf_bytes)
+            # Extraction du document réel (hors event loop), ou document déjà extrait en cache
+            processed_doc, metrics = await self._extract_with_cache(pdf_bytes, document_hash)
             
             # Conversion en format Contract Reader
             contract_data = {
-                "text_content": processed_doc.full_text,
+                "text_content": processed_doc.ai_text,
                 "pages": len(processed_doc.pages),
                 "extraction_method": processed_doc.extraction_method,
                 "confidence_score": processed_doc.confidence_score,
@@ -55,6 +159,8 @@ class ExtractionPipeline:
                 "metadata": {
                     "pdf_readable": metrics.get("pdf_success", False),
                     "ocr_used": metrics.get("ocr_used", False),
+                    "extraction_cache_hit": metrics.get("cache_hit", False),
+                    "boilerplate": processed_doc.processing_stats.get("boilerplate", {}),
                     "extraction_quality": processed_doc.confidence_score
                 }
             }
@@ -81,6 +187,75 @@ class ExtractionPipeline:
                 }
             }
 
+    async def _extract_with_cache(self, pdf_bytes: bytes, document_hash: Optional[str] = None) -> Tuple[ProcessedDocument, Dict[str, Any]]:
+        """Extraction avec cache du ProcessedDocument (clé SHA256 + version d'extracteur)"""
+        if self.redis_client is None:
+            return await self.extract_document_async(pdf_bytes)
+        
+        document_hash = document_hash or hashlib.sha256(pdf_bytes).hexdigest()
+        extractor_version = f"{EXTRACTOR_VERSION}-{self.pdf_extractor.engine}" + ("-lazy" if self.lazy_positions else "")
+        
+        cached_payload = await self.redis_client.get_cached_extraction(document_hash, extractor_version)
+        if cached_payload:
+            try:
+                processed_doc, stats = await asyncio.to_thread(decode_processed_document, cached_payload)
+                self._attach_position_loader(processed_doc, pdf_bytes)
+                self.pipeline_stats["extraction_cache_hits"] += 1
+                stats["cache_hit"] = True
+                return processed_doc, stats
+            except Exception as e:
+                # Entrée illisible : on ré-extrait et on l'écrase
+                logger.warning(f"Cache extraction illisible pour {document_hash[:12]}...: {e}")
+        
+        processed_doc, stats = await self.extract_document_async(pdf_bytes)
+        
+        payload = await asyncio.to_thread(encode_processed_document, processed_doc, stats)
+        await self.redis_client.cache_extraction(
+            document_hash=document_hash,
+            extractor_version=extractor_version,
+            payload=payload,
+            ttl=PerformanceConfig.REDIS_TTL_EXTRACTION
+        )
+        
+        return processed_doc, stats
+    
+    async def extract_document_async(self, source: Union[bytes, str]) -> Tuple[ProcessedDocument, Dict[str, Any]]:
+        """
+        Exécute extract_document sans bloquer l'event loop
+        Accepte les octets PDF ou le chemin d'un fichier spoolé
+        """
+        if not self.use_process_pool:
+            return await asyncio.to_thread(self.extract_document, _read_source(source))
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_seconds
+        
+        for attempt in range(2):
+            pool = get_extraction_pool(self.pool_size)
+            try:
+                processed_doc, stats = await asyncio.wait_for(
+                    loop.run_in_executor(pool, _extract_in_worker, source),
+                    timeout=max(0.0, deadline - loop.time())
+                )
+                break
+            except asyncio.TimeoutError:
+                # Le job abandonné occuperait son worker jusqu'au bout : workers arrêtés, pool neuf au prochain appel
+                recycle_extraction_pool(pool)
+                raise Exception(f"Extraction trop longue (> {self.timeout_seconds}s)")
+            except BrokenProcessPool:
+                if attempt == 0 and pool is not _process_pool:
+                    # Pool recyclé après le timeout d'une autre requête : une nouvelle tentative sur le pool neuf
+                    continue
+                # Worker tué (OOM, segfault Tesseract) : le pool sera recréé au prochain appel
+                shutdown_extraction_pool(wait=False)
+                raise Exception("Pool d'extraction interrompu, worker arrêté brutalement")
+        
+        # Les statistiques du worker ne remontent pas : mise à jour côté parent
+        self._update_pipeline_stats(stats["total_time_ms"], stats["extraction_method"])
+        self._attach_position_loader(processed_doc, source)
+        
+        return processed_doc, stats
+    
     def extract_document(self, pdf_bytes: bytes) -> Tuple[ProcessedDocument, Dict[str, Any]]:
         """
         Pipeline complet d'extraction
@@ -90,29 +265,63 @@ class ExtractionPipeline:
         extraction_method = "unknown"
         pages = []
         extraction_stats = {}
+        ocr_pages = []
+        
+        # Limites MAX_PAGES_PER_CONTRACT / MAX_TEXT_LENGTH : les pages au-delà ne sont pas extraites
+        budget = PageBudget()
+        
+        # Étape 0: Triage des ressources (polices, images, chiffrement) sans analyse de mise en page
+        triage = triage_pdf(pdf_bytes, max_pages=budget.max_pages)
         
         try:
-            # Étape 1: Extraction PDF standard
-            pages, extraction_stats = self.pdf_extractor.extract_text_with_positions(pdf_bytes)
+            if triage.ocr_only:
+                # Document scanné : pas de passe pdfplumber inutile
+                raise ScannedDocumentError("Aucune police dans le document, OCR direct")
+            
+            # Étape 1: Extraction PDF standard (pages avec couche texte uniquement), coordonnées différées en mode lazy
+            extract_text_layer = (
+                self.pdf_extractor.extract_text_only if self.lazy_positions
+                else self.pdf_extractor.extract_text_with_positions
+            )
+            pages, extraction_stats = extract_text_layer(
+                pdf_bytes, page_numbers=triage.text_pages if triage.ocr_pages else None, budget=budget
+            )
             extraction_method = extraction_stats["method_used"]
+            pages = self._merge_triaged_pages(pages, triage, budget)
             
-            # Vérifier la qualité de l'extraction
-            total_text = sum(len(p.text) for p in pages)
-            if total_text < 100:  # Très peu de texte extrait
+            # Vérifier la qualité de l'extraction page par page
+            page_issues = self._triage_pages(pages, triage)
+            extraction_stats["page_issues"] = page_issues
+            if len(page_issues) == len(pages):  # Aucune page exploitable
                 raise Exception("Extraction PDF insuffisante, fallback OCR nécessaire")
                 
         except Exception as e:
-            # Étape 2: Fallback OCR
+            # Étape 2: Fallback OCR (ou OCR direct d'un scan)
             try:
-                pages, extraction_stats = self.ocr_processor.extract_with_ocr(pdf_bytes)
-                extraction_method = "ocr_fallback"
-                self.pipeline_stats["ocr_fallback_rate"] += 1
+                # OCR limité aux premières pages du budget ; la limite de caractères s'applique au résultat
+                # (triage sans nombre de pages : compté par poppler, jamais tout le document par défaut)
+                budget.reset()
+                page_count = triage.page_count or self.ocr_processor.count_pages(pdf_bytes)
+                ocr_page_numbers = budget.cap_page_numbers(list(range(1, page_count + 1)))
+                pages, extraction_stats = self.ocr_processor.extract_with_ocr(pdf_bytes, page_numbers=ocr_page_numbers)
+                pages = list(budget.consume(pages, expected=len(pages)))
+                extraction_method = "ocr_direct" if isinstance(e, ScannedDocumentError) else "ocr_fallback"
                 
             except Exception as ocr_error:
                 raise Exception(f"Extraction complètement échouée - PDF: {e}, OCR: {ocr_error}")
+        else:
+            # Étape 2 bis: OCR des seules pages sans couche texte exploitable
+            if page_issues:
+                ocr_pages = self._ocr_failing_pages(pdf_bytes, pages, sorted(page_issues), extraction_stats)
+                if ocr_pages:
+                    extraction_method = "hybrid"
+        
+        extraction_stats["triage"] = triage.to_stats()
+        extraction_stats["page_budget"] = budget.to_stats()
         
         # Étape 3: Traitement du texte
         processed_doc = self.text_processor.process_document(pages)
+        self._attach_position_loader(processed_doc, pdf_bytes)
         
         total_time = int((time.time() - start_time) * 1000)
         
@@ -126,7 +335,19 @@ class ExtractionPipeline:
             "extraction_time_ms": extraction_stats.get("extraction_time_ms", 0),
             "processing_time_ms": processed_doc.processing_stats.get("processing_time_ms", 0),
             "pages_processed": len(pages),
+            "ocr_pages": ocr_pages,
+            "ocr_escalated_pages": extraction_stats.get("escalated_pages", []),
+            "ocr_language": extraction_stats.get("ocr_language"),
+            "ocr_language_source": extraction_stats.get("ocr_language_source"),
+            "ocr_page_cache_hits": extraction_stats.get("page_cache_hits", 0),
+            "page_issues": extraction_stats.get("page_issues", {}),
+            "triage": extraction_stats["triage"],
+            "positions_pending_pages": len(processed_doc.pending_position_pages),
+            "page_budget": extraction_stats["page_budget"],
+            "truncated": budget.stopped_by is not None,
             "text_length": len(processed_doc.cleaned_text),
+            "prompt_text_length": len(processed_doc.prompt_text),
+            "boilerplate": processed_doc.processing_stats.get("boilerplate", {}),
             "facts_extracted": sum(len(facts) for facts in processed_doc.facts.values()),
             "sections_found": len(processed_doc.sections),
             "quality_score": self._calculate_quality_score(processed_doc),
@@ -135,12 +356,109 @@ class ExtractionPipeline:
         
         return processed_doc, complete_stats
     
+    def _attach_position_loader(self, doc: ProcessedDocument, source: Union[bytes, str]):
+        """Branche la seconde passe (coordonnées à la demande) si des pages sont en texte seul"""
+        if doc.pending_position_pages and doc.position_loader is None:
+            doc.position_loader = PositionLoader(_read_source(source), self.pdf_extractor.engine)
+    
+    def _merge_triaged_pages(self, pages: List[ExtractedPage], triage: DocumentTriage,
+                             budget: Optional[PageBudget] = None) -> List[ExtractedPage]:
+        """Complète les pages extraites par des pages vides à la place des pages routées vers l'OCR"""
+        if not triage.ocr_pages:
+            return pages
+        
+        # Limite de caractères atteinte : pas d'OCR des pages qui suivent la dernière page retenue
+        last_page = budget.last_page if budget is not None and budget.stopped_by == "max_text_length" else None
+        
+        pages_by_number = {page.page_number: page for page in pages}
+        for page_triage in triage.pages:
+            if page_triage.route == "ocr" and (last_page is None or page_triage.page_number < last_page):
+                pages_by_number[page_triage.page_number] = ExtractedPage(
+                    page_number=page_triage.page_number,
+                    text="",
+                    elements=[],
+                    width=page_triage.width,
+                    height=page_triage.height,
+                    extraction_method="triage_skipped"
+                )
+        return [pages_by_number[number] for number in sorted(pages_by_number)]
+    
+    def _triage_pages(self, pages: List[ExtractedPage], triage: Optional[DocumentTriage] = None) -> Dict[int, str]:
+        """Pages dont la couche texte est inexploitable, avec la raison"""
+        page_issues = {}
+        routed = {page.page_number: page.reason for page in triage.pages if page.route == "ocr"} if triage else {}
+        
+        for page in pages:
+            issue = routed.get(page.page_number) or self._page_quality_issue(page)
+            if issue:
+                page_issues[page.page_number] = issue
+        
+        return page_issues
+    
+    def _page_quality_issue(self, page: ExtractedPage) -> Optional[str]:
+        """Score une page extraite : vide, glyphes CID/illisibles ou densité trop faible"""
+        text = page.text.strip()
+        
+        if len(text) < self.MIN_PAGE_CHARS:
+            return "empty"
+        
+        # Glyphes non mappés : "(cid:123)" (pdfplumber) ou caractère de remplacement
+        garbled_chars = sum(len(match) for match in CID_GLYPH_PATTERN.findall(text)) + text.count("\ufffd")
+        if garbled_chars / len(text) > self.MAX_GARBLED_RATIO:
+            return "garbled_glyphs"
+        
+        # Densité en caractères pour 1000 pt² (une page A4 dense dépasse 5)
+        page_area = max(page.width * page.height, 1.0)
+        if len(text) * 1000 / page_area < self.MIN_CHAR_DENSITY:
+            return "low_density"
+        
+        return None
+    
+    def _ocr_failing_pages(self, pdf_bytes: bytes, pages: List[ExtractedPage], page_numbers: List[int], extraction_stats: Dict[str, Any]) -> List[int]:
+        """OCR des pages en échec et remplacement dans l'ordre ; retourne les pages remplacées"""
+        # Langue et écriture détectées sur les pages texte exploitables
+        failing = set(page_numbers)
+        text_layer = "\n".join(page.text for page in pages if page.page_number not in failing)
+        language_hint = detect_languages(text_layer).languages
+        
+        try:
+            ocr_results, ocr_stats = self.ocr_processor.extract_with_ocr(
+                pdf_bytes, page_numbers=page_numbers, language_hint=language_hint
+            )
+        except Exception as ocr_error:
+            # Les pages texte restent exploitables, on garde l'extraction partielle
+            extraction_stats["ocr_error"] = str(ocr_error)
+            return []
+        
+        extraction_stats["ocr_time_ms"] = ocr_stats.get("extraction_time_ms", 0)
+        extraction_stats["escalated_pages"] = ocr_stats.get("escalated_pages", [])
+        extraction_stats["ocr_language"] = ocr_stats.get("ocr_language")
+        extraction_stats["ocr_language_source"] = ocr_stats.get("ocr_language_source")
+        extraction_stats["page_cache_hits"] = ocr_stats.get("page_cache_hits", 0)
+        pages_by_number = {page.page_number: index for index, page in enumerate(pages)}
+        replaced = []
+        
+        for ocr_page in ocr_results:
+            index = pages_by_number.get(ocr_page.page_number)
+            # Garder la couche texte si l'OCR ne fait pas mieux
+            if index is None or len(ocr_page.text.strip()) <= len(pages[index].text.strip()):
+                continue
+            pages[index] = ocr_page
+            replaced.append(ocr_page.page_number)
+        
+        return replaced
+    
     def _update_pipeline_stats(self, processing_time: int, method: str):
         """Met à jour les statistiques du pipeline"""
         self.pipeline_stats["total_extractions"] += 1
         
+        if method in ("ocr_fallback", "ocr_direct"):
+            self.pipeline_stats["ocr_fallback_rate"] += 1
+        elif method == "hybrid":
+            self.pipeline_stats["hybrid_extractions"] += 1
+        
         # Taux de succès PDF
-        if method in ["pypdf2", "pdfplumber"]:
+        if method in ["pypdf2", "pdfplumber", "pdfplumber_fast", "pdfium_text"]:
             self.pipeline_stats["pdf_success_rate"] = (
                 (self.pipeline_stats["pdf_success_rate"] * (self.pipeline_stats["total_extractions"] - 1) + 1)
                 / self.pipeline_stats["total_extractions"]
@@ -194,7 +512,7 @@ class ExtractionPipeline:
             score += 0.1
         
         # Qualité des pages (positions disponibles)
-        pages_with_positions = sum(1 for page in doc.pages if page.elements)
+        pages_with_positions = doc.pages_with_positions
         if pages_with_positions == len(doc.pages):
             score += 0.2
         elif pages_with_positions > 0:
@@ -210,7 +528,7 @@ class ExtractionPipeline:
             "quality_score": self._calculate_quality_score(doc),
             "text_extractable": len(doc.cleaned_text) > 50,
             "facts_found": sum(len(facts) for facts in doc.facts.values()) > 0,
-            "positions_available": any(page.elements for page in doc.pages)
+            "positions_available": doc.pages_with_positions > 0
         }
         
         # Vérifications DoD
@@ -218,7 +536,7 @@ class ExtractionPipeline:
             validation["meets_requirements"] = False
             validation["issues"].append("Texte extrait insuffisant (<50 caractères)")
         
-        if not any(page.elements for page in doc.pages):
+        if not validation["positions_available"]:
             validation["meets_requirements"] = False
             validation["issues"].append("Aucune position de texte disponible")
         
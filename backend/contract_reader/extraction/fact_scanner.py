@@ -0,0 +1,155 @@
+"""
+Scanner de faits et de sections compilé une fois
+Chaque pattern garde sa propre passe (insensible à la casse, correspondances chevauchantes entre patterns)
+"""
+
+import bisect
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional
+
+MONTHS = r'(?:janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)'
+
+# Patterns de faits, dans l'ordre de priorité en cas de début commun
+FACT_PATTERNS: Dict[str, List[str]] = {
+    "dates": [
+        r'\b\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}\b',  # DD/MM/YYYY
+        r'\b\d{1,2}\s+' + MONTHS + r'\s+\d{4}\b',
+        r'\b' + MONTHS + r'\s+\d{1,2},?\s+\d{4}\b'
+    ],
+    "amounts": [
+        r'\b\d{1,3}(?:\s?\d{3})*(?:[,\.]\d{2})?\s*(?:€|EUR|euros?)\b',
+        r'\b(?:€|EUR)\s*\d{1,3}(?:\s?\d{3})*(?:[,\.]\d{2})?\b',
+        r'\b\d{1,3}(?:\s?\d{3})*(?:[,\.]\d{2})?\s*(?:dollars?|\$)\b'
+    ],
+    "percentages": [
+        r'\b\d{1,3}(?:[,\.]\d{1,2})?\s*%\b'
+    ],
+    "durations": [
+        r'\b\d+\s*(?:an|année|années|mois|semaine|semaines|jour|jours)s?\b',
+        r'\b(?:un|une|deux|trois|quatre|cinq|six|sept|huit|neuf|dix)\s+(?:an|année|années|mois)\b'
+    ],
+    "parties": [
+        r'\b(?:Monsieur|Madame|M\.|Mme)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b',
+        r'\b[A-Z][A-Z\s&]{2,50}(?:S\.A\.S|SARL|SAS|SA|EURL|SCI)\b',
+        r'\b(?:société|entreprise|compagnie)\s+[A-Z][a-zA-Z\s&]{2,50}\b'
+    ]
+}
+
+# Mots-clés d'ancrage des sections ; un même mot-clé peut ancrer plusieurs sections
+SECTION_KEYWORDS: Dict[str, List[str]] = {
+    "preambule": [r'préambule', r'considérant', r'attendu que'],
+    "objet": [r'objet', r'article 1', r'a pour objet'],
+    "duree": [r'durée', r'terme'],
+    "prix": [r'prix', r'tarif', r'montant', r'rémunération'],
+    "obligations": [r'obligations', r'engagements'],
+    "resiliation": [r'résiliation', r'fin', r'terme'],
+    "responsabilite": [r'responsabilité', r'garantie'],
+    "confidentialite": [r'confidentialité', r'secret'],
+    "propriete": [r'propriété intellectuelle', r'droits d\'auteur'],
+    "litiges": [r'litiges', r'différends', r'tribunal', r'juridiction'],
+    "signatures": [r'signatures?', r'fait à', r'lu et approuvé']
+}
+
+# Ancrages "article.*X" : même début que la regex gourmande, calculés sans retour arrière
+ARTICLE_KEYWORDS: Dict[str, str] = {
+    "duree": "durée",
+    "prix": "prix",
+    "obligations": "obligations",
+    "resiliation": "résiliation",
+    "responsabilite": "responsabilité",
+    "confidentialite": "confidentialité",
+    "propriete": "propriété"
+}
+ARTICLE_PATTERN = re.compile(r'article', re.IGNORECASE)
+LINE_BREAK_PATTERN = re.compile(r'\n')
+
+@dataclass
+class ScannedFact:
+    """Fait typé avec sa position dans le texte nettoyé"""
+    fact_type: str
+    text: str
+    start: int
+    end: int
+
+@dataclass
+class ScanResult:
+    """Résultat d'une passe du scanner"""
+    facts: List[ScannedFact] = field(default_factory=list)
+    section_anchors: Dict[str, List[Tuple[int, int]]] = field(default_factory=dict)
+    
+    def facts_by_type(self) -> Dict[str, List[str]]:
+        """Faits dédupliqués par type, dans l'ordre d'apparition"""
+        grouped = {fact_type: [] for fact_type in FACT_PATTERNS}
+        seen = set()
+        for fact in self.facts:
+            text = fact.text.strip()
+            if text and (fact.fact_type, text) not in seen:
+                seen.add((fact.fact_type, text))
+                grouped[fact.fact_type].append(text)
+        return grouped
+    
+    def first_section_anchors(self) -> Dict[str, Tuple[int, int]]:
+        """Premier ancrage (début, fin) de chaque section trouvée"""
+        return {name: anchors[0] for name, anchors in self.section_anchors.items() if anchors}
+
+class FactScanner:
+    """Patterns compilés une fois ; une passe par pattern de fait et par section, comme findall"""
+    
+    def __init__(self):
+        self._fact_patterns: List[Tuple[str, re.Pattern]] = [
+            (fact_type, re.compile(pattern, re.IGNORECASE))
+            for fact_type, patterns in FACT_PATTERNS.items() for pattern in patterns
+        ]
+        self._section_patterns: Dict[str, re.Pattern] = {
+            section_name: re.compile('(?:' + '|'.join(keywords) + ')', re.IGNORECASE)
+            for section_name, keywords in SECTION_KEYWORDS.items()
+        }
+        self._article_terms: Dict[str, re.Pattern] = {
+            section_name: re.compile(re.escape(term), re.IGNORECASE) for section_name, term in ARTICLE_KEYWORDS.items()
+        }
+    
+    def scan(self, text: str) -> ScanResult:
+        """
+        Faits typés (correspondances complètes) et ancrages de sections
+        Les patterns sont indépendants : un mot-clé inclus dans un fait ancre aussi sa section
+        """
+        result = ScanResult()
+        
+        for fact_type, pattern in self._fact_patterns:
+            for match in pattern.finditer(text):
+                result.facts.append(ScannedFact(fact_type, match.group(), match.start(), match.end()))
+        result.facts.sort(key=lambda fact: fact.start)
+        
+        articles = [match.start() for match in ARTICLE_PATTERN.finditer(text)]
+        line_breaks = [match.start() for match in LINE_BREAK_PATTERN.finditer(text)]
+        for section_name, pattern in self._section_patterns.items():
+            anchors = [(match.start(), match.end()) for match in pattern.finditer(text)]
+            if section_name in ARTICLE_KEYWORDS:
+                anchor = self._article_anchor(text, articles, line_breaks, self._article_terms[section_name])
+                if anchor is not None:
+                    anchors = sorted(anchors + [anchor])
+            if anchors:
+                result.section_anchors[section_name] = anchors
+        
+        return result
+    
+    def _article_anchor(self, text: str, articles: List[int], line_breaks: List[int],
+                        term: re.Pattern) -> Optional[Tuple[int, int]]:
+        """
+        Premier "article" suivi du terme sur la même ligne (début identique à r'article.*terme')
+        La fin retenue est celle du premier terme qui suit, pas du dernier de la ligne
+        """
+        if not articles:
+            return None
+        starts = [match.start() for match in term.finditer(text)]
+        for article_start in articles:
+            position = bisect.bisect_left(starts, article_start + len("article"))
+            if position == len(starts):
+                return None
+            term_start = starts[position]
+            line = bisect.bisect_left(line_breaks, article_start)
+            if line == len(line_breaks) or line_breaks[line] > term_start:
+                match = term.match(text, term_start)
+                return article_start, match.end()
+        return None
@@ -1,6 +1,14 @@
 """
 Extracteur spécialisé pour les informations financières dans les contrats
 Pré-processing avant envoi à GPT pour garantir l'extraction des montants
+
+Moteur "tokenizer" (défaut) et moteur "regex" (patterns historiques) : mêmes conditions de paiement et mêmes
+montants, sauf là où les patterns historiques lisent mal le texte :
+- milliers séparés par une espace ou un point ("12 500 €", "50.000 €") : valeur complète, pas 500.0 ni 50.0 ;
+- devise en tête ("€ 1 500", "EUR 300") : montant reconnu (ignoré par les patterns) ;
+- raw_text limité à l'expression du montant ("650 € HT/jour"), clé tax_basis (HT/TTC) en plus ;
+- unité explicite ("/km") prioritaire sur les mots voisins pour le contexte ;
+- mot-clé de paiement cherché au plus PAYMENT_KEYWORD_CHARS caractères avant "N jours" (pattern .*? non borné).
 """
 
 import re
@@ -9,10 +17,67 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+NUMBER_PATTERN = r'\d(?:\d{0,2}(?:[ \u00a0\u202f]\d{3})+(?:[.,]\d+)?|\d*(?:[.,]\d+)*)'
+
+# Ancres parcourues une fois chacune, sans .*? : nombres, adverbes de périodicité
+# (un premier caractère fixe permet au moteur regex de sauter directement aux candidats)
+NUMBER_ANCHOR = re.compile(NUMBER_PATTERN)
+PERIODIC_ANCHOR = re.compile(r'[mMtTaA](?i:ensuel|rimestriel|nnuel)lement?')
+
+# Tokens des fenêtres autour d'une ancre : nombres, mots, symboles
+TOKEN_PATTERN = re.compile(
+    rf'(?P<number>{NUMBER_PATTERN})'
+    r'|(?P<word>[^\W\d_]+)'
+    r'|(?P<symbol>[€$/%])'
+)
+
+CURRENCY_TOKENS = {"€", "eur", "euro", "euros"}
+GLUED_CURRENCY = re.compile(r'eur(?:os?)?')  # "5eurosparcolis" : texte PDF sans espaces
+LEADING_CURRENCY = re.compile(r'(?:€|\bEUR)[ \u00a0\u202f]*$', re.IGNORECASE)  # "€ 1 500", "EUR 300"
+DOT_THOUSANDS = re.compile(r'[1-9]\d{0,2}\.\d{3}')  # "50.000" : milliers, pas décimales
+TAX_TOKENS = {"ht", "ttc"}
+RATE_CONTEXTS = {"heure": "horaire", "jour": "journalier", "mois": "mensuel", "an": "annuel", "km": "kilométrique"}
+RATE_UNITS = set(RATE_CONTEXTS)
+DAY_TOKENS = {"jour", "jours"}
+PAYMENT_KEYWORDS = ("paiement", "règlement", "factur")
+TERM_REFERENCES = ("facture", "livraison")
+
+# Tailles des fenêtres (caractères) : suite d'un nombre, contexte d'un montant, mot-clé de paiement
+FOLLOWING_CHARS = 40
+CONTEXT_CHARS = 50
+PAYMENT_KEYWORD_CHARS = 120
+
+class Token:
+    """Token du texte avec sa position"""
+    
+    __slots__ = ("kind", "value", "start", "end")
+    
+    def __init__(self, kind: str, value: str, start: int, end: int):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+
+def tokenize(text: str, start: int = 0, end: Optional[int] = None, limit: Optional[int] = None) -> List[Token]:
+    """Tokens (valeur en minuscules) de text[start:end], au plus limit"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text, start, len(text) if end is None else end):
+        tokens.append(Token(match.lastgroup, match.group().lower(), match.start(), match.end()))
+        if limit is not None and len(tokens) >= limit:
+            break
+    return tokens
+
 class FinancialExtractor:
     """Extracteur spécialisé pour les montants et conditions financières"""
     
-    def __init__(self):
+    ENGINES = ("tokenizer", "regex")
+    
+    def __init__(self, engine: str = "tokenizer"):
+        # "tokenizer" : passe linéaire ; "regex" : patterns historiques (référence des benchmarks)
+        if engine not in self.ENGINES:
+            raise ValueError(f"Moteur d'extraction financière inconnu: {engine}")
+        self.engine = engine
+        
         # Patterns pour détecter les montants
         self.amount_patterns = [
             r'(\d+(?:,\d+)?(?:\.\d+)?)\s*€\s*(?:HT|TTC)?(?:/(?:heure|jour|mois|an|km))?',
@@ -42,14 +107,18 @@ class FinancialExtractor:
         }
         
         try:
-            # Recherche des montants
-            amounts = self._extract_amounts(text)
+            if self.engine == "tokenizer":
+                amounts, payment_terms = self._scan_financials(text)
+            else:
+                amounts = self._extract_amounts(text)
+                payment_terms = self._extract_payment_terms(text)
+            
+            # Montants trouvés
             if amounts:
                 financial_info["amounts_found"] = amounts
                 financial_info["has_financial_data"] = True
                 
-            # Recherche des conditions de paiement
-            payment_terms = self._extract_payment_terms(text)
+            # Conditions de paiement trouvées
             if payment_terms:
                 financial_info["payment_terms_found"] = payment_terms
                 
@@ -64,8 +133,166 @@ class FinancialExtractor:
             
         return financial_info
     
+    def _scan_financials(self, text: str) -> Tuple[List[Dict], List[str]]:
+        """
+        Montants et conditions de paiement en une passe linéaire
+        Seuls les nombres sont des ancres ; unités et contexte sont lus sur de courtes fenêtres de tokens
+        """
+        amounts = []
+        terms = [(anchor.start(), anchor.group()) for anchor in PERIODIC_ANCHOR.finditer(text)]
+        
+        consumed = 0  # Fin du dernier "mot-clé ... N jours" : comme finditer, pas de chevauchement
+        for anchor in NUMBER_ANCHOR.finditer(text):
+            number = Token("number", anchor.group(), anchor.start(), anchor.end())
+            following = tokenize(text, number.end, number.end + FOLLOWING_CHARS, limit=5)
+            adjacent = bool(following) and self._adjacent(text, number, following[0])
+            
+            leading = LEADING_CURRENCY.search(text, max(0, number.start - 6), number.start)
+            if adjacent and (following[0].value in CURRENCY_TOKENS or GLUED_CURRENCY.match(following[0].value)):
+                amount = self._read_amount(text, number, following)
+                if amount:
+                    amounts.append(amount)
+            elif leading:
+                amount = self._read_amount(text, number, following if adjacent else [], leading.start())
+                if amount:
+                    amounts.append(amount)
+            elif adjacent and following[0].value in DAY_TOKENS:
+                found, consumed = self._read_payment_terms(text, number, following, consumed)
+                terms.extend(found)
+        
+        amounts = self._deduplicate_amounts(amounts)
+        terms.sort(key=lambda term: term[0])
+        return sorted(amounts, key=lambda x: x["position"]), list(dict.fromkeys(term for _, term in terms))
+    
+    def _read_amount(self, text: str, number: Token, following: List[Token],
+                     currency_start: Optional[int] = None) -> Optional[Dict]:
+        """Nombre + devise (ou devise + nombre) [+ HT/TTC] [+ /unité]"""
+        amount = self._parse_amount(number.value)
+        if amount is None:
+            return None
+        
+        if currency_start is None:
+            # Devise collée au mot suivant : le montant s'arrête à la devise
+            currency = following[0]
+            end = currency.end
+            if currency.value not in CURRENCY_TOKENS:
+                end = currency.start + GLUED_CURRENCY.match(currency.value).end()
+            start, tail = number.start, following[1:] if end == currency.end else []
+        else:
+            start, end, tail = currency_start, number.end, following
+        
+        tax_basis = None
+        if tail and tail[0].value in TAX_TOKENS and not text[end:tail[0].start].strip():
+            tax_basis = tail[0].value.upper()
+            end = tail[0].end
+            tail = tail[1:]
+        
+        rate_unit = None
+        if (len(tail) > 1 and tail[0].value == "/" and tail[1].value in RATE_UNITS
+                and not text[end:tail[0].start].strip() and self._adjacent(text, tail[0], tail[1])):
+            rate_unit = tail[1].value
+            end = tail[1].end
+        
+        window = tokenize(text, max(0, number.start - CONTEXT_CHARS), end + CONTEXT_CHARS)
+        return {
+            "amount": amount,
+            "raw_text": text[start:end],
+            "context": self._classify_context(rate_unit, window),
+            "position": start,
+            "tax_basis": tax_basis
+        }
+    
+    def _read_payment_terms(self, text: str, number: Token, following: List[Token],
+                            consumed: int) -> Tuple[List[Tuple[int, str]], int]:
+        """
+        Conditions autour de "N jours", comme les patterns historiques (chacun produit sa propre condition) :
+        mot-clé de paiement ... N jours ; N jours fin de mois / net ; [à] N jours [de] [la] facture / livraison
+        Retourne les conditions (position, texte) et la nouvelle fin de la dernière condition à mot-clé
+        """
+        days = following[0]
+        values = [token.value for token in following[1:]]
+        terms = []
+        
+        # Premier mot-clé de la ligne après la condition précédente, dans la fenêtre
+        line_start = text.rfind('\n', 0, number.start) + 1
+        window_start = max(line_start, consumed, number.start - PAYMENT_KEYWORD_CHARS)
+        preceding = tokenize(text, window_start, number.start)
+        keyword = next((token for token in preceding if token.value.startswith(PAYMENT_KEYWORDS)), None)
+        if keyword is not None:
+            terms.append((keyword.start, text[keyword.start:days.end]))
+            consumed = days.end
+        
+        if values[:3] == ["fin", "de", "mois"]:
+            terms.append((number.start, text[number.start:following[3].end]))
+        elif values[:1] == ["net"]:
+            terms.append((number.start, text[number.start:following[1].end]))
+        
+        # [de] [la] facture|livraison, mots consécutifs
+        offset = 1
+        for optional in ("de", "la"):
+            if offset < len(following) and following[offset].value == optional:
+                offset += 1
+        if offset < len(following) and following[offset].value.startswith(TERM_REFERENCES):
+            reference = following[offset]
+            end = reference.start + next(len(word) for word in TERM_REFERENCES if reference.value.startswith(word))
+            start = number.start
+            if preceding and preceding[-1].value == "à" and not text[preceding[-1].end:number.start].strip():
+                start = preceding[-1].start
+            terms.append((start, text[start:end]))
+        
+        return terms, consumed
+    
+    def _adjacent(self, text: str, left: Token, right: Token) -> bool:
+        """Deux tokens ne sont séparés que par des espaces"""
+        gap = text[left.end:right.start]
+        return not gap or gap.isspace()
+    
+    def _parse_amount(self, value: str) -> Optional[float]:
+        """Convertit "1 500,50", "1.500,50", "50.000" ou "1500.50" en float"""
+        value = re.sub(r'[ \u00a0\u202f]', '', value)
+        if "," in value and "." in value:
+            decimal = "," if value.rfind(",") > value.rfind(".") else "."
+            thousands = "." if decimal == "," else ","
+            value = value.replace(thousands, "").replace(decimal, ".")
+        elif value.count(",") == 1:
+            value = value.replace(",", ".")
+        elif DOT_THOUSANDS.fullmatch(value):
+            value = value.replace(".", "")
+        elif value.count(".") > 1 or value.count(",") > 1:
+            value = value.replace(".", "").replace(",", "")
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    
+    def _classify_context(self, rate_unit: Optional[str], window: List[Token]) -> str:
+        """Contexte d'un montant (horaire, journalier, etc.) d'après l'unité et les tokens voisins"""
+        words = [t.value for t in window if t.kind == "word"]
+        
+        def near(stem: str) -> bool:
+            return any(stem in word for word in words)
+        
+        # L'unité explicite (/heure, /km...) prime sur les mots voisins
+        if rate_unit:
+            return RATE_CONTEXTS[rate_unit]
+        
+        if near("heure"):
+            return "horaire"
+        elif near("jour"):
+            return "journalier"
+        elif near("mensuel"):
+            return "mensuel"
+        elif near("annuel"):
+            return "annuel"
+        elif near("kilomètre"):
+            return "kilométrique"
+        elif near("forfait"):
+            return "forfait"
+        else:
+            return "inconnu"
+    
     def _extract_amounts(self, text: str) -> List[Dict]:
-        """Extrait tous les montants du texte"""
+        """Extrait tous les montants du texte (patterns historiques)"""
         amounts = []
         
         for pattern in self.amount_patterns:
@@ -92,7 +319,7 @@ class FinancialExtractor:
         return sorted(amounts, key=lambda x: x["position"])
     
     def _extract_payment_terms(self, text: str) -> List[str]:
-        """Extrait les conditions de paiement"""
+        """Extrait les conditions de paiement (patterns historiques)"""
         terms = []
         
         for pattern in self.payment_patterns:
@@ -0,0 +1,75 @@
+"""
+Détection légère de langue et d'écriture pour restreindre les modèles Tesseract
+Mots outils français/anglais + comptage des caractères arabes, sans dépendance externe
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+ARABIC_PATTERN = re.compile(r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]")
+LATIN_PATTERN = re.compile(r"[A-Za-zÀ-ÖØ-öø-ÿ]")
+
+# Mots outils fréquents, absents de l'autre langue
+STOPWORDS = {
+    "fra": {
+        "le", "la", "les", "des", "du", "et", "est", "une", "dans", "pour", "par", "sur", "au", "aux",
+        "que", "qui", "ne", "pas", "ce", "cette", "ses", "sont", "être", "avec", "entre", "conformément"
+    },
+    "eng": {
+        "the", "and", "of", "to", "is", "are", "for", "with", "this", "that", "shall", "be", "by",
+        "which", "from", "such", "any", "between", "hereby", "agreement"
+    }
+}
+
+MIN_WORDS = 30  # En dessous, l'échantillon n'est pas concluant
+DOMINANCE_RATIO = 3.0  # Une langue est retenue seule si elle pèse 3x l'autre
+MIN_ARABIC_RATIO = 0.02  # Part de caractères arabes (tampons, mentions) pour ajouter "ara"
+
+@dataclass
+class LanguageGuess:
+    """Résultat de la détection : codes Tesseract et mesures"""
+    languages: Optional[str]  # Ex. "fra", "fra+ara" ; None si non concluant
+    scores: Dict[str, int] = field(default_factory=dict)
+    arabic_ratio: float = 0.0
+    words: int = 0
+
+def detect_languages(text: str) -> LanguageGuess:
+    """Langue(s) dominante(s) d'un texte, en codes Tesseract"""
+    words = [word.lower() for word in WORD_PATTERN.findall(text)]
+    scores = {lang: sum(1 for word in words if word in stopwords) for lang, stopwords in STOPWORDS.items()}
+    
+    arabic_chars = len(ARABIC_PATTERN.findall(text))
+    letters = arabic_chars + len(LATIN_PATTERN.findall(text))
+    arabic_ratio = arabic_chars / letters if letters else 0.0
+    
+    guess = LanguageGuess(languages=None, scores=scores, arabic_ratio=round(arabic_ratio, 4), words=len(words))
+    if len(words) < MIN_WORDS:
+        return guess
+    
+    # Écriture latine : français, anglais ou les deux
+    fra, eng = scores["fra"], scores["eng"]
+    if fra == 0 and eng == 0:
+        latin = []
+    elif fra >= DOMINANCE_RATIO * eng:
+        latin = ["fra"]
+    elif eng >= DOMINANCE_RATIO * fra:
+        latin = ["eng"]
+    else:
+        latin = ["fra", "eng"]
+    
+    scripts = latin + (["ara"] if arabic_ratio >= MIN_ARABIC_RATIO else [])
+    guess.languages = "+".join(scripts) or None
+    return guess
+
+def narrow_languages(detected: Optional[str], configured: str, available: Optional[Set[str]] = None) -> str:
+    """
+    Jeu de langues retenu : la détection, limitée aux modèles installés
+    Retombe sur la configuration si la détection est vide ou inutilisable
+    """
+    if not detected:
+        return configured
+    
+    languages = [lang for lang in detected.split("+") if available is None or lang in available]
+    return "+".join(languages) if languages else configured
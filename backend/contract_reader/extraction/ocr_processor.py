@@ -4,14 +4,31 @@ Fallback robuste avec détection de layout et positions
 """
 
 import io
+import math
 import os
+import tempfile
 import time
-from typing import List, Dict, Any, Tuple, Optional
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, Union, Set
+from dataclasses import dataclass, field
 from PIL import Image
 import pytesseract
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_bytes, pdfinfo_from_bytes
 from .pdf_extractor import TextElement, ExtractedPage
+from .language_detector import detect_languages, narrow_languages
+from .page_cache import get_page_cache, page_fingerprint
+from ..config.performance_config import PerformanceConfig
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# Colonnes de la sortie TSV de Tesseract (même dictionnaire que pytesseract.Output.DICT)
+TSV_COLUMNS = ("level", "page_num", "block_num", "par_num", "line_num", "word_num",
+               "left", "top", "width", "height", "conf", "text")
 
 @dataclass
 class OCRConfig:
@@ -21,6 +38,103 @@ class OCRConfig:
     psm: int = 6  # Page Segmentation Mode: uniform block of text
     oem: int = 3  # OCR Engine Mode: default
     confidence_threshold: int = 30  # Seuil de confiance minimum
+    parallel_workers: int = field(default_factory=lambda: min(4, os.cpu_count() or 1))  # 1 = séquentiel
+    single_pass: bool = True  # Texte dérivé de image_to_data, une seule reconnaissance par page
+    streaming: bool = True  # Rendu par fenêtres de pages, chaque image libérée après son OCR
+    raster_window: int = field(default_factory=lambda: max(1, PerformanceConfig.OCR_RASTER_WINDOW))  # Pages rendues à la fois
+    grayscale: bool = True  # Bitmaps 8 bits au lieu de RGB (3x moins de mémoire)
+    use_temp_files: bool = field(default_factory=lambda: PerformanceConfig.OCR_RASTER_TEMP_FILES)  # Rendu sur disque, chargé page par page
+    adaptive_dpi: bool = True  # Premier passage à low_dpi, re-scan à dpi des seules pages peu fiables
+    low_dpi: int = 150
+    rescan_confidence: int = 70  # Confiance moyenne des mots en dessous de laquelle la page est re-scannée
+    detect_language: bool = True  # Langues restreintes d'après la première page OCR (ou une indication)
+    page_cache: bool = field(default_factory=lambda: PerformanceConfig.OCR_PAGE_CACHE_ENABLED)  # Pages identiques servies depuis le cache
+
+# Version et modèles de langue de Tesseract, lus une seule fois par process
+_tesseract_version: Optional[str] = None
+_tesseract_languages: Optional[Set[str]] = None
+
+# Pool OCR persistant : les workers gardent leur moteur (langues chargées) d'un job à l'autre
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_ocr_pool_size = 0
+_ocr_pool_config: Optional[OCRConfig] = None
+
+# Processeur réutilisé dans chaque worker OCR
+_worker_processor: Optional["OCRProcessor"] = None
+
+def check_tesseract() -> str:
+    """Vérifie la présence de Tesseract (résultat mis en cache pour le process)"""
+    global _tesseract_version
+    
+    if _tesseract_version is None:
+        try:
+            if TESSEROCR_AVAILABLE:
+                _tesseract_version = tesserocr.tesseract_version().splitlines()[0]
+            else:
+                _tesseract_version = str(pytesseract.get_tesseract_version())
+        except Exception:
+            raise Exception("Tesseract OCR n'est pas installé. Installer avec: brew install tesseract")
+    
+    return _tesseract_version
+
+def get_tesseract_languages() -> Optional[Set[str]]:
+    """Modèles de langue installés (None si la liste est indisponible)"""
+    global _tesseract_languages
+    
+    if _tesseract_languages is None:
+        try:
+            if TESSEROCR_AVAILABLE:
+                _tesseract_languages = set(tesserocr.get_languages()[1])
+            else:
+                _tesseract_languages = set(pytesseract.get_languages(config=""))
+        except Exception:
+            return None
+    
+    return _tesseract_languages
+
+def _init_ocr_worker(config: OCRConfig):
+    """Initialisation d'un worker : processeur et moteur Tesseract chargés une fois"""
+    global _worker_processor
+    
+    _worker_processor = OCRProcessor(config)
+    _worker_processor.open_engine()
+
+def get_ocr_pool(max_workers: int, config: OCRConfig) -> ProcessPoolExecutor:
+    """Retourne le pool OCR persistant, recréé si la taille ou la configuration change"""
+    global _ocr_pool, _ocr_pool_size, _ocr_pool_config
+    
+    if _ocr_pool is None or _ocr_pool_size != max_workers or _ocr_pool_config != config:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=False)
+        _ocr_pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_ocr_worker, initargs=(config,))
+        _ocr_pool_size = max_workers
+        _ocr_pool_config = config
+    
+    return _ocr_pool
+
+def shutdown_ocr_pool(wait: bool = True):
+    """Arrête le pool OCR (arrêt applicatif ou pool cassé)"""
+    global _ocr_pool, _ocr_pool_size, _ocr_pool_config
+    
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown(wait=wait)
+    _ocr_pool = None
+    _ocr_pool_size = 0
+    _ocr_pool_config = None
+
+def _ocr_page_range(source: Union[bytes, str], first_page: int, last_page: int, config: OCRConfig,
+                    language: Optional[str] = None) -> List[Tuple[ExtractedPage, Optional[float], bool]]:
+    """Point d'entrée worker : rasterise et OCR une plage de pages (PDF en octets ou fichier spoolé)"""
+    global _worker_processor
+    
+    if _worker_processor is None or _worker_processor.config != config:
+        _worker_processor = OCRProcessor(config)
+    
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            source = f.read()
+    
+    return _worker_processor._ocr_range(source, first_page, last_page, language)
 
 class OCRProcessor:
     """Processeur OCR avec Tesseract"""
@@ -34,70 +148,98 @@ class OCRProcessor:
             "successful_extractions": 0
         }
         
-        # Vérifier que Tesseract est installé
-        try:
-            pytesseract.get_tesseract_version()
-        except Exception:
-            raise Exception("Tesseract OCR n'est pas installé. Installer avec: brew install tesseract")
+        # Vérifier que Tesseract est installé (une fois par process)
+        check_tesseract()
+        
+        # Moteurs tesserocr par jeu de langues (chargés une fois), ouverts au premier usage
+        self._engines: Dict[str, Any] = {}
+    
+    def open_engine(self, language: Optional[str] = None):
+        """Initialise le moteur tesserocr persistant pour un jeu de langues, s'il est disponible"""
+        if not TESSEROCR_AVAILABLE:
+            return None
+        
+        language = language or self.config.language
+        engine = self._engines.get(language)
+        if engine is None:
+            engine = tesserocr.PyTessBaseAPI(lang=language, psm=self.config.psm, oem=self.config.oem)
+            self._engines[language] = engine
+        return engine
     
-    def extract_with_ocr(self, pdf_bytes: bytes) -> Tuple[List[ExtractedPage], Dict[str, Any]]:
+    def close_engine(self):
+        """Libère les moteurs tesserocr"""
+        for engine in self._engines.values():
+            engine.End()
+        self._engines = {}
+    
+    def extract_with_ocr(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None,
+                         language_hint: Optional[str] = None) -> Tuple[List[ExtractedPage], Dict[str, Any]]:
         """
-        Extraction OCR complète d'un PDF
+        Extraction OCR complète d'un PDF (ou des seules pages demandées)
         Convertit PDF → images → OCR avec positions
+        language_hint : langues détectées ailleurs (pages texte), sinon détection sur la première page OCR
         """
         start_time = time.time()
         
         try:
-            # Convertir PDF en images
-            images = convert_from_bytes(pdf_bytes, dpi=self.config.dpi)
+            if page_numbers is None:
+                page_numbers = list(range(1, self.count_pages(pdf_bytes) + 1))
+            page_numbers = sorted(set(page_numbers))
             
-            pages = []
-            total_confidence = 0
-            successful_pages = 0
+            # Choix des langues pour les pages restantes
+            results = []
+            language = self.config.language
+            language_source = "config"
+            if language_hint:
+                language = narrow_languages(language_hint, self.config.language, get_tesseract_languages())
+                language_source = "hint"
+            elif self.config.detect_language and len(page_numbers) > 1:
+                results = self._ocr_range(pdf_bytes, page_numbers[0], page_numbers[0])
+                guess = detect_languages(results[0][0].text)
+                if guess.languages:
+                    language = narrow_languages(guess.languages, self.config.language, get_tesseract_languages())
+                    language_source = "first_page"
+                page_numbers = page_numbers[1:]
             
-            for page_num, image in enumerate(images, 1):
-                try:
-                    page_data = self._process_page_ocr(image, page_num)
-                    pages.append(page_data)
-                    
-                    # Calculer confiance moyenne de la page
-                    page_confidence = self._calculate_page_confidence(page_data.elements)
-                    total_confidence += page_confidence
-                    successful_pages += 1
-                    
-                except Exception as e:
-                    print(f"Erreur OCR page {page_num}: {e}")
-                    # Créer une page vide en cas d'erreur
-                    pages.append(ExtractedPage(
-                        page_number=page_num,
-                        text="",
-                        elements=[],
-                        width=image.width,
-                        height=image.height,
-                        extraction_method="ocr_failed"
-                    ))
+            results.extend(self._ocr_page_numbers(pdf_bytes, page_numbers, language))
+            
+            pages = [page for page, _, _ in results]
+            page_confidences = [confidence for _, confidence, _ in results if confidence is not None]
+            total_confidence = sum(page_confidences)
+            successful_pages = len(page_confidences)
+            page_count = len(pages)
             
             processing_time = int((time.time() - start_time) * 1000)
             
             # Mettre à jour les statistiques
-            self.ocr_stats["total_pages_processed"] += len(images)
+            self.ocr_stats["total_pages_processed"] += page_count
             self.ocr_stats["successful_extractions"] += successful_pages
             
             if successful_pages > 0:
                 avg_confidence = total_confidence / successful_pages
                 self.ocr_stats["avg_confidence"] = (
-                    (self.ocr_stats["avg_confidence"] * (self.ocr_stats["total_pages_processed"] - len(images)) + avg_confidence * len(images))
+                    (self.ocr_stats["avg_confidence"] * (self.ocr_stats["total_pages_processed"] - page_count) + avg_confidence * page_count)
                     / self.ocr_stats["total_pages_processed"]
                 )
             
-            self.ocr_stats["avg_time_per_page_ms"] = processing_time // len(images)
+            self.ocr_stats["avg_time_per_page_ms"] = processing_time // max(page_count, 1)
             
             stats = {
                 "extraction_time_ms": processing_time,
                 "method_used": "tesseract_ocr",
-                "pages_processed": len(images),
+                "pages_processed": page_count,
                 "successful_pages": successful_pages,
                 "avg_confidence": total_confidence / max(successful_pages, 1),
+                "page_confidences": [confidence for _, confidence, _ in results],
+                "dpi": self.config.low_dpi if self.config.adaptive_dpi else self.config.dpi,
+                "rescan_dpi": self.config.dpi if self.config.adaptive_dpi else None,
+                "escalated_pages": [page.page_number for page, _, escalated in results if escalated],
+                "parallel_workers": min(self.config.parallel_workers, page_count) if self.config.parallel_workers > 1 else 1,
+                "raster_window": self.config.raster_window if self.config.streaming else None,
+                "engine": "tesserocr" if TESSEROCR_AVAILABLE else "pytesseract",
+                "ocr_language": language,
+                "ocr_language_source": language_source,
+                "page_cache_hits": sum(1 for page in pages if page.extraction_method == "tesseract_ocr_cached"),
                 "total_text_length": sum(len(p.text) for p in pages)
             }
             
@@ -106,17 +248,213 @@ class OCRProcessor:
         except Exception as e:
             raise Exception(f"Erreur OCR: {str(e)}")
     
-    def _process_page_ocr(self, image: Image.Image, page_num: int) -> ExtractedPage:
-        """Traite une page avec OCR et extraction des positions"""
+    def count_pages(self, pdf_bytes: bytes) -> int:
+        """Nombre de pages du document (poppler, sans rendu)"""
+        return pdfinfo_from_bytes(pdf_bytes)["Pages"]
+    
+    def _ocr_page_numbers(self, pdf_bytes: bytes, page_numbers: List[int],
+                          language: Optional[str] = None) -> List[Tuple[ExtractedPage, Optional[float], bool]]:
+        """Répartit des plages de pages sur plusieurs processus, résultats dans l'ordre des pages"""
+        page_numbers = sorted(set(page_numbers))
+        if not page_numbers:
+            return []
+        workers = min(self.config.parallel_workers, len(page_numbers))
+        # Jobs courts (une fenêtre de rendu) : les workers persistants se les répartissent au fil de l'eau
+        job_size = min(math.ceil(len(page_numbers) / max(workers, 1)), max(1, self.config.raster_window))
+        page_ranges = self._split_page_ranges(page_numbers, job_size)
+        
+        if workers <= 1:
+            results = []
+            for first_page, last_page in page_ranges:
+                results.extend(self._ocr_range(pdf_bytes, first_page, last_page, language))
+            return results
+        
+        pool = get_ocr_pool(self.config.parallel_workers, self.config)
+        try:
+            # PDF spoolé une fois sur disque : les jobs transmettent un chemin, pas les octets
+            with tempfile.NamedTemporaryFile(prefix="ocr_source_", suffix=".pdf") as source:
+                source.write(pdf_bytes)
+                source.flush()
+                futures = [
+                    pool.submit(_ocr_page_range, source.name, first_page, last_page, self.config, language)
+                    for first_page, last_page in page_ranges
+                ]
+                # Les futures sont parcourues dans l'ordre des plages
+                results = []
+                for future in futures:
+                    results.extend(future.result())
+        except BrokenProcessPool:
+            # Un worker est mort : le pool sera recréé au prochain appel
+            shutdown_ocr_pool(wait=False)
+            raise
+        
+        return results
+    
+    @staticmethod
+    def _split_page_ranges(page_numbers: List[int], max_range_size: int) -> List[Tuple[int, int]]:
+        """Regroupe des numéros de page triés en plages contiguës de taille bornée"""
+        page_ranges = []
+        
+        for page_num in page_numbers:
+            if page_ranges:
+                first_page, last_page = page_ranges[-1]
+                if page_num == last_page + 1 and last_page - first_page + 1 < max_range_size:
+                    page_ranges[-1] = (first_page, page_num)
+                    continue
+            page_ranges.append((page_num, page_num))
+        
+        return page_ranges
+    
+    def _ocr_range(self, pdf_bytes: bytes, first_page: int, last_page: int,
+                   language: Optional[str] = None) -> List[Tuple[ExtractedPage, Optional[float], bool]]:
+        """
+        OCR d'une plage de pages ; en mode adaptatif, passage à low_dpi puis re-scan à dpi
+        (avec prétraitement) des pages dont la confiance reste sous rescan_confidence
+        """
+        if not self.config.adaptive_dpi:
+            images = self._rasterize(pdf_bytes, first_page, last_page, self.config.dpi)
+            return [(page, confidence, False) for page, confidence in self._ocr_images(images, first_page, self.config.dpi, language=language)]
+        
+        images = self._rasterize(pdf_bytes, first_page, last_page, self.config.low_dpi)
+        results = [
+            (page, confidence, False)
+            for page, confidence in self._ocr_images(images, first_page, self.config.low_dpi, language=language)
+        ]
+        
+        rescan_pages = [
+            page.page_number for page, confidence, _ in results
+            if confidence is None or confidence < self.config.rescan_confidence
+        ]
+        
+        for rescan_first, rescan_last in self._split_page_ranges(rescan_pages, len(rescan_pages)):
+            images = self._rasterize(pdf_bytes, rescan_first, rescan_last, self.config.dpi)
+            for page, confidence in self._ocr_images(images, rescan_first, self.config.dpi, enhance=True, language=language):
+                index = page.page_number - first_page
+                previous_confidence = results[index][1]
+                # Garder le meilleur des deux passages
+                if confidence is not None and (previous_confidence is None or confidence >= previous_confidence):
+                    results[index] = (page, confidence, True)
+                else:
+                    results[index] = (results[index][0], previous_confidence, True)
+        
+        return results
+    
+    def _rasterize(self, pdf_bytes: bytes, first_page: int, last_page: int, dpi: int) -> Iterable[Image.Image]:
+        """Images des pages first_page..last_page (liste complète, ou flux borné si streaming)"""
+        if not self.config.streaming:
+            return convert_from_bytes(
+                pdf_bytes, dpi=dpi, first_page=first_page, last_page=last_page,
+                grayscale=self.config.grayscale
+            )
+        return self._iter_page_images(pdf_bytes, first_page, last_page, dpi)
+    
+    def _iter_page_images(self, pdf_bytes: bytes, first_page: int, last_page: int, dpi: int) -> Iterator[Image.Image]:
+        """
+        Rend les pages par fenêtres de raster_window : au plus une fenêtre en mémoire à la fois
+        Avec use_temp_files, les pages sont écrites sur disque et chargées une par une
+        """
+        window = max(1, self.config.raster_window)
+        
+        for window_first in range(first_page, last_page + 1, window):
+            window_last = min(window_first + window - 1, last_page)
+            
+            if not self.config.use_temp_files:
+                images = convert_from_bytes(
+                    pdf_bytes, dpi=dpi, first_page=window_first, last_page=window_last,
+                    grayscale=self.config.grayscale
+                )
+                while images:
+                    yield images.pop(0)
+                continue
+            
+            with tempfile.TemporaryDirectory(prefix="ocr_raster_") as output_folder:
+                paths = convert_from_bytes(
+                    pdf_bytes, dpi=dpi, first_page=window_first, last_page=window_last,
+                    grayscale=self.config.grayscale, output_folder=output_folder, paths_only=True
+                )
+                for path in paths:
+                    with Image.open(path) as image:
+                        image.load()
+                        yield image
+                    os.remove(path)
+    
+    def _ocr_images(self, images: Iterable[Image.Image], first_page: int, dpi: int, enhance: bool = False,
+                    language: Optional[str] = None) -> List[Tuple[ExtractedPage, Optional[float]]]:
+        """
+        OCR séquentiel d'images consécutives, avec confiance par page (None si échec)
+        Boîtes et dimensions converties en points PDF (72/dpi) : même repère que la couche texte, quel que soit le dpi
+        """
+        results = []
+        points_per_pixel = 72 / dpi
+        
+        page_cache = get_page_cache() if self.config.page_cache else None
+        
+        for page_num, image in enumerate(images, first_page):
+            try:
+                # Page déjà reconnue (même bitmap, mêmes paramètres), y compris dans un autre document
+                cache_key = None
+                cached = None
+                if page_cache is not None:
+                    cache_key = page_fingerprint(image, self._page_cache_params(enhance, language, dpi))
+                    cached = page_cache.get(cache_key, page_num)
+                
+                if cached is not None:
+                    results.append(cached)
+                else:
+                    scale = points_per_pixel
+                    if enhance:
+                        raster_width = image.width
+                        image = self.enhance_image_for_ocr(image)
+                        scale *= raster_width / image.width  # Image agrandie pour l'OCR
+                    page_data = self._process_page_ocr(image, page_num, language, scale)
+                    
+                    # Calculer confiance moyenne de la page
+                    page_confidence = self._calculate_page_confidence(page_data.elements)
+                    results.append((page_data, page_confidence))
+                    if cache_key is not None:
+                        page_cache.put(cache_key, page_data, page_confidence)
+                
+            except Exception as e:
+                print(f"Erreur OCR page {page_num}: {e}")
+                # Créer une page vide en cas d'erreur
+                results.append((ExtractedPage(
+                    page_number=page_num,
+                    text="",
+                    elements=[],
+                    width=image.width * points_per_pixel,
+                    height=image.height * points_per_pixel,
+                    extraction_method="ocr_failed"
+                ), None))
+            
+            # Libérer le bitmap dès que la page est traitée
+            image.close()
+            del image
+        
+        return results
+    
+    def _page_cache_params(self, enhance: bool, language: Optional[str], dpi: int) -> Tuple[Any, ...]:
+        """Paramètres qui influencent le résultat OCR d'un bitmap (complètent l'empreinte) ; dpi : conversion en points"""
+        return (
+            language or self.config.language, self.config.psm, self.config.oem,
+            self.config.confidence_threshold, self.config.single_pass, enhance, dpi
+        )
+    
+    def _process_page_ocr(self, image: Image.Image, page_num: int, language: Optional[str] = None,
+                          scale: float = 1.0) -> ExtractedPage:
+        """Traite une page avec OCR et extraction des positions (pixels × scale : points PDF)"""
+        language = language or self.config.language
         
         # Configuration Tesseract
-        custom_config = f'--oem {self.config.oem} --psm {self.config.psm} -l {self.config.language}'
+        custom_config = f'--oem {self.config.oem} --psm {self.config.psm} -l {language}'
         
-        # Extraire le texte complet
-        page_text = pytesseract.image_to_string(image, config=custom_config)
+        # Extraire les données détaillées avec positions (sortie TSV)
+        data = self._image_to_data(image, custom_config, language)
         
-        # Extraire les données détaillées avec positions
-        data = pytesseract.image_to_data(image, config=custom_config, output_type=pytesseract.Output.DICT)
+        # Extraire le texte complet
+        if self.config.single_pass:
+            page_text = self._text_from_ocr_data(data)
+        else:
+            page_text = pytesseract.image_to_string(image, config=custom_config)
         
         elements = []
         current_line = []
@@ -124,7 +462,7 @@ class OCRProcessor:
         
         for i in range(len(data['text'])):
             text = data['text'][i].strip()
-            confidence = int(data['conf'][i])
+            confidence = int(float(data['conf'][i]))
             
             # Ignorer les éléments avec faible confiance ou vides
             if confidence < self.config.confidence_threshold or not text:
@@ -149,7 +487,7 @@ class OCRProcessor:
             else:
                 # Nouvelle ligne, traiter la ligne précédente
                 if current_line:
-                    line_element = self._merge_line_elements(current_line, page_num)
+                    line_element = self._merge_line_elements(current_line, page_num, scale)
                     if line_element:
                         elements.append(line_element)
                 
@@ -166,7 +504,7 @@ class OCRProcessor:
         
         # Traiter la dernière ligne
         if current_line:
-            line_element = self._merge_line_elements(current_line, page_num)
+            line_element = self._merge_line_elements(current_line, page_num, scale)
             if line_element:
                 elements.append(line_element)
         
@@ -174,13 +512,58 @@ class OCRProcessor:
             page_number=page_num,
             text=page_text,
             elements=elements,
-            width=image.width,
-            height=image.height,
+            width=image.width * scale,
+            height=image.height * scale,
             extraction_method="tesseract_ocr"
         )
     
-    def _merge_line_elements(self, line_words: List[Dict], page_num: int) -> Optional[TextElement]:
-        """Fusionne les mots d'une ligne en un élément de texte"""
+    def _image_to_data(self, image: Image.Image, custom_config: str, language: Optional[str] = None) -> Dict[str, List]:
+        """Sortie TSV de Tesseract : moteur persistant si disponible, sinon un appel pytesseract"""
+        engine = self.open_engine(language)
+        if engine is None:
+            return pytesseract.image_to_data(image, config=custom_config, output_type=pytesseract.Output.DICT)
+        
+        engine.SetImage(image)
+        data = {column: [] for column in TSV_COLUMNS}
+        for line in engine.GetTSVText(0).splitlines():
+            values = line.split("\t", len(TSV_COLUMNS) - 1)
+            if len(values) < len(TSV_COLUMNS) - 1:
+                continue
+            values += [""] * (len(TSV_COLUMNS) - len(values))
+            for column, value in zip(TSV_COLUMNS, values):
+                data[column].append(value if column in ("text", "conf") else int(value))
+        return data
+    
+    def _text_from_ocr_data(self, data: Dict[str, List]) -> str:
+        """Reconstitue le texte de la page depuis la sortie TSV (blocs → paragraphes → lignes)"""
+        paragraphs = []
+        current_paragraph_key = None
+        current_line_key = None
+        
+        for i in range(len(data['text'])):
+            word = data['text'][i].strip()
+            if not word:
+                continue
+            
+            paragraph_key = (data['block_num'][i], data['par_num'][i])
+            line_key = paragraph_key + (data['line_num'][i],)
+            
+            if paragraph_key != current_paragraph_key:
+                paragraphs.append([[word]])
+                current_paragraph_key = paragraph_key
+            elif line_key != current_line_key:
+                paragraphs[-1].append([word])
+            else:
+                paragraphs[-1][-1].append(word)
+            current_line_key = line_key
+        
+        return "\n\n".join(
+            "\n".join(" ".join(words) for words in lines)
+            for lines in paragraphs
+        )
+    
+    def _merge_line_elements(self, line_words: List[Dict], page_num: int, scale: float = 1.0) -> Optional[TextElement]:
+        """Fusionne les mots d'une ligne en un élément de texte (boîte en pixels × scale)"""
         if not line_words:
             return None
         
@@ -199,11 +582,11 @@ class OCRProcessor:
         return TextElement(
             text=text,
             page=page_num,
-            x=min_x,
-            y=min_y,
-            width=max_x - min_x,
-            height=max_y - min_y,
-            font_size=max_y - min_y,  # Approximation basée sur la hauteur
+            x=min_x * scale,
+            y=min_y * scale,
+            width=(max_x - min_x) * scale,
+            height=(max_y - min_y) * scale,
+            font_size=(max_y - min_y) * scale,  # Approximation basée sur la hauteur
             font_name=f"ocr_confidence_{int(avg_confidence)}"
         )
     
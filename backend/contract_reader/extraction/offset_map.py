@@ -0,0 +1,180 @@
+"""
+Index d'offsets du texte nettoyé vers les pages et les éléments positionnés
+Chaque caractère nettoyé garde son offset dans le texte brut, résolu par recherche dichotomique
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, Pattern, Union
+from .pdf_extractor import ExtractedPage
+
+# Fenêtre de recherche d'un élément dans le texte de sa page (éléments dans l'ordre de lecture)
+ELEMENT_SEARCH_WINDOW = 256
+
+# Texte extrait par un autre moteur que les éléments (coordonnées chargées après coup) : blancs différents
+REORDERED_TEXT_METHODS = ("pdfium_text",)
+
+@dataclass
+class TextLocation:
+    """Position d'un offset du texte nettoyé dans le document source"""
+    page_number: int
+    page_offset: int
+    element_index: Optional[int] = None
+    x: Optional[float] = None
+    y: Optional[float] = None
+
+def tracked_sub(pattern: Union[str, Pattern], replacement: str, text: str, origins: array) -> Tuple[str, array]:
+    """
+    re.sub qui conserve pour chaque caractère produit son offset d'origine
+    replacement : texte littéral ou références de groupes (\\1, \\2)
+    """
+    regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+    parts = re.split(r'(\\\d)', replacement)
+    
+    out_text = []
+    out_origins = array('q')
+    cursor = 0
+    
+    for match in regex.finditer(text):
+        out_text.append(text[cursor:match.start()])
+        out_origins.extend(origins[cursor:match.start()])
+        
+        for part in parts:
+            if not part:
+                continue
+            if part.startswith('\\') and part[1:].isdigit():
+                group = int(part[1:])
+                out_text.append(match.group(group))
+                out_origins.extend(origins[match.start(group):match.end(group)])
+            else:
+                # Texte inséré : rattaché au début de la correspondance
+                out_text.append(part)
+                out_origins.extend([origins[match.start()] if match.start() < len(origins) else -1] * len(part))
+        
+        cursor = match.end()
+    
+    out_text.append(text[cursor:])
+    out_origins.extend(origins[cursor:])
+    return "".join(out_text), out_origins
+
+class TextOffsetMap:
+    """Correspondance offset nettoyé -> offset brut -> (page, élément, x, y)"""
+    
+    def __init__(self, origins: array, page_starts: List[int], page_numbers: List[int], page_lengths: List[int]):
+        self.origins = origins
+        self.page_starts = page_starts
+        self.page_numbers = page_numbers
+        self.page_lengths = page_lengths
+        self._pages: Dict[int, ExtractedPage] = {}
+        self._element_index: Dict[int, Tuple[array, array]] = {}
+    
+    def attach_pages(self, pages: List[ExtractedPage]):
+        """Rattache les pages (nécessaire pour résoudre les éléments et coordonnées)"""
+        self._pages = {page.page_number: page for page in pages}
+        self._element_index = {}
+    
+    def raw_offset(self, cleaned_offset: int) -> Optional[int]:
+        """Offset dans le texte brut d'un offset du texte nettoyé"""
+        if not 0 <= cleaned_offset < len(self.origins):
+            return None
+        origin = self.origins[cleaned_offset]
+        return origin if origin >= 0 else None
+    
+    def locate(self, cleaned_offset: int) -> Optional[TextLocation]:
+        """Résout un offset du texte nettoyé en page, élément et coordonnées"""
+        raw = self.raw_offset(cleaned_offset)
+        if raw is None:
+            return None
+        
+        page_slot = bisect_right(self.page_starts, raw) - 1
+        if page_slot < 0:
+            return None
+        
+        # Séparateurs et en-têtes "=== PAGE n ===" : hors contenu
+        page_offset = raw - self.page_starts[page_slot]
+        if page_offset >= self.page_lengths[page_slot]:
+            return None
+        
+        page_number = self.page_numbers[page_slot]
+        location = TextLocation(page_number=page_number, page_offset=page_offset)
+        
+        page = self._pages.get(page_number)
+        if page is None or not page.elements:
+            return location
+        
+        starts, indices = self._page_element_index(page)
+        slot = bisect_right(starts, location.page_offset) - 1
+        if slot >= 0:
+            element_index = indices[slot]
+            location.element_index = element_index
+            location.x = page.elements.x[element_index]
+            location.y = page.elements.y[element_index]
+        
+        return location
+    
+    def locate_span(self, start: int, end: int) -> Optional[TextLocation]:
+        """Résout une plage du texte nettoyé (premier caractère localisable)"""
+        for offset in range(start, max(start + 1, end)):
+            location = self.locate(offset)
+            if location is not None:
+                return location
+        return None
+    
+    def _page_element_index(self, page: ExtractedPage) -> Tuple[array, array]:
+        # Alignement paresseux des éléments sur le texte de la page, une fois par page
+        cached = self._element_index.get(page.page_number)
+        if cached is not None:
+            return cached
+        
+        if page.extraction_method in REORDERED_TEXT_METHODS:
+            cached = self._compact_element_index(page)
+            self._element_index[page.page_number] = cached
+            return cached
+        
+        starts = array('q')
+        indices = array('q')
+        cursor = 0
+        text = page.text
+        
+        for index, element_text in enumerate(page.elements.texts()):
+            if not element_text:
+                continue
+            position = text.find(element_text, cursor, cursor + ELEMENT_SEARCH_WINDOW + len(element_text))
+            if position < 0:
+                continue
+            starts.append(position)
+            indices.append(index)
+            cursor = position + len(element_text)
+        
+        self._element_index[page.page_number] = (starts, indices)
+        return starts, indices
+    
+    def _compact_element_index(self, page: ExtractedPage) -> Tuple[array, array]:
+        """
+        Même alignement séquentiel, sur le texte débarrassé des blancs : les deux moteurs
+        ne découpent pas les mots de la même façon ("5eurosparcolis" contre "5 euros par colis")
+        """
+        positions = array('q', (offset for offset, char in enumerate(page.text) if not char.isspace()))
+        compact = "".join(page.text[offset] for offset in positions)
+        
+        starts = array('q')
+        indices = array('q')
+        cursor = 0
+        
+        for index, element_text in enumerate(page.elements.texts()):
+            needle = "".join(element_text.split())
+            if not needle:
+                continue
+            position = compact.find(needle, cursor, cursor + ELEMENT_SEARCH_WINDOW + len(needle))
+            if position < 0:
+                continue
+            starts.append(positions[position])
+            indices.append(index)
+            cursor = position + len(needle)
+        
+        return starts, indices
+    
+    def __len__(self) -> int:
+        return len(self.origins)
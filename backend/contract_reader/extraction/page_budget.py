@@ -0,0 +1,85 @@
+"""
+Budget de pages et de caractères d'un contrat (MAX_PAGES_PER_CONTRACT, MAX_TEXT_LENGTH)
+Consomme un flux de pages et s'arrête avant d'extraire une page qui ne serait pas utilisée
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from .pdf_extractor import ExtractedPage
+from ..config.performance_config import PerformanceConfig
+
+@dataclass
+class PageBudget:
+    """Limites d'un document et consommation courante"""
+    max_pages: int = field(default_factory=lambda: PerformanceConfig.MAX_PAGES_PER_CONTRACT)
+    max_chars: int = field(default_factory=lambda: PerformanceConfig.MAX_TEXT_LENGTH)
+    pages_used: int = 0
+    chars_used: int = 0
+    stopped_by: Optional[str] = None  # "max_pages" ou "max_text_length"
+    last_page: Optional[int] = None  # Dernière page retenue
+    pages_capped: bool = False  # Pages candidates écartées par cap_page_numbers
+    
+    def limit_reached(self) -> Optional[str]:
+        """Limite atteinte ("max_pages" ou "max_text_length"), None sinon"""
+        if self.pages_used >= self.max_pages:
+            return "max_pages"
+        if self.chars_used >= self.max_chars:
+            return "max_text_length"
+        return None
+    
+    def cap_page_numbers(self, page_numbers: List[int]) -> List[int]:
+        """Pages candidates limitées au nombre de pages restant (avant toute extraction)"""
+        remaining = max(0, self.max_pages - self.pages_used)
+        if len(page_numbers) > remaining:
+            self.pages_capped = True
+        return page_numbers[:remaining]
+    
+    def consume(self, pages: Iterable[ExtractedPage], expected: Optional[int] = None) -> Iterator[ExtractedPage]:
+        """
+        Relaie les pages tant que le budget le permet, sans solliciter le flux au-delà de la limite
+        La page qui franchit la limite de caractères est gardée entière ; expected : nombre de pages du flux
+        """
+        iterator = iter(pages)
+        taken = 0
+        try:
+            while True:
+                reason = self.limit_reached()
+                if reason is not None:
+                    if expected is None or taken < expected or self.pages_capped:
+                        self.stopped_by = self.stopped_by or reason
+                    break
+                page = next(iterator, None)
+                if page is None:
+                    if self.pages_capped:
+                        self.stopped_by = self.stopped_by or "max_pages"
+                    break
+                taken += 1
+                self.pages_used += 1
+                self.chars_used += len(page.text)
+                self.last_page = page.page_number
+                yield page
+        finally:
+            # Ferme le générateur source (document pdfplumber/pdfium ouvert)
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+    
+    def reset(self):
+        """Repart de zéro (nouvelle tentative d'extraction après un échec)"""
+        self.pages_used = 0
+        self.chars_used = 0
+        self.stopped_by = None
+        self.last_page = None
+        self.pages_capped = False
+    
+    def to_stats(self) -> Dict[str, Any]:
+        """Résumé pour les métriques d'extraction"""
+        return {
+            "max_pages": self.max_pages,
+            "max_chars": self.max_chars,
+            "pages_used": self.pages_used,
+            "chars_used": self.chars_used,
+            "truncated": self.stopped_by is not None,
+            "stopped_by": self.stopped_by,
+            "last_page": self.last_page
+        }
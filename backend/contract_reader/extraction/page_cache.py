@@ -0,0 +1,119 @@
+"""
+Cache OCR au niveau de la page, partagé entre documents
+Clé = empreinte du bitmap rendu + paramètres OCR : les pages de modèles (CGV, annexes) ne sont reconnues qu'une fois
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+from PIL import Image
+from .pdf_extractor import ExtractedPage
+from .document_codec import encode_extracted_page, decode_extracted_page
+from ..config.performance_config import PerformanceConfig
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_PREFIX = "ocr_page:"
+PAGE_CACHE_VERSION = "2"  # À incrémenter si la reconnaissance ou le format des pages change
+
+def page_fingerprint(image: Image.Image, params: Tuple[Any, ...]) -> str:
+    """
+    Empreinte exacte du bitmap (mode, taille, pixels) et des paramètres OCR
+    Un hash perceptuel confondrait deux pages ne différant que par un nom ou un montant
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((PAGE_CACHE_VERSION, image.mode, image.size) + tuple(params)).encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+class PageCache:
+    """LRU en mémoire du process, doublé d'un Redis partagé si configuré"""
+    
+    def __init__(self, max_entries: int = None, redis_url: Optional[str] = None, ttl: int = None):
+        self.max_entries = max_entries if max_entries is not None else PerformanceConfig.OCR_PAGE_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else PerformanceConfig.OCR_PAGE_CACHE_TTL
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "redis_errors": 0}
+        
+        redis_url = redis_url if redis_url is not None else PerformanceConfig.OCR_PAGE_CACHE_REDIS_URL
+        self._redis = None
+        if REDIS_AVAILABLE and redis_url:
+            try:
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            except Exception as e:
+                logger.warning(f"Cache de pages OCR : Redis indisponible ({e}), cache local uniquement")
+    
+    def get(self, key: str, page_number: int) -> Optional[Tuple[ExtractedPage, Optional[float]]]:
+        """Page en cache renumérotée pour le document courant, avec sa confiance OCR"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+        
+        if payload is None and self._redis is not None:
+            try:
+                payload = self._redis.get(PAGE_CACHE_PREFIX + key)
+            except Exception:
+                self.stats["redis_errors"] += 1
+            if payload is not None:
+                self._remember(key, payload)
+        
+        if payload is None:
+            self.stats["misses"] += 1
+            return None
+        
+        page, extra = decode_extracted_page(payload)
+        page.page_number = page_number
+        page.elements.page = page_number
+        page.extraction_method = "tesseract_ocr_cached"
+        self.stats["hits"] += 1
+        return page, extra.get("confidence")
+    
+    def put(self, key: str, page: ExtractedPage, confidence: Optional[float]):
+        """Enregistre une page reconnue (localement et dans Redis)"""
+        payload = encode_extracted_page(page, {"confidence": confidence})
+        self._remember(key, payload)
+        self.stats["stores"] += 1
+        
+        if self._redis is not None:
+            try:
+                self._redis.setex(PAGE_CACHE_PREFIX + key, self.ttl, payload)
+            except Exception:
+                self.stats["redis_errors"] += 1
+    
+    def _remember(self, key: str, payload: bytes):
+        # Octets compressés : pas de page partagée mutable entre documents
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Vide le cache local (Redis conserve ses entrées jusqu'au TTL)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques du cache de pages"""
+        return {**self.stats, "entries": len(self._entries), "redis": self._redis is not None}
+
+# Cache unique par process (workers OCR compris)
+_page_cache: Optional[PageCache] = None
+
+def get_page_cache() -> PageCache:
+    """Retourne le cache de pages du process, créé au premier usage"""
+    global _page_cache
+    
+    if _page_cache is None:
+        _page_cache = PageCache()
+    return _page_cache
@@ -4,11 +4,73 @@ Support PyPDF2 + pdfplumber pour extraction optimale
 """
 
 import io
+import logging
+import math
+import tempfile
 import time
-from typing import List, Dict, Any, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Tuple, Optional, Union, Iterator, TYPE_CHECKING
 from dataclasses import dataclass
 from PyPDF2 import PdfReader
 import pdfplumber
+from .element_table import ElementTable, TextElementView
+from ..config.performance_config import PerformanceConfig
+
+if TYPE_CHECKING:
+    from .page_budget import PageBudget
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    # Sans NumPy, seul le regroupement caractère par caractère est disponible
+    NUMPY_AVAILABLE = False
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    # Sans pdfium, la passe texte seul retombe sur l'extraction complète
+    PDFIUM_AVAILABLE = False
+
+# Marque de césure en fin de ligne dans le texte pdfium
+PDFIUM_HYPHEN = "\ufffe"
+
+logger = logging.getLogger(__name__)
+
+# Pool persistant d'extraction de la couche texte par plages de pages (gros documents)
+_text_pool: Optional[ProcessPoolExecutor] = None
+_text_pool_size = 0
+
+def get_text_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Retourne le pool d'extraction par plages, recréé si la taille change"""
+    global _text_pool, _text_pool_size
+    
+    if _text_pool is None or _text_pool_size != max_workers:
+        if _text_pool is not None:
+            _text_pool.shutdown(wait=False)
+        _text_pool = ProcessPoolExecutor(max_workers=max_workers)
+        _text_pool_size = max_workers
+    
+    return _text_pool
+
+def shutdown_text_pool(wait: bool = True):
+    """Arrête le pool d'extraction par plages (arrêt applicatif ou pool cassé)"""
+    global _text_pool, _text_pool_size
+    
+    if _text_pool is not None:
+        _text_pool.shutdown(wait=wait)
+    _text_pool = None
+    _text_pool_size = 0
+
+def _extract_page_range(source: Union[bytes, str], page_numbers: List[int], engine: str) -> List["ExtractedPage"]:
+    """Point d'entrée worker : ouvre le PDF (fichier spoolé) et extrait ses pages avec positions"""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            source = f.read()
+    
+    return PDFExtractor(engine, parallel_workers=1)._extract_layout_pages(source, page_numbers)
 
 @dataclass
 class TextElement:
@@ -27,40 +89,80 @@ class ExtractedPage:
     """Page extraite avec métadonnées"""
     page_number: int
     text: str
-    elements: List[TextElement]
+    elements: ElementTable  # Accepte une liste de TextElement, convertie en table colonnaire
     width: float
     height: float
-    extraction_method: str  # "pypdf2" ou "pdfplumber"
+    extraction_method: str  # "pypdf2", "pdfplumber", "pdfplumber_fast", "pdfium_text", "tesseract_ocr" ou "tesseract_ocr_cached"
+    positions_loaded: bool = True  # False : texte seul, éléments chargés à la demande
+    
+    def __post_init__(self):
+        if not isinstance(self.elements, ElementTable):
+            self.elements = ElementTable.from_elements(self.elements, self.page_number)
 
 class PDFExtractor:
     """Extracteur PDF avec fallback et repères de position"""
     
-    def __init__(self):
+    # Tolérances de regroupement (valeurs par défaut de pdfplumber)
+    X_TOLERANCE = 3.0
+    Y_TOLERANCE = 3.0
+    
+    def __init__(self, engine: Optional[str] = None, parallel_workers: Optional[int] = None,
+                 parallel_min_pages: Optional[int] = None):
+        # "fast" : regroupement vectorisé en une passe, "pdfplumber" : boucle par caractère
+        self.engine = engine or ("fast" if NUMPY_AVAILABLE else "pdfplumber")
+        if self.engine == "fast" and not NUMPY_AVAILABLE:
+            self.engine = "pdfplumber"
+        
+        # Documents longs : plages de pages réparties sur plusieurs processus (1 = séquentiel)
+        self.parallel_workers = max(1, parallel_workers or PerformanceConfig.TEXT_EXTRACTION_WORKERS)
+        self.parallel_min_pages = parallel_min_pages or PerformanceConfig.TEXT_EXTRACTION_PARALLEL_MIN_PAGES
+        
         self.extraction_stats = {
             "total_extractions": 0,
             "pypdf2_success": 0,
             "pdfplumber_success": 0,
+            "pdfplumber_fast_success": 0,
+            "pdfium_text_success": 0,
+            "positions_loaded_pages": 0,
+            "parallel_extractions": 0,
             "ocr_fallback": 0,
             "avg_time_ms": 0
         }
     
-    def extract_text_with_positions(self, pdf_bytes: bytes) -> Tuple[List[ExtractedPage], Dict[str, Any]]:
+    def iter_pages(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None,
+                   text_only: bool = False) -> Iterator[ExtractedPage]:
+        """
+        Flux de pages extraites une à une, à la demande (sans fallback)
+        text_only : texte pdfium sans coordonnées (chargées ensuite via extract_positions)
+        """
+        if text_only and PDFIUM_AVAILABLE:
+            return self._iter_text_with_pdfium(pdf_bytes, page_numbers)
+        return self._iter_layout_pages(pdf_bytes, page_numbers)
+    
+    def extract_text_with_positions(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None,
+                                    budget: Optional["PageBudget"] = None) -> Tuple[List[ExtractedPage], Dict[str, Any]]:
         """
         Extraction principale avec repères de position
-        Essaie PyPDF2 puis pdfplumber si nécessaire
+        Essaie PyPDF2 puis pdfplumber si nécessaire ; page_numbers restreint aux pages demandées (1-indexées)
+        budget : pages extraites en flux, arrêt dès que la limite de pages ou de caractères est atteinte
         """
         start_time = time.time()
         
         try:
             # Méthode 1: pdfplumber (plus précis pour les positions)
-            pages = self._extract_with_pdfplumber(pdf_bytes)
-            method = "pdfplumber"
-            self.extraction_stats["pdfplumber_success"] += 1
+            pages, workers = self._extract_layout(pdf_bytes, page_numbers, budget)
+            method = "pdfplumber_fast" if self.engine == "fast" else "pdfplumber"
+            self.extraction_stats[f"{method}_success"] += 1
             
         except Exception as e1:
             try:
                 # Méthode 2: PyPDF2 (fallback)
-                pages = self._extract_with_pypdf2(pdf_bytes)
+                if budget is not None:
+                    budget.reset()
+                    page_numbers = budget.cap_page_numbers(self._resolve_page_numbers(pdf_bytes, page_numbers))
+                pages = self._extract_with_pypdf2(pdf_bytes, page_numbers)
+                if budget is not None:
+                    pages = list(budget.consume(pages, expected=len(pages)))
                 method = "pypdf2"
                 self.extraction_stats["pypdf2_success"] += 1
                 
@@ -82,17 +184,151 @@ class PDFExtractor:
             "method_used": method,
             "pages_extracted": len(pages),
             "total_text_length": sum(len(p.text) for p in pages),
-            "elements_found": sum(len(p.elements) for p in pages)
+            "elements_found": sum(len(p.elements) for p in pages),
+            "parallel_workers": workers if method != "pypdf2" else 1
         }
         
         return pages, stats
     
-    def _extract_with_pdfplumber(self, pdf_bytes: bytes) -> List[ExtractedPage]:
-        """Extraction avec pdfplumber (positions précises)"""
-        pages = []
+    def extract_text_only(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None,
+                          budget: Optional["PageBudget"] = None) -> Tuple[List[ExtractedPage], Dict[str, Any]]:
+        """
+        Passe rapide sans coordonnées : texte et dimensions de page (pdfium)
+        Les éléments positionnés sont chargés ensuite, page par page, via extract_positions
+        """
+        if not PDFIUM_AVAILABLE:
+            return self.extract_text_with_positions(pdf_bytes, page_numbers, budget)
+        
+        start_time = time.time()
         
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
+        try:
+            if budget is None:
+                pages = list(self._iter_text_with_pdfium(pdf_bytes, page_numbers))
+            else:
+                page_numbers = budget.cap_page_numbers(self._resolve_page_numbers(pdf_bytes, page_numbers))
+                pages = list(budget.consume(self._iter_text_with_pdfium(pdf_bytes, page_numbers), expected=len(page_numbers)))
+        except Exception:
+            # PDF que pdfium refuse : extraction complète habituelle (et ses fallbacks)
+            if budget is not None:
+                budget.reset()
+            return self.extract_text_with_positions(pdf_bytes, page_numbers, budget)
+        
+        self.extraction_stats["pdfium_text_success"] += 1
+        extraction_time = int((time.time() - start_time) * 1000)
+        
+        stats = {
+            "extraction_time_ms": extraction_time,
+            "method_used": "pdfium_text",
+            "pages_extracted": len(pages),
+            "total_text_length": sum(len(p.text) for p in pages),
+            "elements_found": 0
+        }
+        
+        return pages, stats
+    
+    def extract_positions(self, pdf_bytes: bytes, page_numbers: List[int]) -> Dict[int, ElementTable]:
+        """Éléments positionnés des seules pages demandées (seconde passe pdfplumber)"""
+        if not page_numbers:
+            return {}
+        
+        pages, _ = self._extract_layout(pdf_bytes, sorted(set(page_numbers)))
+        self.extraction_stats["positions_loaded_pages"] += len(pages)
+        return {page.page_number: page.elements for page in pages}
+    
+    def _extract_layout(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None,
+                        budget: Optional["PageBudget"] = None) -> Tuple[List[ExtractedPage], int]:
+        """
+        Pages avec positions (pdfplumber) : en flux borné par le budget, ou par plages en parallèle
+        au-delà de parallel_min_pages (limite de caractères alors appliquée après coup)
+        """
+        if budget is not None or self.parallel_workers > 1:
+            page_numbers = self._resolve_page_numbers(pdf_bytes, page_numbers)
+        if budget is not None:
+            page_numbers = budget.cap_page_numbers(page_numbers)
+        
+        if self.parallel_workers > 1 and len(page_numbers) >= self.parallel_min_pages:
+            try:
+                pages = self._extract_layout_parallel(pdf_bytes, page_numbers)
+                if budget is not None:
+                    pages = list(budget.consume(pages, expected=len(pages)))
+                return pages, self.parallel_workers
+            except BrokenProcessPool:
+                # Un worker est mort : pool recréé au prochain appel, extraction séquentielle en attendant
+                shutdown_text_pool(wait=False)
+                logger.warning("Pool d'extraction texte interrompu, extraction séquentielle")
+        
+        pages = self._iter_layout_pages(pdf_bytes, page_numbers)
+        if budget is not None:
+            pages = budget.consume(pages, expected=len(page_numbers))
+        return list(pages), 1
+    
+    def _extract_layout_pages(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None) -> List[ExtractedPage]:
+        """Pages avec positions dans le process courant"""
+        return list(self._iter_layout_pages(pdf_bytes, page_numbers))
+    
+    def _iter_layout_pages(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None) -> Iterator[ExtractedPage]:
+        """Flux de pages avec positions, selon le moteur de regroupement"""
+        if self.engine == "fast":
+            return self._iter_with_fast_grouping(pdf_bytes, page_numbers)
+        return self._iter_with_pdfplumber(pdf_bytes, page_numbers)
+    
+    @staticmethod
+    def _resolve_page_numbers(pdf_bytes: bytes, page_numbers: Optional[List[int]] = None) -> List[int]:
+        """Pages demandées, ou toutes les pages du document (comptées sans les analyser)"""
+        if page_numbers is not None:
+            return list(page_numbers)
+        return list(range(1, len(PdfReader(io.BytesIO(pdf_bytes)).pages) + 1))
+    
+    def _extract_layout_parallel(self, pdf_bytes: bytes, page_numbers: List[int]) -> List[ExtractedPage]:
+        """Plages de pages contiguës réparties sur le pool, réassemblées dans l'ordre"""
+        # Deux plages par worker : un worker qui tombe sur des pages lourdes n'attarde pas les autres
+        chunk_size = math.ceil(len(page_numbers) / (self.parallel_workers * 2))
+        chunks = [page_numbers[start:start + chunk_size] for start in range(0, len(page_numbers), chunk_size)]
+        pool = get_text_pool(self.parallel_workers)
+        
+        # PDF spoolé une fois sur disque : chaque worker l'ouvre lui-même, les octets ne transitent pas par le pool
+        with tempfile.NamedTemporaryFile(prefix="pdf_source_", suffix=".pdf") as source:
+            source.write(pdf_bytes)
+            source.flush()
+            futures = [pool.submit(_extract_page_range, source.name, chunk, self.engine) for chunk in chunks]
+            pages = []
+            for future in futures:
+                pages.extend(future.result())
+        
+        self.extraction_stats["parallel_extractions"] += 1
+        return pages
+    
+    def _iter_text_with_pdfium(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None) -> Iterator[ExtractedPage]:
+        """Texte par page avec pdfium, sans construire d'objets de mise en page"""
+        document = pdfium.PdfDocument(pdf_bytes)
+        
+        try:
+            wanted = page_numbers if page_numbers is not None else range(1, len(document) + 1)
+            for page_num in wanted:
+                page = document[page_num - 1]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                width, height = page.get_size()
+                textpage.close()
+                page.close()
+                
+                yield ExtractedPage(
+                    page_number=page_num,
+                    text=text.replace("\r\n", "\n").replace("\r", "\n").replace(PDFIUM_HYPHEN, "-"),
+                    elements=ElementTable(page_num),
+                    width=width,
+                    height=height,
+                    extraction_method="pdfium_text",
+                    positions_loaded=False
+                )
+        finally:
+            document.close()
+    
+    def _iter_with_pdfplumber(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None) -> Iterator[ExtractedPage]:
+        """Extraction avec pdfplumber (positions précises)"""
+        with pdfplumber.open(io.BytesIO(pdf_bytes), pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                page_num = page.page_number
                 # Extraire le texte complet
                 page_text = page.extract_text() or ""
                 
@@ -149,25 +385,109 @@ class PDFExtractor:
                         font_name=word_chars[0].get('fontname')
                     ))
                 
-                pages.append(ExtractedPage(
+                yield ExtractedPage(
                     page_number=page_num,
                     text=page_text,
                     elements=elements,
                     width=page.width,
                     height=page.height,
                     extraction_method="pdfplumber"
-                ))
+                )
+                page.close()  # Libère les objets de mise en page avant la page suivante
+    
+    def _iter_with_fast_grouping(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None) -> Iterator[ExtractedPage]:
+        """Extraction pdfplumber avec regroupement mots/lignes vectorisé (une passe par page)"""
+        with pdfplumber.open(io.BytesIO(pdf_bytes), pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                page_text, elements = self._group_chars(page.chars, page.page_number)
+                
+                yield ExtractedPage(
+                    page_number=page.page_number,
+                    text=page_text,
+                    elements=elements,
+                    width=page.width,
+                    height=page.height,
+                    extraction_method="pdfplumber_fast"
+                )
+                page.close()  # Libère les objets de mise en page avant la page suivante
+    
+    def _group_chars(self, chars: List[Dict[str, Any]], page_num: int) -> Tuple[str, ElementTable]:
+        """
+        Regroupe les caractères en mots puis en lignes sur des tableaux de coordonnées
+        Le texte de page et les éléments positionnés sortent de la même passe
+        """
+        texts = [char.get('text', '') for char in chars]
+        keep = np.fromiter((bool(text.strip()) for text in texts), dtype=bool, count=len(texts))
+        if not keep.any():
+            return "", ElementTable(page_num)
         
-        return pages
+        kept = np.flatnonzero(keep)
+        kept_chars = [chars[i] for i in kept]
+        kept_texts = [texts[i] for i in kept]
+        
+        x0 = np.fromiter((c['x0'] for c in kept_chars), dtype=np.float64, count=len(kept))
+        x1 = np.fromiter((c['x1'] for c in kept_chars), dtype=np.float64, count=len(kept))
+        top = np.fromiter((c['top'] for c in kept_chars), dtype=np.float64, count=len(kept))
+        bottom = np.fromiter((c['bottom'] for c in kept_chars), dtype=np.float64, count=len(kept))
+        
+        # Début de mot : espace dans le flux, saut de ligne, écart horizontal ou retour en arrière
+        new_line = np.empty(len(kept), dtype=bool)
+        new_line[0] = True
+        new_line[1:] = np.abs(np.diff(top)) > self.Y_TOLERANCE
+        
+        word_start = new_line.copy()
+        word_start[1:] |= np.diff(kept) > 1  # un caractère blanc a été sauté
+        word_start[1:] |= (x0[1:] - x1[:-1]) > self.X_TOLERANCE
+        word_start[1:] |= x0[1:] < x0[:-1]
+        
+        starts = np.flatnonzero(word_start)
+        ends = np.append(starts[1:], len(kept))
+        
+        word_x0 = np.minimum.reduceat(x0, starts)
+        word_top = np.minimum.reduceat(top, starts)
+        word_x1 = np.maximum.reduceat(x1, starts)
+        word_bottom = np.maximum.reduceat(bottom, starts)
+        
+        # Texte des mots : un seul buffer découpé par offsets (un glyphe peut valoir plusieurs lettres)
+        buffer = "".join(kept_texts)
+        offsets = np.zeros(len(kept) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(t) for t in kept_texts), dtype=np.int64, count=len(kept)), out=offsets[1:])
+        
+        word_texts = [buffer[offsets[start]:offsets[end]] for start, end in zip(starts.tolist(), ends.tolist())]
+        first_chars = [kept_chars[start] for start in starts.tolist()]
+        
+        elements = ElementTable.from_columns(
+            page_num,
+            word_texts,
+            word_x0,
+            word_top,
+            word_x1 - word_x0,
+            word_bottom - word_top,
+            (char.get('size') for char in first_chars),
+            (char.get('fontname') for char in first_chars)
+        )
+        
+        lines = []
+        for word_text, line_start in zip(word_texts, new_line[starts].tolist()):
+            if line_start or not lines:
+                lines.append([word_text])
+            else:
+                lines[-1].append(word_text)
+        
+        page_text = "\n".join(" ".join(words) for words in lines)
+        return page_text, elements
     
-    def _extract_with_pypdf2(self, pdf_bytes: bytes) -> List[ExtractedPage]:
+    def _extract_with_pypdf2(self, pdf_bytes: bytes, page_numbers: Optional[List[int]] = None) -> List[ExtractedPage]:
         """Extraction avec PyPDF2 (fallback, positions approximatives)"""
         pages = []
         
         pdf_file = io.BytesIO(pdf_bytes)
         reader = PdfReader(pdf_file)
+        wanted = set(page_numbers) if page_numbers is not None else None
         
         for page_num, page in enumerate(reader.pages, 1):
+            if wanted is not None and page_num not in wanted:
+                continue
             page_text = page.extract_text()
             
             # PyPDF2 ne donne pas les positions exactes
@@ -205,18 +525,18 @@ class PDFExtractor:
         
         return pages
     
-    def find_text_position(self, pages: List[ExtractedPage], search_text: str) -> Optional[TextElement]:
+    def find_text_position(self, pages: List[ExtractedPage], search_text: str) -> Optional[TextElementView]:
         """Trouve la position d'un texte spécifique"""
         search_text = search_text.lower().strip()
         
         for page in pages:
-            for element in page.elements:
-                if search_text in element.text.lower():
-                    return element
+            index = page.elements.find(search_text)
+            if index is not None:
+                return page.elements[index]
         
         return None
     
-    def get_page_sections(self, page: ExtractedPage) -> Dict[str, List[TextElement]]:
+    def get_page_sections(self, page: ExtractedPage) -> Dict[str, List[TextElementView]]:
         """Divise une page en sections logiques basées sur la position"""
         sections = {
             "header": [],
@@ -228,16 +548,27 @@ class PDFExtractor:
         header_threshold = page.height * 0.85  # 15% du haut
         footer_threshold = page.height * 0.15  # 15% du bas
         
-        for element in page.elements:
-            if element.y >= header_threshold:
-                sections["header"].append(element)
-            elif element.y <= footer_threshold:
-                sections["footer"].append(element)
+        # Classement sur la colonne y, sans matérialiser d'élément intermédiaire
+        for index, y in enumerate(page.elements.y):
+            if y >= header_threshold:
+                sections["header"].append(page.elements[index])
+            elif y <= footer_threshold:
+                sections["footer"].append(page.elements[index])
             else:
-                sections["body"].append(element)
+                sections["body"].append(page.elements[index])
         
         return sections
     
     def get_extraction_stats(self) -> Dict[str, Any]:
         """Retourne les statistiques d'extraction"""
         return self.extraction_stats.copy()
+
+class PositionLoader:
+    """Seconde passe différée d'un document : éléments positionnés des pages demandées (sérialisable)"""
+    
+    def __init__(self, pdf_bytes: bytes, engine: Optional[str] = None):
+        self.pdf_bytes = pdf_bytes
+        self.engine = engine
+    
+    def __call__(self, page_numbers: List[int]) -> Dict[int, ElementTable]:
+        return PDFExtractor(self.engine).extract_positions(self.pdf_bytes, page_numbers)
@@ -0,0 +1,170 @@
+"""
+Triage rapide d'un PDF avant extraction : ressources des pages, sans analyse de mise en page
+Polices, images et chiffrement décident page par page entre couche texte et OCR direct
+"""
+
+import io
+import re
+import time
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+from PyPDF2 import PdfReader
+
+# Opérateurs utiles du flux de contenu : matrices (cm), sauvegarde/restauration (q/Q), dessin d'XObject (Do)
+NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)'
+CONTENT_OPERATOR_PATTERN = re.compile(
+    rf'(?P<cm>(?:{NUMBER}\s+){{6}})cm\b|/(?P<name>[^\s/\[\]()<>{{}}%]+)\s*Do\b|(?<![\w/])(?P<op>[qQ])(?![\w])'
+)
+
+SCAN_COVERAGE = 0.5  # Part de la page couverte par des images au-delà de laquelle la page est un scan
+MAX_FORM_DEPTH = 3  # Profondeur d'exploration des Form XObjects imbriqués
+
+@dataclass
+class PageTriage:
+    """Diagnostic d'une page : ressources présentes et moteur retenu"""
+    page_number: int
+    has_fonts: bool
+    image_count: int
+    image_coverage: Optional[float]  # None si le flux de contenu n'a pas été lu
+    width: float
+    height: float
+    route: str  # "text" ou "ocr"
+    reason: Optional[str] = None  # "scanned" ou "no_fonts" pour une page routée vers l'OCR
+
+@dataclass
+class DocumentTriage:
+    """Diagnostic du document complet"""
+    page_count: int
+    encrypted: bool
+    pages: List[PageTriage] = field(default_factory=list)
+    triage_time_ms: int = 0
+    error: Optional[str] = None  # Document illisible par le triage : extraction habituelle
+    
+    @property
+    def text_pages(self) -> List[int]:
+        return [page.page_number for page in self.pages if page.route == "text"]
+    
+    @property
+    def ocr_pages(self) -> List[int]:
+        return [page.page_number for page in self.pages if page.route == "ocr"]
+    
+    @property
+    def ocr_only(self) -> bool:
+        """Aucune page avec couche texte : pdfplumber n'apporterait rien"""
+        return bool(self.pages) and not self.text_pages
+    
+    def to_stats(self) -> Dict[str, Any]:
+        """Résumé pour les métriques d'extraction"""
+        return {
+            "page_count": self.page_count,
+            "encrypted": self.encrypted,
+            "text_pages": len(self.text_pages),
+            "ocr_pages": self.ocr_pages,
+            "image_pages": sum(1 for page in self.pages if page.image_count),
+            "reasons": {page.page_number: page.reason for page in self.pages if page.reason},
+            "triage_time_ms": self.triage_time_ms,
+            "error": self.error
+        }
+
+def triage_pdf(pdf_bytes: bytes, max_pages: Optional[int] = None) -> DocumentTriage:
+    """Inspecte polices, images et chiffrement de chaque page (PyPDF2, sans layout), au plus max_pages pages"""
+    start_time = time.time()
+    
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        encrypted = reader.is_encrypted
+        if encrypted and not reader.decrypt(""):
+            # Mot de passe requis : pas de diagnostic, l'extraction habituelle signalera l'erreur
+            return DocumentTriage(page_count=0, encrypted=True, error="encrypted",
+                                  triage_time_ms=int((time.time() - start_time) * 1000))
+        
+        triage = DocumentTriage(page_count=len(reader.pages), encrypted=encrypted)
+        for page_num, page in enumerate(islice(reader.pages, max_pages), 1):
+            triage.pages.append(_triage_page(page, page_num))
+    
+    except Exception as e:
+        triage = DocumentTriage(page_count=0, encrypted=False, pages=[], error=str(e))
+    
+    triage.triage_time_ms = int((time.time() - start_time) * 1000)
+    return triage
+
+def _triage_page(page, page_num: int) -> PageTriage:
+    """Polices et images d'une page ; couverture des images lue seulement sans police"""
+    mediabox = page.mediabox
+    width = float(mediabox.width) or 595.0
+    height = float(mediabox.height) or 842.0
+    
+    has_fonts, images = _scan_resources(page.get("/Resources"), MAX_FORM_DEPTH)
+    
+    if has_fonts:
+        return PageTriage(page_num, True, len(images), None, width, height, route="text")
+    
+    coverage = _image_coverage(page, images, width * height) if images else 0.0
+    reason = "scanned" if coverage >= SCAN_COVERAGE else "no_fonts"
+    return PageTriage(page_num, False, len(images), coverage, width, height, route="ocr", reason=reason)
+
+def _scan_resources(resources, depth: int) -> Tuple[bool, Dict[str, Any]]:
+    """Présence de polices et images nommées dans un dictionnaire de ressources (Form XObjects compris)"""
+    resources = _resolve(resources)
+    if not resources:
+        return False, {}
+    
+    has_fonts = bool(_resolve(resources.get("/Font")))
+    images = {}
+    
+    xobjects = _resolve(resources.get("/XObject")) or {}
+    for name, reference in xobjects.items():
+        xobject = _resolve(reference)
+        subtype = xobject.get("/Subtype") if xobject is not None else None
+        if subtype == "/Image":
+            images[name.lstrip("/")] = xobject
+        elif subtype == "/Form" and depth > 0 and not has_fonts:
+            # Texte ou scan encapsulé dans un formulaire (gabarits, tampons)
+            form_fonts, form_images = _scan_resources(xobject.get("/Resources"), depth - 1)
+            has_fonts = has_fonts or form_fonts
+            if form_images:
+                images[name.lstrip("/")] = xobject
+    
+    return has_fonts, images
+
+def _image_coverage(page, images: Dict[str, Any], page_area: float) -> float:
+    """Part de la page couverte par les images dessinées (matrices cm appliquées avant Do)"""
+    try:
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+    except Exception:
+        return 1.0  # Flux illisible avec des images : traité comme un scan
+    
+    text = data.decode("latin-1")
+    matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    stack = []
+    covered = 0.0
+    
+    for match in CONTENT_OPERATOR_PATTERN.finditer(text):
+        if match.group("cm"):
+            matrix = _multiply(tuple(float(value) for value in match.group("cm").split()), matrix)
+        elif match.group("name"):
+            if match.group("name") in images:
+                a, b, c, d = matrix[:4]
+                covered += abs(a * d - b * c)  # Aire du carré unité transformé
+        elif match.group("op") == "q":
+            stack.append(matrix)
+        elif stack:
+            matrix = stack.pop()
+    
+    return round(min(covered / max(page_area, 1.0), 1.0), 3)
+
+def _multiply(m1: Tuple[float, ...], m2: Tuple[float, ...]) -> Tuple[float, ...]:
+    """Produit de matrices PDF [a b c d e f] (m1 appliquée avant m2)"""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (
+        a1 * a2 + b1 * c2, a1 * b2 + b1 * d2,
+        c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+        e1 * a2 + f1 * c2 + e2, e1 * b2 + f1 * d2 + f2
+    )
+
+def _resolve(value):
+    """Déréférence un objet indirect PyPDF2"""
+    return value.get_object() if hasattr(value, "get_object") else value
@@ -5,9 +5,24 @@ Nettoyage, segmentation et préparation pour l'IA
 
 import re
 import time
-from typing import List, Dict, Any, Tuple, Optional
-from dataclasses import dataclass
+from array import array
+from typing import List, Dict, Any, Tuple, Optional, Callable
+from dataclasses import dataclass, field
 from .pdf_extractor import ExtractedPage, TextElement
+from .element_table import ElementTable
+from .fact_scanner import FactScanner, ScanResult, ScannedFact, FACT_PATTERNS
+from .offset_map import TextOffsetMap, TextLocation, tracked_sub
+from .boilerplate import BoilerplateFilter, strip_boilerplate
+
+# Règles de nettoyage appliquées dans l'ordre (pattern, remplacement)
+CLEANING_RULES = [
+    (re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]'), ''),  # Caractères de contrôle
+    (re.compile(r'\s+'), ' '),  # Normaliser les espaces
+    (re.compile(r'\n\s*\n\s*\n'), '\n\n'),  # Lignes vides multiples
+    (re.compile(r'(\w)-\s*\n\s*(\w)'), r'\1\2'),  # Coupures de mots
+    (re.compile(r'\s+([,.;:!?])'), r'\1'),  # Espaces avant ponctuation
+    (re.compile(r'([,.;:!?])\s*([,.;:!?])'), r'\1\2')  # Ponctuation doublée
+]
 
 @dataclass
 class ProcessedDocument:
@@ -18,12 +33,63 @@ class ProcessedDocument:
     facts: Dict[str, List[str]]
     pages: List[ExtractedPage]
     processing_stats: Dict[str, Any]
+    fact_spans: List[ScannedFact] = field(default_factory=list)
+    section_anchors: Dict[str, List[Tuple[int, int]]] = field(default_factory=dict)
+    offset_map: Optional[TextOffsetMap] = None
+    prompt_text: str = ""  # Texte envoyé à l'IA : sans marqueurs de page ni en-têtes/pieds répétés
+    # Chargement différé des éléments positionnés (pages extraites en texte seul), hors cache
+    position_loader: Optional[Callable[[List[int]], Dict[int, ElementTable]]] = field(default=None, repr=False, compare=False)
+    
+    def locate_span(self, start: int, end: int) -> Optional[TextLocation]:
+        """Page, élément et coordonnées d'une plage de cleaned_text (positions de la page chargées au besoin)"""
+        if self.offset_map is None:
+            return None
+        location = self.offset_map.locate_span(start, end)
+        if location is not None and location.element_index is None and self.ensure_positions([location.page_number]):
+            location = self.offset_map.locate_span(start, end)
+        return location
+    
+    @property
+    def pages_with_positions(self) -> int:
+        """Pages dont les coordonnées sont chargées, ou chargeables à la demande (passe texte seul)"""
+        can_load = self.position_loader is not None or self.offset_map is not None
+        return sum(1 for page in self.pages if page.elements or (can_load and not page.positions_loaded))
+    
+    @property
+    def pending_position_pages(self) -> List[int]:
+        """Pages dont les coordonnées n'ont pas encore été chargées"""
+        return [page.page_number for page in self.pages if not page.positions_loaded]
+    
+    def ensure_positions(self, page_numbers: Optional[List[int]] = None) -> List[int]:
+        """Charge les éléments positionnés des pages demandées (toutes si None) ; retourne les pages chargées"""
+        wanted = set(page_numbers) if page_numbers is not None else None
+        pending = [
+            page for page in self.pages
+            if not page.positions_loaded and (wanted is None or page.page_number in wanted)
+        ]
+        if not pending or self.position_loader is None:
+            return []
+        
+        tables = self.position_loader([page.page_number for page in pending])
+        for page in pending:
+            page.elements = tables.get(page.page_number, page.elements)
+            page.positions_loaded = True
+        
+        # Index éléments ↔ texte recalculé à la prochaine localisation
+        if self.offset_map is not None:
+            self.offset_map.attach_pages(self.pages)
+        return [page.page_number for page in pending]
     
     @property
     def full_text(self) -> str:
         """Texte complet du document"""
         return self.cleaned_text or self.raw_text
     
+    @property
+    def ai_text(self) -> str:
+        """Texte destiné à l'IA (texte complet si le filtrage n'a rien produit)"""
+        return self.prompt_text or self.full_text
+    
     @property
     def extraction_method(self) -> str:
         """Méthode d'extraction utilisée"""
@@ -44,47 +110,46 @@ class TextProcessor:
             "facts_extracted_total": 0
         }
         
-        # Patterns regex pour extraction de faits
-        self.fact_patterns = {
-            "dates": [
-                r'\b\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}\b',  # DD/MM/YYYY
-                r'\b\d{1,2}\s+(janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+\d{4}\b',
-                r'\b(janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+\d{1,2},?\s+\d{4}\b'
-            ],
-            "amounts": [
-                r'\b\d{1,3}(?:\s?\d{3})*(?:[,\.]\d{2})?\s*(?:€|EUR|euros?)\b',
-                r'\b(?:€|EUR)\s*\d{1,3}(?:\s?\d{3})*(?:[,\.]\d{2})?\b',
-                r'\b\d{1,3}(?:\s?\d{3})*(?:[,\.]\d{2})?\s*(?:dollars?|\$)\b'
-            ],
-            "percentages": [
-                r'\b\d{1,3}(?:[,\.]\d{1,2})?\s*%\b'
-            ],
-            "durations": [
-                r'\b\d+\s*(?:an|année|années|mois|semaine|semaines|jour|jours)s?\b',
-                r'\b(?:un|une|deux|trois|quatre|cinq|six|sept|huit|neuf|dix)\s+(?:an|année|années|mois)\b'
-            ],
-            "parties": [
-                r'\b(?:Monsieur|Madame|M\.|Mme)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b',
-                r'\b[A-Z][A-Z\s&]{2,50}(?:S\.A\.S|SARL|SAS|SA|EURL|SCI)\b',
-                r'\b(?:société|entreprise|compagnie)\s+[A-Z][a-zA-Z\s&]{2,50}\b'
-            ]
-        }
+        # Scanner compilé une fois : faits + ancrages de sections en une passe
+        self.fact_scanner = FactScanner()
+        self.fact_patterns = FACT_PATTERNS
+        self.boilerplate_filter = BoilerplateFilter()
     
     def process_document(self, pages: List[ExtractedPage]) -> ProcessedDocument:
         """Traite un document complet"""
         start_time = time.time()
         
-        # Combiner tout le texte
-        raw_text = "\n\n".join(f"=== PAGE {p.page_number} ===\n{p.text}" for p in pages)
+        # Combiner tout le texte en notant le début de chaque page
+        raw_parts = []
+        page_starts = []
+        position = 0
+        for p in pages:
+            header = f"=== PAGE {p.page_number} ===\n"
+            if raw_parts:
+                position += 2  # Séparateur "\n\n"
+            page_starts.append(position + len(header))
+            raw_parts.append(header + p.text)
+            position += len(header) + len(p.text)
+        raw_text = "\n\n".join(raw_parts)
+        
+        # Nettoyer le texte en conservant les offsets d'origine
+        cleaned_text, origins = self._clean_text_with_offsets(raw_text)
+        offset_map = TextOffsetMap(
+            origins, page_starts, [p.page_number for p in pages], [len(p.text) for p in pages]
+        )
+        offset_map.attach_pages(pages)
         
-        # Nettoyer le texte
-        cleaned_text = self._clean_text(raw_text)
+        # Une seule passe pour les faits et les sections
+        scan = self.fact_scanner.scan(cleaned_text)
         
         # Segmenter en sections
-        sections = self._extract_sections(cleaned_text, pages)
+        sections = self._extract_sections(cleaned_text, pages, scan)
         
         # Extraire les faits
-        facts = self._extract_facts(cleaned_text)
+        facts = self._extract_facts(cleaned_text, scan)
+        
+        # Texte pour l'IA : en-têtes, pieds de page et marqueurs retirés (cleaned_text reste intact pour les citations)
+        boilerplate = strip_boilerplate(pages, cleaned_text, clean=self._clean_text, boilerplate_filter=self.boilerplate_filter)
         
         processing_time = int((time.time() - start_time) * 1000)
         
@@ -102,7 +167,8 @@ class TextProcessor:
             "text_length": len(cleaned_text),
             "sections_found": len(sections),
             "facts_extracted": total_facts,
-            "pages_processed": len(pages)
+            "pages_processed": len(pages),
+            "boilerplate": boilerplate.to_stats()
         }
         
         return ProcessedDocument(
@@ -111,79 +177,56 @@ class TextProcessor:
             sections=sections,
             facts=facts,
             pages=pages,
-            processing_stats=stats
+            processing_stats=stats,
+            fact_spans=scan.facts,
+            section_anchors=scan.section_anchors,
+            offset_map=offset_map,
+            prompt_text=boilerplate.text
         )
     
     def _clean_text(self, text: str) -> str:
         """Nettoie et normalise le texte"""
-        # Supprimer les caractères de contrôle
-        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
-        
-        # Normaliser les espaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Supprimer les lignes vides multiples
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
+        for pattern, replacement in CLEANING_RULES:
+            text = pattern.sub(replacement, text)
         
-        # Corriger les coupures de mots
-        text = re.sub(r'(\w)-\s*\n\s*(\w)', r'\1\2', text)
+        return text.strip()
+    
+    def _clean_text_with_offsets(self, text: str) -> Tuple[str, array]:
+        """Nettoie le texte et retourne, pour chaque caractère nettoyé, son offset dans le texte brut"""
+        origins = array('q', range(len(text)))
         
-        # Normaliser la ponctuation
-        text = re.sub(r'\s+([,.;:!?])', r'\1', text)
-        text = re.sub(r'([,.;:!?])\s*([,.;:!?])', r'\1\2', text)
+        for pattern, replacement in CLEANING_RULES:
+            text, origins = tracked_sub(pattern, replacement, text, origins)
         
-        return text.strip()
+        # strip() en gardant les offsets alignés
+        leading = len(text) - len(text.lstrip())
+        stripped = text.strip()
+        return stripped, origins[leading:leading + len(stripped)]
     
-    def _extract_sections(self, text: str, pages: List[ExtractedPage]) -> Dict[str, str]:
+    def _extract_sections(self, text: str, pages: List[ExtractedPage], scan: Optional[ScanResult] = None) -> Dict[str, str]:
         """Extrait les sections logiques du document"""
         sections = {}
         
-        # Patterns pour identifier les sections
-        section_patterns = {
-            "preambule": r'(?:préambule|considérant|attendu que)',
-            "objet": r'(?:objet|article 1|a pour objet)',
-            "duree": r'(?:durée|article.*durée|terme)',
-            "prix": r'(?:prix|tarif|montant|article.*prix|rémunération)',
-            "obligations": r'(?:obligations|engagements|article.*obligations)',
-            "resiliation": r'(?:résiliation|fin|terme|article.*résiliation)',
-            "responsabilite": r'(?:responsabilité|garantie|article.*responsabilité)',
-            "confidentialite": r'(?:confidentialité|secret|article.*confidentialité)',
-            "propriete": r'(?:propriété intellectuelle|droits d\'auteur|article.*propriété)',
-            "litiges": r'(?:litiges|différends|tribunal|juridiction)',
-            "signatures": r'(?:signatures?|fait à|lu et approuvé)'
-        }
-        
-        text_lower = text.lower()
+        if scan is None:
+            scan = self.fact_scanner.scan(text)
         
-        for section_name, pattern in section_patterns.items():
-            matches = list(re.finditer(pattern, text_lower, re.IGNORECASE))
-            if matches:
-                # Prendre le premier match et extraire le contexte
-                match = matches[0]
-                start_pos = max(0, match.start() - 50)
-                end_pos = min(len(text), match.end() + 500)
-                
-                section_text = text[start_pos:end_pos].strip()
-                sections[section_name] = section_text
+        # Premier ancrage de chaque section et contexte autour
+        for section_name, (match_start, match_end) in scan.first_section_anchors().items():
+            start_pos = max(0, match_start - 50)
+            end_pos = min(len(text), match_end + 500)
+            
+            section_text = text[start_pos:end_pos].strip()
+            sections[section_name] = section_text
         
         return sections
     
-    def _extract_facts(self, text: str) -> Dict[str, List[str]]:
+    def _extract_facts(self, text: str, scan: Optional[ScanResult] = None) -> Dict[str, List[str]]:
         """Extrait les faits structurés du texte"""
-        facts = {}
-        
-        for fact_type, patterns in self.fact_patterns.items():
-            found_facts = []
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                found_facts.extend(matches)
-            
-            # Déduplication et nettoyage
-            unique_facts = list(set(found_facts))
-            facts[fact_type] = [fact.strip() for fact in unique_facts if fact.strip()]
+        if scan is None:
+            scan = self.fact_scanner.scan(text)
         
-        return facts
+        # Déduplication et nettoyage (ordre d'apparition conservé)
+        return scan.facts_by_type()
     
     def find_text_citations(self, search_text: str, pages: List[ExtractedPage]) -> List[Dict[str, Any]]:
         """Trouve les citations d'un texte avec références de page"""
@@ -204,11 +247,8 @@ class TextProcessor:
                 context = page.text[context_start:context_end].strip()
                 
                 # Essayer de trouver l'élément correspondant pour la position XY
-                matching_element = None
-                for element in page.elements:
-                    if search_lower in element.text.lower():
-                        matching_element = element
-                        break
+                element_index = page.elements.find(search_lower)
+                matching_element = page.elements[element_index] if element_index is not None else None
                 
                 citation = {
                     "page_number": page.page_number,
@@ -228,6 +268,31 @@ class TextProcessor:
         
         return citations
     
+    def cite_span(self, doc: ProcessedDocument, start: int, end: int) -> Optional[Dict[str, Any]]:
+        """Citation d'une plage de cleaned_text via l'index d'offsets (sans parcourir les pages)"""
+        location = doc.locate_span(start, end)
+        if location is None:
+            return None
+        
+        context_start = max(0, start - 100)
+        context_end = min(len(doc.cleaned_text), end + 100)
+        
+        citation = {
+            "page_number": location.page_number,
+            "text_found": doc.cleaned_text[start:end],
+            "context": doc.cleaned_text[context_start:context_end].strip(),
+            "position": {
+                "x": location.x,
+                "y": location.y
+            },
+            "reference": f"p.{location.page_number}"
+        }
+        
+        if location.x is not None:
+            citation["reference"] += f" (x:{int(location.x)}, y:{int(location.y)})"
+        
+        return citation
+    
     def estimate_reading_time(self, text: str) -> Dict[str, int]:
         """Estime le temps de lecture"""
         word_count = len(text.split())
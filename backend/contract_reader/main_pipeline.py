@@ -12,6 +12,8 @@ import logging
 from .cache.redis_client import RedisClient
 from .cache.budget_control import BudgetControl
 from .cache.metrics import MetricsCollector
+from .cache.near_duplicate import NearDuplicateIndex, NearDuplicateMatch
+from .cache.single_flight import SingleFlight, LeaderFailed, LEADER
 from .extraction.extraction_pipeline import ExtractionPipeline
 from .ai.ai_summarizer import AISummarizer
 from .validation.cross_validator import CrossValidator
@@ -34,8 +36,18 @@ class ContractReaderPipeline:
         self.budget_control = BudgetControl(self.redis_client)
         self.metrics = MetricsCollector(self.redis_client)
         
+        from .config import contract_reader_config
+        self.near_duplicate_index = NearDuplicateIndex(
+            self.redis_client, threshold=contract_reader_config.near_duplicate_threshold
+        )
+        self.single_flight = SingleFlight(
+            self.redis_client,
+            lease_seconds=contract_reader_config.single_flight_lease_seconds,
+            wait_seconds=contract_reader_config.single_flight_wait_seconds
+        )
+        
         # Pipelines de traitement
-        self.extraction_pipeline = ExtractionPipeline()
+        self.extraction_pipeline = ExtractionPipeline(redis_client=self.redis_client)
         self.ai_summarizer = AISummarizer()
         self.cross_validator = CrossValidator()
         
@@ -56,6 +68,41 @@ class ContractReaderPipeline:
                                       summary_mode: str = "standard",
                                       include_watermark: bool = False) -> Dict[str, Any]:
         """
+        Traitement complet d'un contrat, coalescé avec les traitements identiques en cours
+        
+        Un même document (hash + mode) n'est calculé qu'une fois à la fois, dans le process et entre workers :
+        les demandes simultanées attendent le meneur puis relisent son résultat en cache
+        Meneur en échec : une seule des demandes en attente reprend le traitement (l'erreur reste propre au meneur)
+        """
+        from .config import contract_reader_config
+        
+        if not contract_reader_config.single_flight_enabled:
+            return await self._process_contract_complete(
+                pdf_content, filename, user_id, user_ip, summary_mode, include_watermark
+            )
+        
+        flight_key = f"{hashlib.sha256(pdf_content).hexdigest()}:{summary_mode}"
+        try:
+            async with self.single_flight.flight(flight_key) as role:
+                if role != LEADER:
+                    logger.info(f"Traitement coalescé ({role}) pour {filename}")
+                result = await self._process_contract_complete(
+                    pdf_content, filename, user_id, user_ip, summary_mode, include_watermark
+                )
+                if not result.get('success'):
+                    raise LeaderFailed(result)
+                return result
+        except LeaderFailed as failed:
+            return failed.result
+    
+    async def _process_contract_complete(self,
+                                       pdf_content: bytes,
+                                       filename: str,
+                                       user_id: str,
+                                       user_ip: str = None,
+                                       summary_mode: str = "standard",
+                                       include_watermark: bool = False) -> Dict[str, Any]:
+        """
         Traitement complet d'un contrat avec toutes les phases
         
         Args:
@@ -159,7 +206,8 @@ class ContractReaderPipeline:
             
             extraction_result = await self.extraction_pipeline.extract_contract_data(
                 pdf_bytes=pdf_content,
-                filename=filename
+                filename=filename,
+                document_hash=document_hash
             )
             
             if extraction_result.get('error'):
@@ -176,6 +224,18 @@ class ContractReaderPipeline:
             
             extraction_time = (datetime.now() - extraction_start).total_seconds()
             
+            # 🧬 Phase 3.5: Quasi-doublon d'un contrat déjà résumé (mêmes faits clés) → résumé réutilisé
+            near_duplicate = None
+            if contract_reader_config.near_duplicate_enabled:
+                near_duplicate = await self.near_duplicate_index.find(extraction_result.get('extracted_text', ''))
+            
+            if near_duplicate is not None and near_duplicate.facts_match:
+                reused_result = await self._reuse_near_duplicate(
+                    near_duplicate, extraction_result, document_hash, processing_id, extraction_time
+                )
+                if reused_result is not None:
+                    return reused_result
+            
             # 🤖 Phase 4: Résumé IA ciblé
             ai_start = datetime.now()
             
@@ -275,6 +335,14 @@ class ContractReaderPipeline:
                 }
             }
             
+            if near_duplicate is not None:
+                # Proche d'un contrat connu mais faits différents (autre version du modèle) : résumé complet
+                complete_result['near_duplicate_of'] = {
+                    'document_hash': near_duplicate.document_hash,
+                    'similarity': near_duplicate.similarity,
+                    'reused': False
+                }
+            
             # 💾 Mise en cache
             try:
                 await self.redis_client.cache_summary(
@@ -282,6 +350,8 @@ class ContractReaderPipeline:
                     summary_data=complete_result,
                     ttl=86400  # 24h
                 )
+                if contract_reader_config.near_duplicate_enabled:
+                    await self.near_duplicate_index.add(document_hash, extraction_result.get('extracted_text', ''))
             except Exception as cache_error:
                 logger.warning(f"Erreur mise en cache: {cache_error}")
             
@@ -366,6 +436,63 @@ class ContractReaderPipeline:
                 'processing_id': processing_id
             }
 
+    async def _reuse_near_duplicate(self,
+                                    match: NearDuplicateMatch,
+                                    extraction_result: Dict[str, Any],
+                                    document_hash: str,
+                                    processing_id: str,
+                                    extraction_time: float) -> Optional[Dict[str, Any]]:
+        """
+        Réutilise le résumé d'un quasi-doublon sans appel IA
+        Citations et score recalculés localement sur le texte du nouveau document
+        """
+        cached_entry = await self.redis_client.get_cached_summary(match.document_hash)
+        if not cached_entry or not cached_entry.get('summary'):
+            return None  # Résumé expiré depuis l'indexation
+
+        complete_result = dict(cached_entry['summary'])
+
+        validation_result = await self.cross_validator.validate_summary_with_citations(
+            summary=complete_result['summary'],
+            original_data=extraction_result,
+            target_accuracy=0.95,
+            max_citation_error_rate=0.01
+        )
+        complete_result.update({
+            'citations': validation_result.get('citations', {}),
+            'validation_notes': validation_result.get('validation_notes', []),
+            'confidence_score': validation_result.get('accuracy_score', complete_result.get('confidence_score', 0.0)),
+            'near_duplicate_of': {
+                'document_hash': match.document_hash,
+                'similarity': match.similarity,
+                'reused': True
+            },
+            'processing_metrics': {
+                'extraction_time': extraction_time,
+                'ai_time': 0.0,
+                'validation_time': 0.0,
+                'total_cost_euros': 0.0,
+                'document_hash': document_hash
+            }
+        })
+
+        try:
+            await self.redis_client.cache_summary(document_hash=document_hash, summary_data=complete_result, ttl=86400)
+            await self.near_duplicate_index.add(document_hash, extraction_result.get('extracted_text', ''))
+        except Exception as cache_error:
+            logger.warning(f"Erreur mise en cache quasi-doublon: {cache_error}")
+
+        await self.metrics.record_cache_hit(document_hash)
+        logger.info(f"Quasi-doublon de {match.document_hash[:12]}... (similarité {match.similarity}) : résumé réutilisé")
+
+        return {
+            'success': True,
+            'from_cache': True,
+            'near_duplicate_of': match.document_hash,
+            'processing_id': processing_id,
+            'result': complete_result
+        }
+
     async def _generate_and_store_pdf(self,
                                     summary: Dict[str, Any],
                                     citations: Dict[str, str],
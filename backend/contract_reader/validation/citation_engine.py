@@ -7,6 +7,7 @@ import re
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from ..extraction.pdf_extractor import ExtractedPage, TextElement
+from ..extraction.text_processor import ProcessedDocument
 from ..models import ContractSummary
 
 @dataclass
@@ -40,9 +41,11 @@ class CitationEngine:
             "position_accuracy": 0.0
         }
     
-    def generate_citations(self, summary: ContractSummary, pages: List[ExtractedPage]) -> CitationResult:
+    def generate_citations(self, summary: ContractSummary, pages: List[ExtractedPage],
+                           doc: Optional[ProcessedDocument] = None) -> CitationResult:
         """
         Génère des citations précises pour tous les faits du résumé
+        Avec doc (index d'offsets), les faits sont cités par recherche dichotomique
         """
         all_citations = []
         facts_to_check = []
@@ -51,9 +54,18 @@ class CitationEngine:
         # Collecter tous les faits à vérifier
         facts_to_check.extend(self._extract_facts_from_summary(summary))
         
+        # Faits déjà repérés dans le texte nettoyé : texte -> premier offset
+        span_index = self._build_span_index(doc) if doc is not None and doc.offset_map is not None else None
+        
         # Générer citations pour chaque fait
         for fact in facts_to_check:
-            citation = self._find_citation_for_fact(fact, pages)
+            citation = None
+            if span_index is not None:
+                citation = self._offset_match_search(fact, doc, span_index)
+            if citation is None:
+                if doc is not None and doc.pending_position_pages:
+                    self._load_candidate_positions(fact, doc)
+                citation = self._find_citation_for_fact(fact, pages)
             if citation:
                 all_citations.append(citation)
             else:
@@ -128,23 +140,80 @@ class CitationEngine:
         
         return None
     
+    def _build_span_index(self, doc: ProcessedDocument) -> Dict[str, Tuple[int, int]]:
+        """Index texte de fait (minuscule) -> première plage dans cleaned_text"""
+        span_index = {}
+        for fact in doc.fact_spans:
+            span_index.setdefault(fact.text.strip().lower(), (fact.start, fact.end))
+        return span_index
+    
+    def _offset_match_search(self, fact: str, doc: ProcessedDocument, span_index: Dict[str, Tuple[int, int]]) -> Optional[Citation]:
+        """Recherche par offset dans le texte nettoyé puis résolution page/élément via l'index d'offsets"""
+        fact_clean = fact.strip()
+        if not fact_clean:
+            return None
+        
+        span = span_index.get(fact_clean.lower())
+        if span is None:
+            match = re.search(re.escape(fact_clean), doc.cleaned_text, re.IGNORECASE)
+            if not match:
+                return None
+            span = (match.start(), match.end())
+        
+        location = doc.locate_span(*span)
+        if location is None:
+            return None
+        
+        section_num = None
+        page = next((p for p in doc.pages if p.page_number == location.page_number), None)
+        if page is not None and location.element_index is not None:
+            section_num = self._detect_section_number(page.elements[location.element_index], page)
+        
+        context_start = max(0, span[0] - 100)
+        context = doc.cleaned_text[context_start:span[1] + 100].strip()[:200]
+        
+        return Citation(
+            text=fact,
+            page_number=location.page_number,
+            section_number=section_num,
+            x_position=location.x,
+            y_position=location.y,
+            confidence=1.0 if location.element_index is not None else 0.9,
+            context=context
+        )
+    
+    def _load_candidate_positions(self, fact: str, doc: ProcessedDocument):
+        """
+        Coordonnées des seules pages susceptibles de contenir le fait (extraction en texte seul)
+        Toutes les stratégies de repli exigent le fait, sa forme normalisée ou un de ses nombres dans le texte
+        """
+        terms = {fact.lower().strip(), self._normalize_fact_for_search(fact)} | set(re.findall(r'\d+', fact))
+        terms.discard("")
+        candidates = [
+            page.page_number for page in doc.pages
+            if not page.positions_loaded and any(term in page.text.lower() for term in terms)
+        ]
+        if candidates:
+            doc.ensure_positions(candidates)
+    
     def _exact_match_search(self, fact: str, fact_lower: str, pages: List[ExtractedPage]) -> Optional[Citation]:
         """Recherche exacte dans les éléments avec position"""
         for page in pages:
-            for element in page.elements:
-                if fact_lower in element.text.lower():
-                    section_num = self._detect_section_number(element, page)
-                    context = self._get_context_around_element(element, page)
-                    
-                    return Citation(
-                        text=fact,
-                        page_number=page.page_number,
-                        section_number=section_num,
-                        x_position=element.x,
-                        y_position=element.y,
-                        confidence=1.0,
-                        context=context
-                    )
+            element_index = page.elements.find(fact_lower)
+            if element_index is not None:
+                element = page.elements[element_index]
+                section_num = self._detect_section_number(element, page)
+                context = self._get_context_around_element(element, page)
+                
+                return Citation(
+                    text=fact,
+                    page_number=page.page_number,
+                    section_number=section_num,
+                    x_position=element.x,
+                    y_position=element.y,
+                    confidence=1.0,
+                    context=context
+                )
         
         return None
     
@@ -299,7 +368,7 @@ class CitationEngine:
     def _detect_section_number(self, element: TextElement, page: ExtractedPage) -> Optional[int]:
         """Détecte le numéro de section basé sur la position"""
         # Rechercher des patterns de section dans le contexte
-        context_elements = [e for e in page.elements if abs(e.y - element.y) < 50]  # Même zone
+        context_elements = [page.elements[i] for i in page.elements.indices_in_band(element.y - 50, element.y + 50)]  # Même zone
         
         for ctx_element in context_elements:
             section_match = re.search(r'(?:article|section|§)\s*(\d+)', ctx_element.text, re.IGNORECASE)
@@ -310,19 +379,19 @@ class CitationEngine:
     
     def _find_closest_element(self, text: str, page: ExtractedPage) -> Optional[TextElement]:
         """Trouve l'élément le plus proche contenant le texte"""
-        candidates = [e for e in page.elements if text in e.text.lower()]
+        index = page.elements.find(text)
         
-        if not candidates:
+        if index is None:
             return None
         
         # Retourner le premier (ou implémenter une logique de proximité plus sophistiquée)
-        return candidates[0]
+        return page.elements[index]
     
     def _get_context_around_element(self, element: TextElement, page: ExtractedPage, radius: int = 100) -> str:
         """Récupère le contexte autour d'un élément"""
         nearby_elements = [
-            e for e in page.elements 
-            if abs(e.x - element.x) < radius and abs(e.y - element.y) < 30
+            page.elements[i] for i in page.elements.indices_in_band(element.y - 30, element.y + 30)
+            if abs(page.elements.x[i] - element.x) < radius
         ]
         
         # Trier par position pour reconstituer le texte
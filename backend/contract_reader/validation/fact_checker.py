@@ -69,7 +69,7 @@ class FactChecker:
         fact_results.extend(redflags_results)
         
         # 5. Générer citations pour les faits vérifiés
-        citation_result = self.citation_engine.generate_citations(summary, doc.pages)
+        citation_result = self.citation_engine.generate_citations(summary, doc.pages, doc)
         
         # Analyser les résultats
         total_facts = len(fact_results)
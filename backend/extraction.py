@@ -10,10 +10,10 @@ from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 import redis.asyncio as redis
 from openai import AsyncOpenAI
-import tiktoken
 
 from models import ContractExtraction, ContractType
 from config import settings
+from contract_reader.ai.token_counter import get_token_counter
 
 
 class ExtractionService:
@@ -23,7 +23,7 @@ class ExtractionService:
         self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.redis_client = None
         self.cache_hits = {}
-        self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.token_counter = get_token_counter("gpt-4o-mini")  # Tokenizer partagé, chargé au premier comptage
         
     async def _get_redis(self):
         """Connexion Redis lazy"""
@@ -143,9 +143,7 @@ ou convertir le document en format texte."""
         """Extraction avec GPT-4o-mini"""
         
         # Limiter tokens d'entrée (max 8000 pour garder marge)
-        tokens = self.encoding.encode(text_content)
-        if len(tokens) > 8000:
-            text_content = self.encoding.decode(tokens[:8000])
+        text_content = self.token_counter.head(text_content, 8000)
         
         system_prompt = """Tu es un expert en analyse de contrats. Extrais les informations clés du document fourni.
 
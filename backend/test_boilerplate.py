@@ -0,0 +1,64 @@
+"""
+Tests du filtre d'en-têtes, pieds de page et numérotation
+"""
+
+import sys
+from pathlib import Path
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.extraction.boilerplate import BoilerplateFilter
+from contract_reader.extraction.pdf_extractor import ExtractedPage
+
+def text_page(page_number, lines):
+    """Page en texte seul (bandes = premières et dernières lignes)"""
+    return ExtractedPage(page_number, "\n".join(lines), [], 595.0, 842.0, "pdfium_text", positions_loaded=False)
+
+CLAUSES = ["Objet du contrat", "Durée et reconduction", "Prix et paiement", "Résiliation anticipée"]
+
+def body(page_number):
+    return [CLAUSES[page_number - 1], "Le prestataire exécute la mission avec diligence.", f"Voir l'annexe {'ABCD'[page_number - 1]}."]
+
+def test_repeated_header_kept_once_and_page_numbers_removed():
+    """En-tête répété gardé une fois, numérotation "Page n/3" retirée partout"""
+    pages = [
+        text_page(number, ["ACME SAS - Contrat de prestation"] + body(number) + [f"Page {number}/3"])
+        for number in (1, 2, 3)
+    ]
+    text, removed = BoilerplateFilter().strip(pages)
+    assert text.count("ACME SAS - Contrat de prestation") == 1
+    assert "Page 1/3" not in text and "Page 3/3" not in text
+    assert removed.count("ACME SAS - Contrat de prestation") == 2
+
+def test_isolated_number_in_edge_band_is_kept():
+    """Un montant seul sur sa ligne en bas de page n'est pas pris pour un numéro de page"""
+    pages = [
+        text_page(1, body(1) + ["Montant total HT :", "1500"]),
+        text_page(2, body(2) + ["Fait en deux exemplaires."]),
+        text_page(3, body(3) + ["Signatures"])
+    ]
+    text, removed = BoilerplateFilter().strip(pages)
+    assert "1500" in text.split("\n")
+    assert "1500" not in removed
+
+def test_non_incrementing_numbers_are_kept():
+    """Des nombres seuls qui ne suivent pas les pages restent dans le texte"""
+    pages = [text_page(number, body(number) + [value]) for number, value in ((1, "250"), (2, "250"), (3, "1200"))]
+    text, _ = BoilerplateFilter().strip(pages)
+    assert "1200" in text
+    # Un nombre seul répété n'est pas traité comme une mention répétée
+    assert text.count("250") == 2
+
+def test_bare_page_numbers_with_offset():
+    """Numérotation sans mention "Page", commençant après une page de garde"""
+    pages = [text_page(number, body(number) + [f"- {number + 1} -"]) for number in (1, 2, 3, 4)]
+    text, removed = BoilerplateFilter().strip(pages)
+    assert [line for line in removed if line.startswith("-")] == ["- 2 -", "- 3 -", "- 4 -", "- 5 -"]
+
+if __name__ == "__main__":
+    test_repeated_header_kept_once_and_page_numbers_removed()
+    test_isolated_number_in_edge_band_is_kept()
+    test_non_incrementing_numbers_are_kept()
+    test_bare_page_numbers_with_offset()
+    print("✅ Tests boilerplate OK")
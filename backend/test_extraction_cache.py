@@ -0,0 +1,51 @@
+"""
+Tests du cache d'extraction : au mieux, jamais bloquant quand Redis est injoignable
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.cache.redis_client import RedisClient
+from contract_reader.extraction.extraction_pipeline import ExtractionPipeline
+
+SAMPLE_PDF = Path(__file__).parent.parent / "data" / "samples" / "Modele-de-contrat-de-consultance.pdf"
+
+def pipeline(redis_client: RedisClient) -> ExtractionPipeline:
+    with patch("contract_reader.extraction.ocr_processor.check_tesseract"):
+        return ExtractionPipeline(use_process_pool=False, redis_client=redis_client)
+
+def test_unreachable_redis_falls_back_to_mock_cache():
+    """Serveur Redis injoignable : extraction réussie, cache en mémoire (mock) utilisé au second appel"""
+    extraction = pipeline(RedisClient("redis://127.0.0.1:1"))
+    pdf_bytes = SAMPLE_PDF.read_bytes()
+    
+    first = asyncio.run(extraction.extract_contract_data(pdf_bytes, SAMPLE_PDF.name))
+    assert first["success"], first.get("error")
+    assert len(first["extracted_text"]) > 1000
+    assert not first["metadata"]["metadata"]["extraction_cache_hit"]
+    
+    second = asyncio.run(extraction.extract_contract_data(pdf_bytes, SAMPLE_PDF.name))
+    assert second["success"]
+    assert second["metadata"]["metadata"]["extraction_cache_hit"]
+    assert second["extracted_text"] == first["extracted_text"]
+
+def test_connection_error_skips_the_cache():
+    """Connexion en erreur (même sans repli mock) : lecture manquée et écriture ignorée, extraction réussie"""
+    client = RedisClient("redis://127.0.0.1:1")
+    extraction = pipeline(client)
+    
+    with patch.object(client, "connect", side_effect=ConnectionError("Redis injoignable")):
+        result = asyncio.run(extraction.extract_contract_data(SAMPLE_PDF.read_bytes(), SAMPLE_PDF.name))
+    
+    assert result["success"], result.get("error")
+    assert not result["metadata"]["metadata"]["extraction_cache_hit"]
+
+if __name__ == "__main__":
+    test_unreachable_redis_falls_back_to_mock_cache()
+    test_connection_error_skips_the_cache()
+    print("✅ Tests cache d'extraction OK")
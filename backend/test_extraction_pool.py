@@ -0,0 +1,62 @@
+"""
+Tests du pool d'extraction : recyclage des workers après timeout, pas de pools imbriqués dans les workers
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.extraction import extraction_pipeline
+from contract_reader.extraction.extraction_pipeline import ExtractionPipeline, shutdown_extraction_pool
+
+def _stuck_extraction(source):
+    """Job de worker qui ne rend jamais la main dans le délai (Tesseract bloqué)"""
+    time.sleep(60)
+
+def test_timeout_kills_the_stuck_worker():
+    """Timeout : le worker occupé est arrêté et l'appel suivant obtient un pool neuf"""
+    with patch("contract_reader.extraction.ocr_processor.check_tesseract"):
+        pipeline = ExtractionPipeline(use_process_pool=True, pool_size=1, timeout_seconds=1)
+    
+    with patch.object(extraction_pipeline, "_extract_in_worker", _stuck_extraction):
+        pool = extraction_pipeline.get_extraction_pool(1)
+        pool.submit(time.sleep, 0).result()  # Worker démarré
+        workers = list(pool._processes.values())
+        try:
+            asyncio.run(pipeline.extract_document_async(b"%PDF-1.4"))
+            assert False, "timeout attendu"
+        except Exception as e:
+            assert "trop longue" in str(e)
+    
+    try:
+        assert workers
+        for process in workers:
+            process.join(timeout=5)
+            assert not process.is_alive()
+        assert extraction_pipeline.get_extraction_pool(1) is not pool
+    finally:
+        shutdown_extraction_pool(wait=False)
+
+def test_worker_pipeline_runs_text_and_ocr_sequentially():
+    """Pipeline des workers : extraction texte et OCR séquentielles, le pool d'extraction reste le seul pool"""
+    extraction_pipeline._worker_pipeline = None
+    with patch("contract_reader.extraction.ocr_processor.check_tesseract"), \
+            patch.object(ExtractionPipeline, "extract_document", return_value=(extraction_pipeline.ProcessedDocument(
+                raw_text="", cleaned_text="", sections={}, facts={}, pages=[], processing_stats={}
+            ), {})):
+        extraction_pipeline._extract_in_worker(b"%PDF-1.4")
+    
+    worker_pipeline = extraction_pipeline._worker_pipeline
+    extraction_pipeline._worker_pipeline = None
+    assert worker_pipeline.pdf_extractor.parallel_workers == 1
+    assert worker_pipeline.ocr_processor.config.parallel_workers == 1
+
+if __name__ == "__main__":
+    test_timeout_kills_the_stuck_worker()
+    test_worker_pipeline_runs_text_and_ocr_sequentially()
+    print("✅ Tests pool d'extraction OK")
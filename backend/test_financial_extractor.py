@@ -0,0 +1,95 @@
+"""
+Tests de FinancialExtractor : moteur tokenizer comparé aux patterns historiques
+Les écarts documentés dans le module sont vérifiés un par un
+"""
+
+import sys
+from pathlib import Path
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.extraction.financial_extractor import FinancialExtractor
+from contract_reader.extraction.pdf_extractor import PDFExtractor
+from benchmark_financial_extractor import SAMPLE_CLAUSE
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+def both_engines(text):
+    return (
+        FinancialExtractor(engine="regex").extract_financial_info(text),
+        FinancialExtractor(engine="tokenizer").extract_financial_info(text)
+    )
+
+def amounts(info):
+    return [amount["amount"] for amount in info["amounts_found"]]
+
+def sample_text(name):
+    pages, _ = PDFExtractor().extract_text_only((SAMPLES_DIR / name).read_bytes())
+    return "\n".join(page.text for page in pages)
+
+def test_same_payment_terms_on_samples():
+    """Conditions de paiement identiques sur les contrats d'exemple et la clause du benchmark"""
+    texts = [sample_text(path.name) for path in sorted(SAMPLES_DIR.glob("*.pdf"))] + [SAMPLE_CLAUSE]
+    for text in texts:
+        regex_info, tokenizer_info = both_engines(text)
+        assert sorted(tokenizer_info["payment_terms_found"]) == sorted(regex_info["payment_terms_found"])
+
+def test_same_amounts_on_plain_amounts():
+    """Montants sans séparateur de milliers : mêmes valeurs"""
+    regex_info, tokenizer_info = both_engines(sample_text("contrat_168602_domiciliation.pdf"))
+    assert amounts(tokenizer_info) == amounts(regex_info) == [3.0, 5.0, 15.0, 20.0]
+
+def test_thousands_separators():
+    """Écart documenté : "50 000" et "50.000" lus en entier (les patterns lisent 0.0 et 50.0)"""
+    regex_info, tokenizer_info = both_engines(sample_text("contrat_SCF_JAS_WORK4YOU_28022023_01_DIOP_Bassirou.pdf"))
+    assert amounts(tokenizer_info) == [50000.0, 630.0]
+    assert 50000.0 not in amounts(regex_info)
+    
+    _, tokenizer_info = both_engines("Plafond de garantie : 50.000 € par sinistre.")
+    assert amounts(tokenizer_info) == [50000.0]
+    _, tokenizer_info = both_engines("Montant forfaitaire : 12 500,00 euros HT.")
+    assert amounts(tokenizer_info) == [12500.0]
+    assert tokenizer_info["amounts_found"][0]["tax_basis"] == "HT"
+
+def test_decimals_are_not_thousands():
+    """Décimales à virgule ou à point de moins de trois chiffres inchangées"""
+    _, tokenizer_info = both_engines("Indemnité de 0,45 € /km et frais de 12.50 € par repas.")
+    assert amounts(tokenizer_info) == [0.45, 12.5]
+
+def test_leading_currency():
+    """Écart documenté : devise en tête reconnue par le tokenizer seulement"""
+    regex_info, tokenizer_info = both_engines("Prix forfaitaire : € 1 500 HT, acompte de EUR 300.")
+    assert amounts(regex_info) == []
+    assert amounts(tokenizer_info) == [1500.0, 300.0]
+    first = tokenizer_info["amounts_found"][0]
+    assert first["raw_text"] == "€ 1 500 HT"
+    assert first["tax_basis"] == "HT"
+
+def test_explicit_rate_unit_wins():
+    """Écart documenté : "/km" donne un contexte kilométrique même près de "journalier" """
+    regex_info, tokenizer_info = both_engines(SAMPLE_CLAUSE)
+    contexts = {amount["amount"]: amount["context"] for amount in tokenizer_info["amounts_found"]}
+    assert contexts[650.0] == "journalier"
+    assert contexts[0.45] == "kilométrique"
+    assert {amount["amount"]: amount["context"] for amount in regex_info["amounts_found"]}[0.45] == "journalier"
+
+def test_payment_keyword_window_is_bounded():
+    """Écart documenté : mot-clé de paiement cherché dans une fenêtre bornée avant "N jours" """
+    text = "Le paiement " + "intervient selon les modalités convenues entre les parties, " * 4 + "à 45 jours."
+    regex_info, tokenizer_info = both_engines(text)
+    assert len(regex_info["payment_terms_found"]) == 1
+    assert tokenizer_info["payment_terms_found"] == []
+    
+    regex_info, tokenizer_info = both_engines("Le paiement intervient à 45 jours de la facture.")
+    assert sorted(tokenizer_info["payment_terms_found"]) == sorted(regex_info["payment_terms_found"])
+
+if __name__ == "__main__":
+    test_same_payment_terms_on_samples()
+    test_same_amounts_on_plain_amounts()
+    test_thousands_separators()
+    test_decimals_are_not_thousands()
+    test_leading_currency()
+    test_explicit_rate_unit_wins()
+    test_payment_keyword_window_is_bounded()
+    print("✅ Tests FinancialExtractor OK")
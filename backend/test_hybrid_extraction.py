@@ -0,0 +1,97 @@
+"""
+Tests de l'extraction hybride (couche texte + OCR des pages en échec) et du repli OCR complet
+Tesseract et le rendu poppler remplacés par des doublures : seul le routage des pages est vérifié
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from PIL import Image
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.config.performance_config import PerformanceConfig
+from contract_reader.extraction.extraction_pipeline import ExtractionPipeline
+from contract_reader.extraction.ocr_processor import OCRProcessor, OCRConfig
+from contract_reader.extraction.pdf_extractor import ExtractedPage
+from contract_reader.extraction.pdf_triage import DocumentTriage
+
+SAMPLE_PDF = Path(__file__).parent.parent / "data" / "samples" / "contrat_168602_domiciliation.pdf"
+
+def pipeline():
+    with patch("contract_reader.extraction.ocr_processor.check_tesseract"):
+        return ExtractionPipeline(use_process_pool=False)
+
+class RecordingOCR:
+    """Doublure d'OCRProcessor : enregistre les pages demandées"""
+    
+    def __init__(self, page_count):
+        self.page_count = page_count
+        self.requested = None
+    
+    def count_pages(self, pdf_bytes):
+        return self.page_count
+    
+    def extract_with_ocr(self, pdf_bytes, page_numbers=None, language_hint=None):
+        self.requested = page_numbers
+        pages = [
+            ExtractedPage(number, f"Texte OCR de la page {number}. " * 5, [], 595.0, 842.0, "tesseract_ocr")
+            for number in page_numbers
+        ]
+        return pages, {"extraction_time_ms": 1}
+
+def test_ocr_fallback_respects_page_budget_without_triage():
+    """Triage illisible (nombre de pages inconnu) : l'OCR de repli reste limité au budget de pages"""
+    extraction = pipeline()
+    extraction.ocr_processor = RecordingOCR(page_count=120)
+    unreadable = DocumentTriage(page_count=0, encrypted=False, error="triage impossible")
+    
+    with patch("contract_reader.extraction.extraction_pipeline.triage_pdf", return_value=unreadable), \
+            patch.object(extraction.pdf_extractor, "extract_text_only", side_effect=Exception("couche texte illisible")), \
+            patch.object(PerformanceConfig, "MAX_PAGES_PER_CONTRACT", 5):
+        doc, stats = extraction.extract_document(SAMPLE_PDF.read_bytes())
+    
+    assert extraction.ocr_processor.requested == [1, 2, 3, 4, 5]
+    assert stats["extraction_method"] == "ocr_fallback"
+    assert stats["page_budget"]["stopped_by"] == "max_pages"
+
+def test_hybrid_pages_share_pdf_point_frame():
+    """Page re-OCRisée à 150 dpi fusionnée avec les pages texte : mêmes unités (points PDF)"""
+    extraction = pipeline()
+    with patch("contract_reader.extraction.ocr_processor.check_tesseract"):
+        extraction.ocr_processor = OCRProcessor(OCRConfig(parallel_workers=1, page_cache=False, detect_language=False))
+    
+    pdf_bytes = SAMPLE_PDF.read_bytes()
+    pages, _ = extraction.pdf_extractor.extract_text_with_positions(pdf_bytes)
+    text_page = pages[0]
+    
+    def rasterize(pdf, first_page, last_page, dpi):
+        size = (round(text_page.width * dpi / 72), round(text_page.height * dpi / 72))
+        return [Image.new("L", size, 255) for _ in range(first_page, last_page + 1)]
+    
+    def image_to_data(image, custom_config, language=None):
+        # Un mot en bas à droite de la page, en pixels du bitmap
+        words = " ".join(["Paraphe"] * 400)
+        return {
+            "text": [words], "conf": ["95"], "left": [image.width - 200], "top": [image.height - 100],
+            "width": [150], "height": [40], "block_num": [1], "par_num": [1], "line_num": [1]
+        }
+    
+    with patch.object(extraction.ocr_processor, "_rasterize", side_effect=rasterize), \
+            patch.object(extraction.ocr_processor, "_image_to_data", side_effect=image_to_data), \
+            patch("contract_reader.extraction.ocr_processor.get_tesseract_languages", return_value={"fra", "eng"}):
+        replaced = extraction._ocr_failing_pages(pdf_bytes, pages, [2], {})
+    
+    assert replaced == [2]
+    ocr_page = pages[1]
+    assert ocr_page.extraction_method == "tesseract_ocr"
+    assert (round(ocr_page.width), round(ocr_page.height)) == (round(text_page.width), round(text_page.height))
+    element = ocr_page.elements[0]
+    assert element.x + element.width <= ocr_page.width
+    assert element.y + element.height <= ocr_page.height
+
+if __name__ == "__main__":
+    test_ocr_fallback_respects_page_budget_without_triage()
+    test_hybrid_pages_share_pdf_point_frame()
+    print("✅ Tests extraction hybride OK")
@@ -0,0 +1,129 @@
+"""
+Tests de la détection de quasi-doublons (MinHash/LSH) sur les contrats d'exemple
+Redis remplacé par un dictionnaire en mémoire
+"""
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.cache.near_duplicate import NearDuplicateIndex
+from contract_reader.cache.redis_client import RedisClient
+from contract_reader.extraction.extraction_pipeline import ExtractionPipeline
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+class FakeRedis:
+    """Sous-ensemble de redis.asyncio utilisé par l'index"""
+    
+    def __init__(self):
+        self._data = {}
+    
+    async def get(self, key):
+        return self._data.get(key)
+    
+    async def setex(self, key, ttl, value):
+        self._data[key] = value
+        return True
+    
+    async def sadd(self, key, *values):
+        members = self._data.setdefault(key, set())
+        added = len(set(values) - members)
+        members.update(values)
+        return added
+    
+    async def smembers(self, key):
+        return set(self._data.get(key, set()))
+    
+    async def expire(self, key, ttl):
+        return key in self._data
+
+def memory_index() -> NearDuplicateIndex:
+    client = RedisClient()
+    client.redis = FakeRedis()
+    client._connected = True
+    return NearDuplicateIndex(client, threshold=0.9)
+
+def sample_text(name: str) -> str:
+    with patch("contract_reader.extraction.ocr_processor.check_tesseract"):
+        pipeline = ExtractionPipeline(use_process_pool=False)
+    doc, _ = pipeline.extract_document((SAMPLES_DIR / name).read_bytes())
+    return doc.ai_text
+
+CONSULTING = "Modele-de-contrat-de-consultance.pdf"
+DOMICILIATION = "contrat_168602_domiciliation.pdf"
+
+def test_noisy_copy_reuses_summary():
+    """Copie ré-exportée (casse, accents, espaces, mention de signature ajoutée) : même document, mêmes faits"""
+    index = memory_index()
+    text = sample_text(DOMICILIATION)
+    asyncio.run(index.add("original", text))
+    
+    noisy = " ".join(text.upper().replace("é", "e").split()) + "\nSigné électroniquement le document"
+    match = asyncio.run(index.find(noisy))
+    assert match is not None
+    assert match.document_hash == "original"
+    assert match.similarity >= 0.9
+    assert match.facts_match
+
+def test_changed_amount_is_not_reused():
+    """Même modèle rempli avec un autre montant : trouvé, mais résumé non réutilisable"""
+    index = memory_index()
+    text = sample_text(DOMICILIATION)
+    asyncio.run(index.add("original", text))
+    
+    amount = next(fact for fact in index.key_facts(text) if fact.startswith("amounts:"))
+    original_value = next(value for value in index.fact_scanner.scan(text).facts_by_type()["amounts"]
+                          if f"amounts:{''.join(value.lower().split())}" == amount)
+    changed = text.replace(original_value, "987 654 €")
+    assert changed != text
+    
+    match = asyncio.run(index.find(changed))
+    assert match is not None
+    assert match.document_hash == "original"
+    assert not match.facts_match
+
+def test_different_contract_has_no_match():
+    """Autre contrat : aucun quasi-doublon"""
+    index = memory_index()
+    asyncio.run(index.add("domiciliation", sample_text(DOMICILIATION)))
+    assert asyncio.run(index.find(sample_text(CONSULTING))) is None
+
+def test_unreachable_redis_finds_nothing():
+    """Redis injoignable : recherche et indexation sans erreur, aucun quasi-doublon"""
+    client = RedisClient("redis://127.0.0.1:1")
+    index = NearDuplicateIndex(client)
+    text = sample_text(DOMICILIATION)
+    
+    with patch.object(client, "connect", side_effect=ConnectionError("Redis injoignable")):
+        asyncio.run(index.add("original", text))
+        assert asyncio.run(index.find(text)) is None
+
+def test_index_is_inactive_without_numpy():
+    """NumPy absent : module importable, find/add sans effet"""
+    script = (
+        "import asyncio, sys; sys.modules['numpy'] = None\n"
+        "from contract_reader.cache.near_duplicate import NearDuplicateIndex, NUMPY_AVAILABLE\n"
+        "class Unused:\n"
+        "    def __getattr__(self, name): raise AssertionError(name)\n"
+        "index = NearDuplicateIndex(Unused())\n"
+        "text = 'Le prestataire facture 1 500 euros par mois ' * 20\n"
+        "asyncio.run(index.add('doc', text))\n"
+        "assert asyncio.run(index.find(text)) is None\n"
+        "assert not NUMPY_AVAILABLE\n"
+    )
+    completed = subprocess.run([sys.executable, "-c", script], cwd=Path(__file__).parent, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+
+if __name__ == "__main__":
+    test_noisy_copy_reuses_summary()
+    test_changed_amount_is_not_reused()
+    test_different_contract_has_no_match()
+    test_unreachable_redis_finds_nothing()
+    test_index_is_inactive_without_numpy()
+    print("✅ Tests quasi-doublons OK")
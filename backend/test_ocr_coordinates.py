@@ -0,0 +1,78 @@
+"""
+Tests du repère des pages OCR : boîtes et dimensions en points PDF quel que soit le dpi
+Reconnaissance Tesseract remplacée par une sortie TSV fixe (pas de binaire requis)
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from PIL import Image
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.extraction.ocr_processor import OCRProcessor, OCRConfig
+
+A4_POINTS = (595, 842)
+# Mots en points PDF : (texte, x, y, largeur, hauteur)
+WORDS = [("Contrat", 72, 72, 60, 12), ("de", 136, 72, 16, 12), ("prestation", 156, 72, 80, 12), ("Article", 72, 120, 50, 12)]
+
+def tsv_at(dpi):
+    """Sortie image_to_data d'une page A4 rendue à dpi"""
+    scale = dpi / 72
+    data = {key: [] for key in ("text", "conf", "left", "top", "width", "height", "block_num", "par_num", "line_num")}
+    for index, (text, x, y, width, height) in enumerate(WORDS):
+        data["text"].append(text)
+        data["conf"].append("95")
+        data["left"].append(round(x * scale))
+        data["top"].append(round(y * scale))
+        data["width"].append(round(width * scale))
+        data["height"].append(round(height * scale))
+        data["block_num"].append(1)
+        data["par_num"].append(1)
+        data["line_num"].append(1 if y == 72 else 2)
+    return data
+
+def ocr_processor():
+    with patch("contract_reader.extraction.ocr_processor.check_tesseract"):
+        return OCRProcessor(OCRConfig(page_cache=False))
+
+def ocr_page(dpi, enhance=False):
+    """OCR simulé d'une page A4 rendue à dpi"""
+    processor = ocr_processor()
+    image = Image.new("L", (round(A4_POINTS[0] * dpi / 72), round(A4_POINTS[1] * dpi / 72)), 255)
+    
+    def image_to_data(ocr_image, custom_config, language=None):
+        # Une image agrandie par enhance_image_for_ocr donne des coordonnées à son échelle
+        return tsv_at(dpi * ocr_image.width / image.width)
+    
+    with patch.object(processor, "_image_to_data", side_effect=image_to_data):
+        [(page, confidence)] = processor._ocr_images([image], 1, dpi, enhance=enhance)
+    return page
+
+def boxes(page):
+    return [(element.text, round(element.x), round(element.y), round(element.width), round(element.height)) for element in page.elements]
+
+def test_page_size_in_points():
+    """Dimensions de page en points, identiques à 150 et 300 dpi"""
+    for dpi in (150, 300):
+        page = ocr_page(dpi)
+        assert (round(page.width), round(page.height)) == A4_POINTS
+
+def test_boxes_consistent_across_dpi():
+    """Une page passée à 150 dpi et une page re-scannée à 300 dpi partagent le même repère"""
+    low, high = ocr_page(150), ocr_page(300)
+    assert boxes(low) == boxes(high)
+    assert boxes(high)[0] == ("Contrat de prestation", 72, 72, 164, 12)
+
+def test_enhanced_rescan_compensates_resize():
+    """Image agrandie avant OCR (moins de 1000 px de large) : boîtes ramenées au repère de la page"""
+    page = ocr_page(100, enhance=True)
+    assert (round(page.width), round(page.height)) == A4_POINTS
+    assert boxes(page)[0] == ("Contrat de prestation", 72, 72, 164, 12)
+
+if __name__ == "__main__":
+    test_page_size_in_points()
+    test_boxes_consistent_across_dpi()
+    test_enhanced_rescan_compensates_resize()
+    print("✅ Tests repère OCR OK")
@@ -0,0 +1,231 @@
+"""
+Tests de la coalescence des traitements identiques (SingleFlight)
+Redis remplacé par un client en mémoire (bail, pub/sub) partagé entre instances comme entre workers
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.cache import single_flight
+from contract_reader.cache.redis_client import RedisClient
+from contract_reader.cache.single_flight import SingleFlight, LeaderFailed, LEADER, FOLLOWER, UNCOORDINATED
+
+class FakePubSub:
+    """Abonnement pub/sub en mémoire"""
+    
+    def __init__(self, client, channel):
+        self.client = client
+        self.channel = channel
+        self.queue = asyncio.Queue()
+        client.subscribers.setdefault(channel, []).append(self)
+    
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+    
+    async def unsubscribe(self):
+        self.client.subscribers[self.channel].remove(self)
+    
+    async def aclose(self):
+        pass
+
+class FakeLeaseClient:
+    """Méthodes de RedisClient utilisées par SingleFlight"""
+    
+    def __init__(self):
+        self.leases = {}
+        self.subscribers = {}
+        self.published = []
+        self.fail_publish = False
+    
+    async def acquire_lease(self, name, token, ttl):
+        if name in self.leases:
+            return False
+        self.leases[name] = token
+        return True
+    
+    async def renew_lease(self, name, token, ttl):
+        return self.leases.get(name) == token
+    
+    async def release_lease(self, name, token):
+        if self.leases.get(name) != token:
+            return False
+        del self.leases[name]
+        return True
+    
+    async def lease_exists(self, name):
+        return name in self.leases
+    
+    async def publish(self, channel, message):
+        if self.fail_publish:
+            raise ConnectionError("Redis indisponible")
+        self.published.append(message)
+        for pubsub in list(self.subscribers.get(channel, [])):
+            pubsub.queue.put_nowait({"type": "message", "data": message.encode()})
+        return len(self.subscribers.get(channel, []))
+    
+    async def subscribe(self, channel):
+        return FakePubSub(self, channel)
+
+async def run_requests(flights, results, count=5):
+    """count demandes identiques réparties sur les instances ; results.compute() simule le traitement"""
+    async def request(flight):
+        async with flight.flight("doc:standard") as role:
+            return role, await results.compute(role)
+    
+    return await asyncio.gather(*(request(flights[index % len(flights)]) for index in range(count)))
+
+class Results:
+    """Traitement simulé : échoue pour les premiers meneurs si demandé"""
+    
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.leader_runs = 0
+    
+    async def compute(self, role):
+        if role != LEADER:
+            return "cache"
+        self.leader_runs += 1
+        await asyncio.sleep(0.05)
+        if self.leader_runs <= self.failures:
+            raise LeaderFailed({"success": False})
+        return "computed"
+
+def run(coroutine):
+    with patch.object(single_flight, "POLL_INTERVAL_SECONDS", 0.02):
+        return asyncio.run(coroutine)
+
+def test_identical_requests_compute_once():
+    """Demandes simultanées dans le process : un meneur, les autres relisent le cache"""
+    client = FakeLeaseClient()
+    results = Results()
+    outcomes = run(run_requests([SingleFlight(client)], results))
+    
+    assert results.leader_runs == 1
+    assert sorted(role for role, _ in outcomes) == [FOLLOWER] * 4 + [LEADER]
+    assert client.leases == {}
+    assert client.published == ["done"]
+
+def test_failed_leader_is_replaced_by_one_follower():
+    """Meneur en échec : un seul suivant reprend, les autres attendent ce nouveau meneur"""
+    client = FakeLeaseClient()
+    results = Results(failures=1)
+    flight = SingleFlight(client)
+    
+    async def scenario():
+        async def request():
+            try:
+                async with flight.flight("doc:standard") as role:
+                    return role, await results.compute(role)
+            except LeaderFailed:
+                return LEADER, "failed"
+        return await asyncio.gather(*(request() for _ in range(5)))
+    
+    outcomes = run(scenario())
+    assert results.leader_runs == 2
+    assert outcomes.count((LEADER, "failed")) == 1
+    assert outcomes.count((LEADER, "computed")) == 1
+    assert outcomes.count((FOLLOWER, "cache")) == 3
+    assert flight.stats["takeovers"] == 1
+    assert client.published == ["failed", "done"]
+
+def test_failed_leader_in_another_worker_is_replaced_once():
+    """Meneur en échec dans un autre worker : notification "failed", un seul worker en attente reprend le bail"""
+    client = FakeLeaseClient()
+    results = Results(failures=1)
+    workers = [SingleFlight(client), SingleFlight(client), SingleFlight(client)]
+    
+    async def scenario():
+        async def request(flight):
+            try:
+                async with flight.flight("doc:standard") as role:
+                    return role, await results.compute(role)
+            except LeaderFailed:
+                return LEADER, "failed"
+        return await asyncio.gather(*(request(flight) for flight in workers))
+    
+    outcomes = run(scenario())
+    assert results.leader_runs == 2
+    assert outcomes.count((FOLLOWER, "cache")) == 1
+    assert sum(flight.stats["failed_leaders"] for flight in workers) >= 1
+
+def test_redis_cleanup_error_does_not_block_followers():
+    """Notification Redis en erreur : suivants libérés, bail libéré quand même, pas d'erreur chez le meneur"""
+    client = FakeLeaseClient()
+    client.fail_publish = True
+    results = Results()
+    outcomes = run(run_requests([SingleFlight(client)], results, count=3))
+    
+    assert results.leader_runs == 1
+    assert sorted(role for role, _ in outcomes) == [FOLLOWER, FOLLOWER, LEADER]
+    assert client.leases == {}
+
+def test_followers_released_before_slow_cleanup():
+    """Nettoyage Redis lent : les suivants du process n'attendent pas sa fin"""
+    client = FakeLeaseClient()
+    flight = SingleFlight(client)
+    
+    async def scenario():
+        blocked = asyncio.Event()
+        original_publish = client.publish
+        
+        async def slow_publish(channel, message):
+            await blocked.wait()
+            return await original_publish(channel, message)
+        client.publish = slow_publish
+        
+        async def leader():
+            async with flight.flight("doc:standard") as role:
+                await asyncio.sleep(0.05)
+                return role
+        
+        async def follower():
+            await asyncio.sleep(0.01)
+            async with flight.flight("doc:standard") as role:
+                return role
+        
+        leader_task = asyncio.create_task(leader())
+        follower_role = await asyncio.wait_for(follower(), timeout=1)
+        assert not leader_task.done()
+        blocked.set()
+        return follower_role, await leader_task
+    
+    assert run(scenario()) == (FOLLOWER, LEADER)
+
+def test_unreachable_redis_runs_uncoordinated():
+    """Serveur Redis injoignable (repli mock) : calcul sans coordination entre workers, coalescence locale conservée"""
+    flight = SingleFlight(RedisClient("redis://127.0.0.1:1"))
+    results = Results()
+    outcomes = run(run_requests([flight], results, count=3))
+    
+    assert sorted(role for role, _ in outcomes) == [FOLLOWER, FOLLOWER, UNCOORDINATED]
+    assert flight.stats["uncoordinated"] == 1
+
+def test_redis_connection_error_runs_uncoordinated():
+    """Connexion Redis en erreur : aucune exception ne sort de flight(), calcul sans coordination"""
+    client = RedisClient("redis://127.0.0.1:1")
+    flight = SingleFlight(client)
+    
+    async def scenario():
+        async with flight.flight("doc:standard") as role:
+            return role
+    
+    with patch.object(client, "connect", side_effect=ConnectionError("Redis injoignable")):
+        assert run(scenario()) == UNCOORDINATED
+
+if __name__ == "__main__":
+    test_identical_requests_compute_once()
+    test_failed_leader_is_replaced_by_one_follower()
+    test_failed_leader_in_another_worker_is_replaced_once()
+    test_redis_cleanup_error_does_not_block_followers()
+    test_followers_released_before_slow_cleanup()
+    test_unreachable_redis_runs_uncoordinated()
+    test_redis_connection_error_runs_uncoordinated()
+    print("✅ Tests single-flight OK")
@@ -0,0 +1,84 @@
+"""
+Tests du choix entre appel unique et résumé par extraits
+Les contrats d'exemple (8 à 10k tokens) doivent rester en appel unique ; seuls les documents surdimensionnés sont découpés
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.ai.ai_summarizer import AISummarizer, SUMMARY_INPUT_TOKENS
+from contract_reader.extraction.extraction_pipeline import ExtractionPipeline
+from contract_reader.extraction.financial_extractor import FinancialExtractor
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+def sample_texts():
+    with patch("contract_reader.extraction.ocr_processor.check_tesseract"):
+        pipeline = ExtractionPipeline(use_process_pool=False)
+    for sample in sorted(SAMPLES_DIR.glob("*.pdf")):
+        doc, _ = pipeline.extract_document(sample.read_bytes())
+        yield sample.name, doc.ai_text
+
+def test_sample_contracts_take_the_single_call():
+    """Contrat courant : texte entier dans le budget standard, pas de résumé par extraits"""
+    summarizer = AISummarizer()
+    for name, text in sample_texts():
+        optimized_text, coverage = summarizer._optimize_input_text(text, "standard")
+        assert not coverage["packed"], name
+        assert not summarizer._needs_chunking(coverage), name
+        
+        # Mode rapide : contexte condensé, mais toujours un seul appel
+        _, quick_coverage = summarizer._optimize_input_text(text, "quick")
+        assert not summarizer._needs_chunking(quick_coverage), name
+
+def test_oversized_document_is_chunked():
+    """Document plusieurs fois plus long que le budget : résumé par extraits"""
+    summarizer = AISummarizer()
+    _, text = next(sample_texts())
+    text = " ".join([text] * 8)
+    _, coverage = summarizer._optimize_input_text(text, "standard")
+    assert coverage["total_tokens"] >= 3 * SUMMARY_INPUT_TOKENS["standard"]
+    assert summarizer._needs_chunking(coverage)
+
+class FakeCompletions:
+    """Réponses OpenAI factices : fragment JSON vide par extrait"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"summary_plain": "extrait"})))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10, total_tokens=110)
+        )
+
+def test_chunked_summary_extracts_financials_once():
+    """Résumé par extraits : informations financières extraites une fois pour le document, pas par extrait"""
+    summarizer = AISummarizer()
+    completions = FakeCompletions()
+    summarizer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    summarizer.config = summarizer.config.model_copy(update={"summary_chunk_tokens": 3000, "max_cost_cents": 100.0})
+    _, text = next(sample_texts())
+    
+    with patch.object(FinancialExtractor, "extract_financial_info", autospec=True,
+                      side_effect=FinancialExtractor.extract_financial_info) as extract:
+        result = asyncio.run(summarizer.generate_chunked_summary(text, "contrat.pdf"))
+    
+    assert result["success"]
+    assert result["chunks"] > 1
+    assert completions.calls == result["chunks"]
+    assert extract.call_count == 1
+
+if __name__ == "__main__":
+    test_sample_contracts_take_the_single_call()
+    test_oversized_document_is_chunked()
+    test_chunked_summary_extracts_financials_once()
+    print("✅ Tests routage du résumé OK")
@@ -0,0 +1,43 @@
+"""
+Tests du comptage de tokens partagé
+Import sans effet de bord, troncature et chiffrage
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+# Ajout du chemin backend pour imports
+sys.path.append(str(Path(__file__).parent))
+
+from contract_reader.ai.token_counter import TokenCounter
+
+def test_import_without_side_effects():
+    """Le service d'extraction historique importe le compteur sans charger le pipeline ni OpenAI"""
+    code = (
+        "import sys; from contract_reader.ai.token_counter import get_token_counter; "
+        "print(sorted(m for m in sys.modules if m.startswith('contract_reader')))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "['contract_reader', 'contract_reader.ai', 'contract_reader.ai.token_counter']"
+
+def test_truncation_respects_budget():
+    """head, tail et truncate_middle ne dépassent jamais le budget demandé"""
+    counter = TokenCounter()
+    text = "Le prestataire s'engage à livrer les prestations dans les délais convenus. " * 200
+    for method in (counter.head, counter.tail, counter.truncate_middle):
+        assert counter.count(method(text, 100)) <= 100
+    assert counter.head("court", 100) == "court"
+
+def test_cost_cents():
+    """Coût calculé avec le tarif du modèle (entrée et sortie séparées)"""
+    counter = TokenCounter("gpt-4o-mini")
+    assert abs(counter.cost_cents(1000, 1000) - 0.075) < 1e-9
+
+if __name__ == "__main__":
+    test_import_without_side_effects()
+    test_truncation_respects_budget()
+    test_cost_cents()
+    print("✅ Tests token_counter OK")